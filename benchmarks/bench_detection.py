@@ -0,0 +1,204 @@
+# Detection hot paths: called on every request or every evaluation tick
+import os
+import random
+import tempfile
+
+from patterns.detection.cardinality import CardinalityLimiter
+from patterns.detection.critical_path_monitor import CRITICAL_PATHS, CriticalPathMonitor
+from patterns.detection.local_tsdb import LocalTSDB
+from patterns.detection.middleware import RouteTrie
+from patterns.detection.self_telemetry import MonitorTelemetry
+from patterns.detection.shared_metrics import (
+    HostMetricsCollector,
+    SharedMemoryCriticalPathMonitor,
+    SharedSegment,
+)
+from patterns.detection.sli_monitor import SLIMonitor
+
+from .fakes import (
+    FakeAlerter,
+    FakeMetricsBackend,
+    FakePrometheus,
+    install_integration_points,
+    peak_alloc_bytes,
+    retained_bytes_per_call,
+)
+
+# Backend answers that keep each monitor under / over its thresholds
+BACKEND_STATES = {
+    'healthy': {'success_rate': 99.95, 'p95': 120.0},
+    'degraded': {'success_rate': 95.0, 'p95': 5000.0},
+}
+
+
+class CriticalPathTrackRequest:
+    params = (['healthy', 'degraded'], list(CRITICAL_PATHS))
+    param_names = ['backend_state', 'path_name']
+
+    def setup(self, backend_state, path_name):
+        self.monitor = CriticalPathMonitor(FakeMetricsBackend(**BACKEND_STATES[backend_state]))
+        self.monitor.alert = FakeAlerter().alert
+
+    def time_track_request(self, backend_state, path_name):
+        self.monitor.track_request(path_name, 87.5, True)
+
+    def track_peak_alloc_bytes(self, backend_state, path_name):
+        return peak_alloc_bytes(self.monitor.track_request, path_name, 87.5, True)
+    track_peak_alloc_bytes.unit = 'bytes'
+
+    def track_retained_bytes_per_call(self, backend_state, path_name):
+        return retained_bytes_per_call(self.monitor.track_request, path_name, 87.5, True)
+    track_retained_bytes_per_call.unit = 'bytes'
+
+
+class CardinalityLimitedWrites:
+    """
+    Cost of the cardinality limiter on admitted and folded tag values
+    """
+    def setup(self):
+        self.limiter = CardinalityLimiter(FakeMetricsBackend(), default_limit=100)
+        self.users = [f'user-{i}' for i in range(10000)]
+        for user in self.users[:100]:
+            self.limiter.increment('api.requests', tags={'user': user, 'status': '200'})
+
+    def time_admitted(self):
+        self.limiter.increment('api.requests', tags={'user': 'user-7', 'status': '200'})
+
+    def time_folded(self):
+        self.limiter.increment('api.requests', tags={'user': 'user-9000', 'status': '200'})
+
+    def track_retained_bytes_overflow(self):
+        users = iter(self.users[100:])
+        return retained_bytes_per_call(
+            lambda: self.limiter.increment('api.requests', tags={'user': next(users)})
+        )
+    track_retained_bytes_overflow.unit = 'bytes'
+
+
+class CriticalPathThroughput:
+    """
+    Sustained track_request rate across every critical path
+    """
+    number = 1
+    repeat = 5
+
+    def setup(self):
+        self.monitor = CriticalPathMonitor(FakeMetricsBackend())
+        self.monitor.alert = FakeAlerter().alert
+        self.paths = list(CRITICAL_PATHS) * 2500
+
+    def time_10k_requests(self):
+        track = self.monitor.track_request
+        for path_name in self.paths:
+            track(path_name, 87.5, True)
+
+
+class SLICheck:
+    params = (['healthy', 'violated'], ['api_availability', 'api_latency', 'queue_lag'])
+    param_names = ['state', 'sli_name']
+
+    # Query answers on the good / bad side of each SLI target
+    VALUES = {
+        'api_availability': {'healthy': 99.9, 'violated': 97.0},
+        'api_latency': {'healthy': 180.0, 'violated': 900.0},
+        'queue_lag': {'healthy': 5.0, 'violated': 300.0},
+    }
+
+    def setup(self, state, sli_name):
+        install_integration_points()
+        self.monitor = SLIMonitor(FakePrometheus(self.VALUES[sli_name][state]))
+
+    def time_check_sli(self, state, sli_name):
+        self.monitor.check_sli(sli_name)
+
+    def track_peak_alloc_bytes(self, state, sli_name):
+        return peak_alloc_bytes(self.monitor.check_sli, sli_name)
+    track_peak_alloc_bytes.unit = 'bytes'
+
+
+class TelemetrySpan:
+    """
+    Cost the self-telemetry adds to every backend call
+    """
+    def setup(self):
+        self.backend = FakeMetricsBackend()
+        self.wrapped = MonitorTelemetry().wrap_callable(
+            'critical_path', 'backend', 'increment', self.backend.increment
+        )
+
+    def time_raw_backend_call(self):
+        self.backend.increment('critical_path.user_signup.requests', tags=None)
+
+    def time_instrumented_backend_call(self):
+        self.wrapped('critical_path.user_signup.requests', tags=None)
+
+
+class SharedMemoryTrackRequest:
+    """
+    Pre-fork worker path: one shared-memory write per request, no backend call
+    """
+    def setup(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        segment = SharedSegment(os.path.join(self.tmpdir.name, 'segment'), slots=32)
+        self.monitor = SharedMemoryCriticalPathMonitor(segment)
+        self.collector = HostMetricsCollector(segment, FakeMetricsBackend())
+        self.collector.alert = FakeAlerter().alert
+        self.monitor.track_request('payment_processing', 240.0, True)
+
+    def teardown(self):
+        self.tmpdir.cleanup()
+
+    def time_track_request(self):
+        self.monitor.track_request('payment_processing', 240.0, True)
+
+    def time_collector_flush(self):
+        self.collector.flush()
+
+
+class RouteClassification:
+    """
+    Middleware cost of deciding whether a request is on a critical path
+    """
+    params = ['/healthz', '/api/v1/search', '/api/v1/payments', '/api/v1/payments/42/refund']
+    param_names = ['path']
+
+    def setup(self, path):
+        self.routes = RouteTrie()
+
+    def time_match(self, path):
+        self.routes.match(path)
+
+
+class LocalTSDBWindowQueries:
+    """
+    Embedded metrics backend: writes and 5-minute window queries over rollups
+    """
+    def setup(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.now = 1_700_000_000.0
+        self.tsdb = LocalTSDB(self.tmpdir.name, clock=lambda: self.now)
+
+        rng = random.Random(42)
+        # Ten minutes of traffic at 50 requests/second
+        for i in range(30000):
+            ts = self.now - 600 + i * 0.02
+            self.tsdb.histogram(
+                'critical_path.user_signup.latency_ms', rng.lognormvariate(4, 0.5), timestamp=ts
+            )
+            self.tsdb.increment(
+                'critical_path.user_signup.requests',
+                tags={'success': str(rng.random() < 0.999)}, timestamp=ts
+            )
+
+    def teardown(self):
+        self.tsdb.close()
+        self.tmpdir.cleanup()
+
+    def time_get_percentile_5m(self):
+        self.tsdb.get_percentile('critical_path.user_signup.latency_ms', percentile=95, window='5m')
+
+    def time_get_success_rate_5m(self):
+        self.tsdb.get_success_rate('critical_path.user_signup.requests', window='5m')
+
+    def time_histogram_write(self):
+        self.tsdb.histogram('critical_path.user_signup.latency_ms', 87.5)
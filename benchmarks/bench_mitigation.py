@@ -0,0 +1,68 @@
+# Mitigation hot paths: evaluated every tick of a deployment watch loop
+from patterns.detection.alert_pipeline import AlertPipeline
+from patterns.mitigtion.automated_rollback import AutomatedRollback
+from patterns.mitigtion.traffic_shift import SlotTable
+
+from .fakes import FakeReceiver, peak_alloc_bytes
+
+BASELINE = {'error_rate': 0.4, 'latency_p95': 180.0, 'success_rate': 99.6}
+
+# One sample per branch of _metrics_degraded, plus the all-clear path
+CURRENT = {
+    'healthy': {'error_rate': 0.5, 'latency_p95': 190.0, 'success_rate': 99.5},
+    'error_rate': {'error_rate': 2.0, 'latency_p95': 190.0, 'success_rate': 99.5},
+    'latency': {'error_rate': 0.5, 'latency_p95': 900.0, 'success_rate': 99.5},
+    'success_rate': {'error_rate': 0.5, 'latency_p95': 190.0, 'success_rate': 90.0},
+}
+
+
+class RollbackMetricsDegraded:
+    params = list(CURRENT)
+    param_names = ['current']
+
+    def setup(self, current):
+        self.rollback = AutomatedRollback(deployment_service=None, health_checker=None)
+        self.current = CURRENT[current]
+
+    def time_metrics_degraded(self, current):
+        self.rollback._metrics_degraded(BASELINE, self.current)
+
+    def track_peak_alloc_bytes(self, current):
+        return peak_alloc_bytes(self.rollback._metrics_degraded, BASELINE, self.current)
+    track_peak_alloc_bytes.unit = 'bytes'
+
+
+class AlertSubmit:
+    """
+    What a mitigation loop pays to raise an alert through the shared pipeline
+    """
+    def setup(self):
+        self.pipeline = AlertPipeline(receivers={'pager': FakeReceiver(), 'chat': FakeReceiver()})
+        self.rollback = AutomatedRollback(deployment_service=None, health_checker=None)
+        self.rollback.alert_pipeline = self.pipeline.start()
+
+    def teardown(self):
+        self.pipeline.stop()
+
+    def time_alert(self):
+        self.rollback.alert(
+            severity='P0',
+            title="Auto-rollback triggered for payment-service",
+            message="Rolled back v2.3.1 → v2.3.0 due to health degradation"
+        )
+
+
+class TrafficShiftRebalance:
+    """
+    Slot-table update pushed to the load balancer on every shift step
+    """
+    def setup(self):
+        self.weights = [
+            {'us-east': 100 - moved, 'us-west': moved * 0.8, 'eu-west': moved * 0.2}
+            for moved in (10, 25, 50, 75, 100)
+        ]
+
+    def time_full_ramp(self):
+        table = SlotTable('us-east')
+        for weights in self.weights:
+            table.rebalance(weights)
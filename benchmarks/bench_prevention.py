@@ -0,0 +1,96 @@
+# Prevention hot paths: deployment gates run on every pipeline execution
+import logging
+
+from patterns.prevention import progressive_rollout
+from patterns.prevention.capacity_simulator import ServiceTime, simulate
+from patterns.prevention.rollout_orchestrator import RolloutOrchestrator
+from patterns.prevention.testing_gates import PreDeploymentGate
+
+from .fakes import install_integration_points, peak_alloc_bytes
+
+PASSING_RESULTS = {
+    'unit_coverage': 86,
+    'integration_scenarios': [
+        'happy_path', 'error_handling', 'timeout_handling', 'dependency_failure'
+    ],
+    'load_test': {'error_rate': 0.2, 'latency_p95': 310},
+    'chaos_scenarios': [
+        'database_unavailable', 'dependency_timeout', 'high_latency', 'partial_deployment'
+    ],
+}
+
+FAILING_RESULTS = {
+    'unit_coverage': 61,
+    'integration_scenarios': ['happy_path'],
+    'load_test': {'error_rate': 3.5, 'latency_p95': 1200},
+    'chaos_scenarios': ['high_latency'],
+}
+
+
+class DeploymentGate:
+    params = (['passing', 'failing'], ['payment-service', 'internal-tool'])
+    param_names = ['results', 'service_name']
+
+    def setup(self, results, service_name):
+        install_integration_points()
+        self.gate = PreDeploymentGate()
+        self.results = PASSING_RESULTS if results == 'passing' else FAILING_RESULTS
+
+    def time_can_deploy(self, results, service_name):
+        self.gate.can_deploy(service_name, self.results)
+
+    def track_peak_alloc_bytes(self, results, service_name):
+        return peak_alloc_bytes(self.gate.can_deploy, service_name, self.results)
+    track_peak_alloc_bytes.unit = 'bytes'
+
+
+class InstantRollout(progressive_rollout.ProgressiveRollout):
+    """
+    Rollout whose stages pass immediately, leaving only scheduling cost
+    """
+    def set_traffic_split(self, service_name, new_version, percentage):
+        pass
+
+    def monitor_health(self, service_name, duration_minutes):
+        return True
+
+    def rollback(self, service_name, new_version):
+        pass
+
+
+class ReleaseTrainScheduling:
+    """
+    Orchestrator overhead for a release train, per service count and graph shape
+    """
+    params = ([40, 400], ['flat', 'layered'])
+    param_names = ['services', 'shape']
+
+    def setup(self, services, shape):
+        progressive_rollout.logger = logging.getLogger('benchmarks.rollout')
+        self.orchestrator = RolloutOrchestrator(InstantRollout())
+        self.versions = {f'service-{i}': 'v2' for i in range(services)}
+        # Layered: each service depends on two in the previous layer of ten
+        self.dependencies = {} if shape == 'flat' else {
+            f'service-{i}': [f'service-{j}' for j in (i - 10, i - 9) if j >= (i // 10 - 1) * 10]
+            for i in range(10, services)
+        }
+
+    def time_deploy_all(self, services, shape):
+        self.orchestrator.deploy_all(self.versions, self.dependencies)
+
+
+class CapacitySimulation:
+    """
+    Simulated requests per second of wall clock, near and past saturation
+    """
+    params = [0.7, 1.2]
+    param_names = ['utilization']
+
+    def setup(self, utilization):
+        self.service_time = ServiceTime(median_ms=20, sigma=0.5)
+        # 4 instances x 8 workers at ~22.7ms mean service time
+        rps = utilization * 32 / 0.0227
+        self.curve = [(10, rps)]
+
+    def time_simulate(self, utilization):
+        simulate(self.curve, self.service_time, instances=4, bulkhead=8)
@@ -0,0 +1,67 @@
+# Resolution hot paths: action items are re-prioritized on every review
+import json
+import os
+import random
+import tempfile
+from types import SimpleNamespace
+
+from patterns.resolution.priority_framework import calculate_action_item_priority
+from tools.analysis.incident_analyzer import analyze_shard
+
+from .fakes import peak_alloc_bytes
+
+ACTION_ITEMS = {
+    'p0': SimpleNamespace(
+        frequency='weekly', typical_duration='hours', user_impact='revenue_blocking'
+    ),
+    'p2': SimpleNamespace(
+        frequency='rarely', typical_duration='under_10_min', user_impact='cosmetic'
+    ),
+}
+
+
+class ActionItemPriority:
+    params = list(ACTION_ITEMS)
+    param_names = ['action_item']
+
+    def setup(self, action_item):
+        self.action_item = ACTION_ITEMS[action_item]
+
+    def time_calculate_priority(self, action_item):
+        calculate_action_item_priority(self.action_item)
+
+    def track_peak_alloc_bytes(self, action_item):
+        return peak_alloc_bytes(calculate_action_item_priority, self.action_item)
+    track_peak_alloc_bytes.unit = 'bytes'
+
+
+class IncidentShardAnalysis:
+    """
+    Per-worker cost of reliability-analyze over incident records and event lines
+    """
+    def setup(self):
+        rng = random.Random(7)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'incidents.jsonl')
+        with open(self.path, 'w') as f:
+            for i in range(5000):
+                started = 1.7e9 + i * 3600
+                f.write(json.dumps({
+                    'id': f'INC-{i}',
+                    'severity': rng.choice(['P0', 'P1', 'P2']),
+                    'started_at': started,
+                    'root_cause': rng.choice(['Connection pool exhausted', 'Bad config push']),
+                    'action_items': [{'priority': 'P1', 'status': rng.choice(['done', 'open'])}],
+                }) + '\n')
+                for event, delay in (('detected', 300), ('resolved', 3600)):
+                    f.write(json.dumps({
+                        'incident_id': f'INC-{i}', 'event': event,
+                        'timestamp': started + rng.expovariate(1 / delay),
+                    }) + '\n')
+        self.shard = (self.path, 0, os.path.getsize(self.path))
+
+    def teardown(self):
+        self.tmp.cleanup()
+
+    def time_analyze_shard(self):
+        analyze_shard(self.shard)
@@ -0,0 +1,113 @@
+# Local stand-ins for the backends the patterns talk to
+import tracemalloc
+from collections import namedtuple
+
+
+class FakeMetricsBackend:
+    """
+    In-memory metrics backend with fixed query answers
+    """
+    def __init__(self, success_rate=99.95, p95=120.0):
+        self.success_rate = success_rate
+        self.p95 = p95
+        self.histograms = {}
+        self.counters = {}
+
+    def histogram(self, name, value, tags=None):
+        self.histograms[name] = value
+
+    def increment(self, name, tags=None, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name, value, tags=None):
+        self.histograms[name] = value
+
+    def get_success_rate(self, name, window='5m'):
+        return self.success_rate
+
+    def get_percentile(self, name, percentile=95, window='5m'):
+        return self.p95
+
+
+class FakePrometheus:
+    """
+    Prometheus client that answers every query with the same value
+    """
+    def __init__(self, value):
+        self.value = value
+
+    def query(self, expression):
+        return self.value
+
+
+class FakeAlerter:
+    """
+    Swallows alerts so benchmarks measure evaluation, not delivery
+    """
+    def __init__(self):
+        self.sent = 0
+
+    def alert(self, **kwargs):
+        self.sent += 1
+
+
+class FakeReceiver:
+    """
+    Alert receiver that accepts every batch instantly
+    """
+    def __init__(self):
+        self.batches = 0
+
+    def send_batch(self, alerts):
+        self.batches += 1
+
+
+# Result types the pattern snippets leave to the integrating service
+SLIViolation = namedtuple('SLIViolation', 'sli_name description current_value target')
+DeploymentGateResult = namedtuple('DeploymentGateResult', 'can_deploy failures recommendation')
+DeploymentGateResult.__new__.__defaults__ = (None,)
+
+
+def install_integration_points():
+    """
+    Provide the names each snippet expects its host service to define
+    """
+    from patterns.detection import sli_monitor
+    from patterns.prevention import testing_gates
+
+    sli_monitor.SLIViolation = SLIViolation
+    testing_gates.DeploymentGateResult = DeploymentGateResult
+    testing_gates.CRITICAL_SERVICES = {'payment-service', 'booking-service'}
+
+
+def peak_alloc_bytes(func, *args, **kwargs):
+    """
+    Peak transient bytes allocated by a single call
+    """
+    tracemalloc.start()
+    try:
+        # Warm up so one-off caches are not billed to the measured call
+        func(*args, **kwargs)
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - baseline
+
+
+def retained_bytes_per_call(func, *args, calls=1000, **kwargs):
+    """
+    Bytes still alive after each call; non-zero means the call leaks
+    """
+    func(*args, **kwargs)
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        for _ in range(calls):
+            func(*args, **kwargs)
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return max(after - before, 0) / calls
@@ -0,0 +1,173 @@
+# Config layer: YAML tables compiled into cached binary snapshots
+import importlib.util
+import marshal
+import os
+import sys
+from collections.abc import Mapping
+
+CONFIG_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CACHE_DIR = os.environ.get(
+    'RELIABILITY_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'zero-to-one-reliability')
+)
+
+# Bump when the snapshot layout changes
+SNAPSHOT_VERSION = 1
+
+
+def config_path(name):
+    return os.path.join(CONFIG_DIR, f'{name}.yaml')
+
+
+def snapshot_path(name):
+    # marshal output is only stable within one interpreter version,
+    # so snapshots are keyed the same way as .pyc files
+    return os.path.join(CACHE_DIR, f'{name}.{sys.implementation.cache_tag}.snapshot')
+
+
+def load_config(name):
+    """
+    Load patterns/config/<name>.yaml, served from a binary snapshot when fresh
+
+    The snapshot records the source mtime, size and SHA-256. A matching
+    stat() is enough to trust it; if only the mtime moved (checkout, touch)
+    the hash is compared before falling back to a full YAML parse.
+    """
+    source = config_path(name)
+    stat = os.stat(source)
+
+    snapshot = _read_snapshot(name)
+    if snapshot is not None:
+        version, mtime_ns, size, digest, data = snapshot
+        if version == SNAPSHOT_VERSION:
+            if (mtime_ns, size) == (stat.st_mtime_ns, stat.st_size):
+                return data
+
+            with open(source, 'rb') as f:
+                raw = f.read()
+            if _digest(raw) == digest:
+                _write_snapshot(name, stat, digest, data)
+                return data
+
+    with open(source, 'rb') as f:
+        raw = f.read()
+
+    data = _parse_yaml(raw)
+    _write_snapshot(name, stat, _digest(raw), data)
+    return data
+
+
+def compile_all():
+    """
+    Compile every YAML file in patterns/config into a snapshot
+    """
+    compiled = []
+    for filename in sorted(os.listdir(CONFIG_DIR)):
+        if filename.endswith('.yaml'):
+            name = filename[:-len('.yaml')]
+            load_config(name)
+            compiled.append(name)
+    return compiled
+
+
+def _parse_yaml(raw):
+    # PyYAML is the slowest import on the config path; only pay for it
+    # when a snapshot is missing or stale
+    import yaml
+
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    return yaml.load(raw, Loader=loader)
+
+
+def _digest(raw):
+    import hashlib
+
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _read_snapshot(name):
+    try:
+        with open(snapshot_path(name), 'rb') as f:
+            return marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+
+def _write_snapshot(name, stat, digest, data):
+    path = snapshot_path(name)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        payload = marshal.dumps(
+            (SNAPSHOT_VERSION, stat.st_mtime_ns, stat.st_size, digest, data)
+        )
+    except ValueError:
+        # Dates and other YAML types marshal can't store; parse every time
+        return
+
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        # Atomic swap so concurrent cron runs never read a torn snapshot
+        os.replace(tmp_path, path)
+    except OSError:
+        # A read-only home directory only costs us the cache, not the config
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
+class LazyConfig(Mapping):
+    """
+    Read-only mapping that loads its YAML table on first access
+    """
+    def __init__(self, name):
+        self.name = name
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            self._data = load_config(self.name)
+        return self._data
+
+    def reload(self):
+        self._data = None
+        return self._load()
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self._data is not None else 'not loaded'
+        return f"LazyConfig({self.name!r}, {state})"
+
+
+def lazy_import(module_name, extra=None):
+    """
+    Defer importing a heavy dependency until one of its attributes is used
+
+    Raises ImportError right away if the module is not installed, so a
+    missing optional extra is reported at the call site, not deep inside
+    the first computation.
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    spec = importlib.util.find_spec(module_name)
+    if spec is None:
+        hint = f" (pip install zero-to-one-reliability[{extra}])" if extra else ""
+        raise ImportError(f"{module_name} is required for this feature{hint}")
+
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
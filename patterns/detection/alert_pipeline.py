@@ -0,0 +1,373 @@
+# Shared alert pipeline: callers enqueue, a background thread groups and delivers
+import atexit
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Which receivers see which severities
+ALERT_ROUTES = {
+    'P0': ['pager', 'chat'],  # Page immediately
+    'P1': ['pager', 'chat'],
+    'P2': ['chat'],
+}
+
+# Seconds to hold the first alert of a group so related alerts ship together
+GROUP_WAIT = {
+    'P0': 0,
+    'P1': 30,
+    'P2': 300,
+}
+
+# Seconds before the same alert (same severity and title) is delivered again
+REPEAT_INTERVAL = {
+    'P0': 300,
+    'P1': 1800,
+    'P2': 4 * 3600,
+}
+
+# Deliveries per minute each receiver may make, and the burst it may save up
+RATE_LIMITS = {
+    'pager': {'per_minute': 6, 'burst': 3},
+    'chat': {'per_minute': 30, 'burst': 10},
+}
+
+
+# Failed batches are retried this many times in total, backing off from
+# RETRY_BACKOFF seconds and doubling after each failure, then dropped
+DELIVERY_ATTEMPTS = 5
+RETRY_BACKOFF = 2
+
+
+class TokenBucket:
+    def __init__(self, per_minute, burst, clock=time.monotonic):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.tokens = float(burst)
+        self.clock = clock
+        self.updated = clock()
+
+    def take(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class AlertPipeline:
+    """
+    Bounded, asynchronous alert delivery shared by every monitor and mitigation
+
+    submit() never blocks: it drops (and counts) alerts once the queue is
+    full rather than stall the loop that is trying to mitigate. A single
+    worker thread dedups alerts by fingerprint, holds them for their
+    severity's group window, and hands each receiver one batch at a time
+    under its rate limit. Batches are sent from a small pool, one in flight
+    per receiver, so a slow pager API never delays chat notifications.
+    An alert only counts as sent, for dedup, once its batch is delivered;
+    failed batches go back into their group and are retried with backoff.
+    """
+    def __init__(self, receivers, routes=ALERT_ROUTES, max_queue=10000, max_batch=100,
+                 tick_seconds=1.0, clock=time.monotonic):
+        self.receivers = receivers
+        self.routes = routes
+        self.max_batch = max_batch
+        self.tick_seconds = tick_seconds
+        self.clock = clock
+        self.limits = {
+            name: TokenBucket(**RATE_LIMITS.get(name, {'per_minute': 60, 'burst': 10}),
+                              clock=clock)
+            for name in receivers
+        }
+        self.stats = {
+            'submitted': 0, 'dropped': 0, 'deduplicated': 0,
+            'batches_sent': 0, 'batches_failed': 0, 'batches_dropped': 0,
+        }
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        # (receiver, severity) -> {'deadline': t, 'alerts': {fingerprint: alert}}
+        self._groups = {}
+        self._last_sent = {}
+        # receiver -> (future, severity, batch, attempt)
+        self._in_flight = {}
+        # fingerprint -> in-flight batches carrying it
+        self._sending = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._delivery = None
+
+    def submit(self, severity, title, message, **details):
+        """
+        Enqueue an alert; returns False if it was dropped because the queue is full
+        """
+        alert = {
+            'fingerprint': f'{severity}:{title}',
+            'severity': severity,
+            'title': title,
+            'message': message,
+            'details': details,
+            'first_seen': time.time(),
+            'count': 1,
+        }
+        try:
+            self._queue.put_nowait(alert)
+        except queue.Full:
+            self.stats['dropped'] += 1
+            return False
+        self.stats['submitted'] += 1
+        return True
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        self._stop.clear()
+        self._delivery = ThreadPoolExecutor(
+            max_workers=max(len(self.receivers), 1), thread_name_prefix='alert-delivery'
+        )
+        self._thread = threading.Thread(target=self._run, name='alert-pipeline', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=10):
+        """Flush everything still queued or grouped, then stop"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            # Still flushing; the thread shuts the delivery pool down when done
+            logger.warning("Alert pipeline still flushing after %ss", timeout)
+            return
+        self._thread = None
+
+    def _run(self):
+        try:
+            while True:
+                stopping = self._stop.is_set()
+                self._drain(block=not stopping)
+                self._dispatch(flush_all=stopping)
+                if stopping and self._queue.empty() and not self._groups \
+                        and not self._in_flight:
+                    return
+                if stopping:
+                    # Give rate-limited receivers a moment before retrying
+                    time.sleep(min(self.tick_seconds, 0.1))
+        finally:
+            self._delivery.shutdown(wait=True)
+
+    def _drain(self, block):
+        try:
+            alert = self._queue.get(timeout=self.tick_seconds) if block \
+                else self._queue.get_nowait()
+        except queue.Empty:
+            return
+
+        while True:
+            self._accept(alert)
+            try:
+                alert = self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def _accept(self, alert):
+        now = self.clock()
+        severity = alert['severity']
+        fingerprint = alert['fingerprint']
+
+        last_sent = self._last_sent.get(fingerprint)
+        if fingerprint in self._sending or (
+            last_sent is not None and now - last_sent < REPEAT_INTERVAL.get(severity, 3600)
+        ):
+            self.stats['deduplicated'] += 1
+            return
+
+        for receiver in self.routes.get(severity, ()):
+            if receiver not in self.receivers:
+                continue
+            group = self._groups.get((receiver, severity))
+            if group is None:
+                group = self._groups[(receiver, severity)] = {
+                    'deadline': now + GROUP_WAIT.get(severity, 60),
+                    'alerts': {},
+                }
+            pending = group['alerts'].get(fingerprint)
+            if pending is None:
+                group['alerts'][fingerprint] = dict(alert)
+            else:
+                pending['count'] += 1
+                self.stats['deduplicated'] += 1
+
+    def _dispatch(self, flush_all=False):
+        self._collect()
+        now = self.clock()
+        for key in list(self._groups):
+            receiver, severity = key
+            group = self._groups[key]
+            # The final flush on stop() skips group waits and retry backoff
+            if not flush_all and now < group['deadline']:
+                continue
+
+            if receiver in self._in_flight:
+                continue
+            # ...and ignores rate limits rather than lose alerts
+            if not self.limits[receiver].take() and not flush_all:
+                continue
+
+            alerts = list(group['alerts'].values())
+            batch, rest = alerts[:self.max_batch], alerts[self.max_batch:]
+            attempt = group.pop('attempt', 0) + 1
+            if rest:
+                group['alerts'] = {alert['fingerprint']: alert for alert in rest}
+            else:
+                del self._groups[key]
+
+            try:
+                future = self._delivery.submit(self._deliver, receiver, batch)
+            except RuntimeError:
+                # Interpreter shutdown: the pool takes no new work, so send from here
+                self._finish(receiver, severity, batch, attempt, self._deliver(receiver, batch))
+                continue
+            self._in_flight[receiver] = (future, severity, batch, attempt)
+            for alert in batch:
+                fingerprint = alert['fingerprint']
+                self._sending[fingerprint] = self._sending.get(fingerprint, 0) + 1
+
+    def _collect(self):
+        """
+        Settle finished deliveries; runs on the pipeline thread, which owns the groups
+        """
+        for receiver, (future, severity, batch, attempt) in list(self._in_flight.items()):
+            if not future.done():
+                continue
+            del self._in_flight[receiver]
+            for alert in batch:
+                fingerprint = alert['fingerprint']
+                self._sending[fingerprint] -= 1
+                if not self._sending[fingerprint]:
+                    del self._sending[fingerprint]
+            self._finish(receiver, severity, batch, attempt, future.result())
+
+    def _finish(self, receiver, severity, batch, attempt, delivered):
+        now = self.clock()
+        if delivered:
+            self.stats['batches_sent'] += 1
+            for alert in batch:
+                self._last_sent[alert['fingerprint']] = now
+            return
+
+        self.stats['batches_failed'] += 1
+        if attempt >= DELIVERY_ATTEMPTS:
+            self.stats['batches_dropped'] += 1
+            logger.error(
+                "Alert delivery to %s failed %d times (%d alerts dropped)",
+                receiver, attempt, len(batch)
+            )
+            return
+
+        # Back into the group, ahead of anything that arrived meanwhile
+        group = self._groups.setdefault((receiver, severity), {'alerts': {}})
+        alerts = {alert['fingerprint']: alert for alert in batch}
+        for fingerprint, pending in group['alerts'].items():
+            if fingerprint in alerts:
+                alerts[fingerprint]['count'] += pending['count']
+            else:
+                alerts[fingerprint] = pending
+        group['alerts'] = alerts
+        group['attempt'] = attempt
+        group['deadline'] = now + RETRY_BACKOFF * 2 ** (attempt - 1)
+
+    def _deliver(self, receiver, batch):
+        try:
+            self.receivers[receiver].send_batch(batch)
+            return True
+        except Exception:
+            logger.exception("Alert delivery to %s failed (%d alerts)", receiver, len(batch))
+            return False
+
+
+class LogReceiver:
+    """
+    Writes alert batches to the log; the default until real receivers are set
+    """
+    def send_batch(self, alerts):
+        for alert in alerts:
+            logger.warning(
+                "[%s] %s: %s (x%d)",
+                alert['severity'], alert['title'], alert['message'], alert['count']
+            )
+
+
+class WebhookReceiver:
+    """
+    POSTs each batch as one JSON document over a pooled HTTP session
+    """
+    def __init__(self, url, timeout=5, pool_size=4, headers=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.mount(url, HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        if headers:
+            self.session.headers.update(headers)
+
+    def send_batch(self, alerts):
+        response = self.session.post(self.url, json={'alerts': alerts}, timeout=self.timeout)
+        response.raise_for_status()
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_pipeline():
+    """
+    The process-wide pipeline, started on first use
+    """
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = AlertPipeline(
+                    receivers={'pager': LogReceiver(), 'chat': LogReceiver()}
+                ).start()
+    return _pipeline
+
+
+def _flush_at_exit():
+    # The pipeline thread is a daemon; without this, grouped P1/P2 alerts
+    # would be lost when the process exits
+    if _pipeline is not None:
+        _pipeline.stop()
+
+
+atexit.register(_flush_at_exit)
+
+
+def set_pipeline(pipeline):
+    """
+    Replace the process-wide pipeline, flushing and stopping the old one
+    """
+    global _pipeline
+    with _pipeline_lock:
+        previous, _pipeline = _pipeline, pipeline.start()
+    if previous is not None:
+        previous.stop()
+
+
+class PipelineAlerting:
+    """
+    Mixin providing the alert() the patterns call, backed by the shared pipeline
+    """
+    alert_pipeline = None
+
+    def alert(self, severity, title, message, **details):
+        pipeline = self.alert_pipeline or get_pipeline()
+        pipeline.submit(severity, title, message, **details)
@@ -1,5 +1,13 @@
+from patterns.detection.cardinality import CardinalityLimiter
+
 # Alert quality metrics
 class AlertQualityTracker:
+    def __init__(self, metrics_backend):
+        # alert_name takes a value per alert ever defined; cap the series it creates
+        if not isinstance(metrics_backend, CardinalityLimiter):
+            metrics_backend = CardinalityLimiter(metrics_backend)
+        self.metrics = metrics_backend
+    
     def track_alert(self, alert):
         """Track alert outcomes to identify noise"""
         outcome = self.get_alert_outcome(alert)
@@ -1,31 +1,19 @@
+from patterns.config.loader import LazyConfig
+from patterns.detection.self_telemetry import TELEMETRY, AlertHooks, timed
+
 # Business metrics monitoring
-BUSINESS_METRICS = {
-    'transactions_per_minute': {
-        'baseline': 150,  # Normal rate
-        'alert_threshold': 0.7,  # Alert if <70% of baseline
-        'severity': 'P0'
-    },
-    'conversion_rate': {
-        'baseline': 0.18,  # 18% conversion
-        'alert_threshold': 0.8,  # Alert if <80% of baseline
-        'severity': 'P1'
-    },
-    'average_order_value': {
-        'baseline': 45.0,  # $45 average
-        'alert_threshold': 0.75,
-        'severity': 'P2'
-    },
-    'support_tickets_per_hour': {
-        'baseline': 5,
-        'alert_threshold': 2.0,  # Alert if >2x baseline
-        'severity': 'P1'
-    }
-}
+# Thresholds live in patterns/config/business_metrics.yaml and load on first use
+BUSINESS_METRICS = LazyConfig('business_metrics')
+
+class BusinessMetricsMonitor(AlertHooks):
+    telemetry_component = 'business_metrics'
 
-class BusinessMetricsMonitor:
-    def __init__(self, analytics_db):
+    def __init__(self, analytics_db, telemetry=TELEMETRY):
         self.db = analytics_db
+        self.telemetry = telemetry
+        telemetry.instrument(self, 'db', alert_methods=('alert_business_anomaly',))
         
+    @timed()
     def detect_anomalies(self):
         """Detect business metric anomalies"""
         for metric_name, config in BUSINESS_METRICS.items():
@@ -0,0 +1,220 @@
+# Cardinality control between the monitors and the metrics backend
+#
+# AlertQualityTracker wraps its backend in a CardinalityLimiter, which is
+# what the alert.outcomes overrides below apply to. Any other monitor whose
+# tag values come from user input can be given one the same way:
+#
+#     monitor = CriticalPathMonitor(CardinalityLimiter(metrics_backend))
+import hashlib
+import math
+import sys
+
+# Distinct values each tag may take per metric before new ones fold into OTHER
+DEFAULT_TAG_LIMIT = 100
+
+# Per-metric overrides: {metric_name: {tag_key: limit}}
+CARDINALITY_LIMITS = {
+    'alert.outcomes': {'alert_name': 500},
+}
+
+# Distinct tag combinations (series) each metric may emit before new ones
+# fold into a single all-OTHER series; per-tag limits alone multiply out
+DEFAULT_SERIES_LIMIT = 1000
+
+# Per-metric overrides: {metric_name: limit}
+SERIES_LIMITS = {
+    'alert.outcomes': 2000,
+}
+
+OTHER = '__other__'
+
+# Stands in for the tag name when reporting a metric's series limit
+SERIES = '__series__'
+
+# Resolved (name, tags) entries kept before the cache is cleared and rebuilt
+MAX_RESOLVED = 100000
+
+
+class HyperLogLog:
+    """
+    Distinct-count sketch: 2**precision one-byte registers, ~1.04/sqrt(2**precision) error
+
+    At the default precision of 10 that is 1KB per sketch and about 3% error.
+    """
+    def __init__(self, precision=10):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(self.size)
+        self._rest_bits = 64 - precision
+
+    def add(self, value):
+        digest = hashlib.blake2b(str(value).encode(), digest_size=8).digest()
+        hashed = int.from_bytes(digest, 'big')
+        index = hashed >> self._rest_bits
+        rest = hashed & ((1 << self._rest_bits) - 1)
+        # Position of the leftmost 1-bit in the remaining bits
+        rank = self._rest_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def estimate(self):
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        # Small cardinalities: linear counting is far more accurate
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)
+        return raw
+
+
+class _LimitState:
+    """
+    Admitted values under one limit: a tag's values, or a metric's combinations
+    """
+    __slots__ = ('limit', 'admitted', 'sketch', 'folded')
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.admitted = set()
+        self.sketch = HyperLogLog()
+        self.folded = 0
+
+
+class CardinalityLimiter:
+    """
+    Backend proxy that keeps the number of emitted series bounded
+
+    Metric names and tag values are interned, and each (name, tags) combination
+    resolves once to a shared tags dict, so repeated writes allocate nothing new.
+    Each tag of each metric admits up to its limit of distinct values; later
+    values are reported as OTHER while a HyperLogLog sketch keeps estimating
+    how many distinct values were really seen. Per-tag limits multiply out
+    across tags, so each metric also admits a limited number of distinct
+    combinations; past that, new combinations are emitted with every tag set
+    to OTHER, again with a sketch of the true count. Admission is not locked:
+    under thread contention a limit may be exceeded by a value or two.
+
+    Backends must treat the tags dict they receive as read-only.
+    """
+    def __init__(self, backend, limits=CARDINALITY_LIMITS, default_limit=DEFAULT_TAG_LIMIT,
+                 series_limits=SERIES_LIMITS, default_series_limit=DEFAULT_SERIES_LIMIT):
+        self._backend = backend
+        self.limits = limits
+        self.default_limit = default_limit
+        self.series_limits = series_limits
+        self.default_series_limit = default_series_limit
+        # (metric, tag_key) -> _LimitState
+        self._tags = {}
+        # metric -> _LimitState
+        self._series = {}
+        # (metric, raw tag items) -> tags dict to emit; only admitted combinations,
+        # and cleared once it holds MAX_RESOLVED of them
+        self._resolved = {}
+
+    def histogram(self, name, value, tags=None, **kwargs):
+        name, tags = self._limit(name, tags)
+        return self._backend.histogram(name, value, tags=tags, **kwargs)
+
+    def increment(self, name, tags=None, value=1, **kwargs):
+        name, tags = self._limit(name, tags)
+        return self._backend.increment(name, tags=tags, value=value, **kwargs)
+
+    def gauge(self, name, value, tags=None, **kwargs):
+        name, tags = self._limit(name, tags)
+        return self._backend.gauge(name, value, tags=tags, **kwargs)
+
+    def __getattr__(self, name):
+        # Queries and anything else pass straight through
+        return getattr(self._backend, name)
+
+    def _limit(self, name, tags):
+        name = sys.intern(name)
+        if not tags:
+            return name, tags
+
+        key = (name, tuple(tags.items()))
+        resolved = self._resolved.get(key)
+        if resolved is not None:
+            return name, resolved
+
+        limited = {}
+        folded = False
+        for tag_key, tag_value in tags.items():
+            state = self._tags.get((name, tag_key))
+            if state is None:
+                limit = self.limits.get(name, {}).get(tag_key, self.default_limit)
+                state = self._tags.setdefault((name, tag_key), _LimitState(limit))
+
+            if isinstance(tag_value, str):
+                tag_value = sys.intern(tag_value)
+            if tag_value not in state.admitted:
+                state.sketch.add(tag_value)
+                if len(state.admitted) >= state.limit:
+                    state.folded += 1
+                    tag_value = OTHER
+                    folded = True
+                else:
+                    state.admitted.add(tag_value)
+            limited[sys.intern(tag_key)] = tag_value
+
+        series = self._series.get(name)
+        if series is None:
+            limit = self.series_limits.get(name, self.default_series_limit)
+            series = self._series.setdefault(name, _LimitState(limit))
+        combination = tuple(sorted(limited.items(), key=_tag_key))
+        if combination not in series.admitted:
+            series.sketch.add(combination)
+            if len(series.admitted) >= series.limit:
+                series.folded += 1
+                return name, dict.fromkeys(limited, OTHER)
+            series.admitted.add(combination)
+
+        # Folded combinations are not cached, or the cache would grow with them
+        if not folded:
+            if len(self._resolved) >= MAX_RESOLVED:
+                self._resolved.clear()
+            self._resolved[key] = limited
+        return name, limited
+
+    def report(self):
+        """
+        Per (metric, tag): admitted values, limit, estimated true cardinality, folded writes
+
+        Each metric's series limit is reported under the tag name SERIES.
+        """
+        return {
+            f'{name}:{tag_key}': {
+                'admitted': len(state.admitted),
+                'limit': state.limit,
+                'estimated_distinct': round(state.sketch.estimate()),
+                'folded_writes': state.folded,
+            }
+            for (name, tag_key), state in self._states()
+        }
+
+    def export(self):
+        """
+        Emit estimated cardinality for every tag and series limit that has been hit
+        """
+        for (name, tag_key), state in self._states():
+            if len(state.admitted) >= state.limit:
+                self._backend.gauge(
+                    'metrics.cardinality.estimated',
+                    round(state.sketch.estimate()),
+                    tags={'metric': name, 'tag': tag_key}
+                )
+
+    def _states(self):
+        yield from list(self._tags.items())
+        for name, state in list(self._series.items()):
+            yield (name, SERIES), state
+
+
+def _tag_key(item):
+    return item[0]
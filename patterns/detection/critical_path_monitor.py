@@ -1,68 +1,74 @@
+import sys
+
+from patterns.config.loader import LazyConfig
+from patterns.detection.alert_pipeline import PipelineAlerting
+from patterns.detection.self_telemetry import TELEMETRY, AlertHooks, timed
+
 # Week 1: Monitor the money-making paths
-CRITICAL_PATHS = {
-    'user_signup': {
-        'endpoint': '/api/v1/signup',
-        'success_rate_threshold': 99.5,
-        'latency_p95_threshold': 500,  # milliseconds
-        'alert_severity': 'P0'  # Page immediately
-    },
-    'service_booking': {
-        'endpoint': '/api/v1/bookings',
-        'success_rate_threshold': 99.5,
-        'latency_p95_threshold': 1000,
-        'alert_severity': 'P0'
-    },
-    'payment_processing': {
-        'endpoint': '/api/v1/payments',
-        'success_rate_threshold': 99.9,  # Higher threshold for payments
-        'latency_p95_threshold': 2000,
-        'alert_severity': 'P0'
-    },
-    'order_confirmation': {
-        'endpoint': '/api/v1/confirmations',
-        'success_rate_threshold': 99.0,
-        'latency_p95_threshold': 500,
-        'alert_severity': 'P1'  # Page during business hours
-    }
-}
+# Thresholds live in patterns/config/critical_paths.yaml and load on first use
+CRITICAL_PATHS = LazyConfig('critical_paths')
+
+# Shared tag dicts for the request counter; backends must not mutate them
+SUCCESS_TAGS = {True: {'success': 'True'}, False: {'success': 'False'}}
+
+class CriticalPathMonitor(PipelineAlerting, AlertHooks):
+    telemetry_component = 'critical_path'
 
-class CriticalPathMonitor:
-    def __init__(self, metrics_backend):
+    def __init__(self, metrics_backend, telemetry=TELEMETRY):
         self.metrics = metrics_backend
+        self.telemetry = telemetry
+        telemetry.instrument(self, 'metrics', alert_methods=('alert',))
+        # path_name -> (latency metric, requests metric), built once per path
+        self._metric_names = {}
         
+    @timed()
     def track_request(self, path_name, duration_ms, success):
         """Track every request on critical paths"""
+        latency_metric, requests_metric = self._names(path_name)
+
         # Record latency
-        self.metrics.histogram(
-            f'critical_path.{path_name}.latency_ms',
-            duration_ms
-        )
+        self.metrics.histogram(latency_metric, duration_ms)
         
         # Record success/failure
         self.metrics.increment(
-            f'critical_path.{path_name}.requests',
-            tags={'success': str(success)}
+            requests_metric,
+            tags=SUCCESS_TAGS[bool(success)]
         )
         
         # Check thresholds
         self._check_thresholds(path_name)
     
+    def _names(self, path_name):
+        names = self._metric_names.get(path_name)
+        if names is None:
+            names = self._metric_names[path_name] = (
+                sys.intern(f'critical_path.{path_name}.latency_ms'),
+                sys.intern(f'critical_path.{path_name}.requests'),
+            )
+        return names
+    
     def _check_thresholds(self, path_name):
         """Alert if critical path degrades"""
-        config = CRITICAL_PATHS[path_name]
-        
+        latency_metric, requests_metric = self._names(path_name)
+
         # Get current metrics (5-minute window)
         current_success_rate = self.metrics.get_success_rate(
-            f'critical_path.{path_name}.requests',
+            requests_metric,
             window='5m'
         )
         
         current_p95 = self.metrics.get_percentile(
-            f'critical_path.{path_name}.latency_ms',
+            latency_metric,
             percentile=95,
             window='5m'
         )
         
+        self._evaluate_thresholds(path_name, current_success_rate, current_p95)
+    
+    def _evaluate_thresholds(self, path_name, current_success_rate, current_p95):
+        """Compare a path's current metrics against its configured thresholds"""
+        config = CRITICAL_PATHS[path_name]
+        
         # Alert if thresholds violated
         if current_success_rate < config['success_rate_threshold']:
             self.alert(
@@ -0,0 +1,45 @@
+# Fixed log-linear latency buckets shared by the in-process aggregators
+from bisect import bisect_left
+
+# Upper bounds from 0.5ms to ~2 minutes, each 10% wider than the last, so
+# any percentile read back from bucket counts is within ~5% of the truth
+LATENCY_BUCKETS_MS = tuple(round(0.5 * 1.1 ** i, 3) for i in range(131))
+
+# One extra slot catches everything slower than the last bound
+NUM_BUCKETS = len(LATENCY_BUCKETS_MS) + 1
+
+
+def bucket_index(value_ms):
+    return bisect_left(LATENCY_BUCKETS_MS, value_ms)
+
+
+def percentile_from_buckets(counts, percentile, bounds=LATENCY_BUCKETS_MS):
+    """
+    Estimate a percentile from bucket counts, interpolating inside the bucket
+    """
+    total = sum(counts)
+    if total == 0:
+        return 0.0
+
+    rank = total * percentile / 100.0
+    seen = 0
+    for index, count in enumerate(counts):
+        if count and seen + count >= rank:
+            lower = bounds[index - 1] if index > 0 else 0.0
+            if index >= len(bounds):
+                return lower
+            upper = bounds[index]
+            return lower + (upper - lower) * (rank - seen) / count
+        seen += count
+
+    return bounds[-1]
+
+
+def percentile_from_sparse(buckets, percentile):
+    """
+    Same as percentile_from_buckets for a {bucket_index: count} mapping
+    """
+    counts = [0] * NUM_BUCKETS
+    for index, count in buckets.items():
+        counts[index] = count
+    return percentile_from_buckets(counts, percentile)
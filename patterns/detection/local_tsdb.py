@@ -0,0 +1,585 @@
+# Embedded time-series store: a metrics backend for laptops and CI
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+
+from patterns.detection.histogram import bucket_index, percentile_from_sparse
+
+MASK64 = (1 << 64) - 1
+
+# Series kinds, stored with every chunk so rollups can be rebuilt on open
+COUNTER = 0
+GAUGE = 1
+HISTOGRAM = 2
+
+# magic, kind, key length, point count, first ts, last ts, payload length
+CHUNK_HEADER = struct.Struct('<4sBHIqqI')
+CHUNK_MAGIC = b'TSC1'
+
+# Rollup resolution (seconds) -> how long its buckets are kept
+ROLLUP_RETENTION = {
+    60: 24 * 3600,
+    300: 7 * 24 * 3600,
+    3600: 90 * 24 * 3600,
+}
+
+# Window queries read at least this many rollup buckets, so dropping the
+# bucket that straddles the window's start loses at most a fifth of it
+WINDOW_MIN_BUCKETS = 5
+
+WINDOW_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Characters with meaning in a series key; escaped with a backslash in names,
+# label names and label values
+KEY_SPECIAL = re.compile(r'([\\,={}])')
+KEY_ESCAPE = re.compile(r'\\(.)', re.DOTALL)
+KEY_PATTERN = re.compile(r'((?:\\.|[^\\{])*)\{(.*)\}', re.DOTALL)
+LABEL_PATTERN = re.compile(r'((?:\\.|[^\\=,{}])*)=((?:\\.|[^\\=,{}])*)', re.DOTALL)
+
+
+class BitWriter:
+    def __init__(self):
+        self.buffer = bytearray()
+        self.pending = 0
+        self.pending_bits = 0
+
+    def write(self, value, nbits):
+        self.pending = (self.pending << nbits) | value
+        self.pending_bits += nbits
+        while self.pending_bits >= 8:
+            self.pending_bits -= 8
+            self.buffer.append((self.pending >> self.pending_bits) & 0xFF)
+        self.pending &= (1 << self.pending_bits) - 1
+
+    def getvalue(self):
+        if self.pending_bits:
+            return bytes(self.buffer) + bytes([(self.pending << (8 - self.pending_bits)) & 0xFF])
+        return bytes(self.buffer)
+
+
+class BitReader:
+    def __init__(self, data):
+        self.value = int.from_bytes(data, 'big')
+        self.remaining = len(data) * 8
+
+    def read(self, nbits):
+        self.remaining -= nbits
+        return (self.value >> self.remaining) & ((1 << nbits) - 1)
+
+
+class ChunkEncoder:
+    """
+    Gorilla encoding: delta-of-delta timestamps and XOR-compressed values
+
+    Regular scrape intervals cost one bit per timestamp and unchanged values
+    one bit per value, so a steady series compresses to a few bits per point.
+    """
+    def __init__(self):
+        self.bits = BitWriter()
+        self.count = 0
+        self.first_ts = None
+        self.last_ts = None
+
+    def append(self, ts, value):
+        value_bits = _float_bits(value)
+        write = self.bits.write
+
+        if self.count == 0:
+            write(ts & MASK64, 64)
+            write(value_bits, 64)
+            self.first_ts = ts
+            self.prev_delta = 0
+            self.leading = None
+            self.trailing = 0
+        else:
+            delta = ts - self.last_ts
+            _write_dod(write, delta - self.prev_delta)
+            self.prev_delta = delta
+
+            xor = value_bits ^ self.prev_bits
+            if xor == 0:
+                write(0, 1)
+            else:
+                leading = min(64 - xor.bit_length(), 31)
+                trailing = (xor & -xor).bit_length() - 1
+                if self.leading is not None and leading >= self.leading \
+                        and trailing >= self.trailing:
+                    # Reuse the previous window of meaningful bits
+                    write(0b10, 2)
+                    write(xor >> self.trailing, 64 - self.leading - self.trailing)
+                else:
+                    significant = 64 - leading - trailing
+                    write(0b11, 2)
+                    write(leading, 5)
+                    write(significant - 1, 6)
+                    write(xor >> trailing, significant)
+                    self.leading = leading
+                    self.trailing = trailing
+
+        self.prev_bits = value_bits
+        self.last_ts = ts
+        self.count += 1
+
+
+def decode_chunk(data, count):
+    """
+    Yield (timestamp_ms, value) pairs from a Gorilla-encoded chunk
+    """
+    if count == 0:
+        return
+
+    reader = BitReader(data)
+    read = reader.read
+
+    ts = read(64)
+    if ts >> 63:
+        ts -= 1 << 64
+    value_bits = read(64)
+    yield ts, _bits_float(value_bits)
+
+    delta = 0
+    leading = trailing = 0
+    for _ in range(count - 1):
+        delta += _read_dod(read)
+        ts += delta
+
+        if read(1):
+            if read(1):
+                leading = read(5)
+                significant = read(6) + 1
+                trailing = 64 - leading - significant
+            value_bits ^= read(64 - leading - trailing) << trailing
+        yield ts, _bits_float(value_bits)
+
+
+# Delta-of-delta buckets: (prefix, prefix bits, value bits)
+DOD_BUCKETS = (
+    (0b10, 2, 7),
+    (0b110, 3, 9),
+    (0b1110, 4, 12),
+)
+
+
+def _write_dod(write, dod):
+    if dod == 0:
+        write(0, 1)
+        return
+    for prefix, prefix_bits, value_bits in DOD_BUCKETS:
+        half = 1 << (value_bits - 1)
+        if -half < dod <= half:
+            write(prefix, prefix_bits)
+            write(dod + half - 1, value_bits)
+            return
+    write(0b1111, 4)
+    write(dod & MASK64, 64)
+
+
+def _read_dod(read):
+    if not read(1):
+        return 0
+    for _, prefix_bits, value_bits in DOD_BUCKETS:
+        if not read(1):
+            return read(value_bits) - (1 << (value_bits - 1)) + 1
+    dod = read(64)
+    return dod - (1 << 64) if dod >> 63 else dod
+
+
+def _float_bits(value):
+    return struct.unpack('>Q', struct.pack('>d', value))[0]
+
+
+def _bits_float(bits):
+    return struct.unpack('>d', struct.pack('>Q', bits))[0]
+
+
+def parse_window(window):
+    """'5m' -> 300"""
+    if isinstance(window, (int, float)):
+        return window
+    return int(window[:-1]) * WINDOW_UNITS[window[-1]]
+
+
+def series_key(name, tags):
+    """
+    name{label=value,...} with labels sorted; special characters are escaped
+    so the key parses back unambiguously when the chunk file is replayed
+    """
+    name = _escape_key(name)
+    if not tags:
+        return name
+    labels = ','.join(f'{_escape_key(key)}={_escape_key(tags[key])}' for key in sorted(tags))
+    return f'{name}{{{labels}}}'
+
+
+def _escape_key(text):
+    return KEY_SPECIAL.sub(r'\\\1', str(text))
+
+
+def _unescape_key(text):
+    return KEY_ESCAPE.sub(r'\1', text)
+
+
+class Series:
+    def __init__(self, key, name, tags, kind):
+        self.key = key
+        self.name = name
+        self.tags = tags
+        self.kind = kind
+        self.head = ChunkEncoder()
+        # (file offset of payload, payload length, count, first ts, last ts)
+        self.chunks = []
+        # resolution -> {bucket start: [count, sum, min, max, last, histogram buckets]}
+        self.rollups = {resolution: {} for resolution in ROLLUP_RETENTION}
+
+    def add_to_rollups(self, ts_seconds, value):
+        for resolution, buckets in self.rollups.items():
+            start = int(ts_seconds // resolution) * resolution
+            stats = buckets.get(start)
+            if stats is None:
+                stats = buckets[start] = [0, 0.0, value, value, value, {}]
+                # Buckets arrive in time order, so the oldest is first in the dict
+                horizon = start - ROLLUP_RETENTION[resolution]
+                while True:
+                    oldest = next(iter(buckets))
+                    if oldest > horizon:
+                        break
+                    del buckets[oldest]
+
+            stats[0] += 1
+            stats[1] += value
+            if value < stats[2]:
+                stats[2] = value
+            if value > stats[3]:
+                stats[3] = value
+            stats[4] = value
+            if self.kind == HISTOGRAM:
+                index = bucket_index(value)
+                histogram = stats[5]
+                histogram[index] = histogram.get(index, 0) + 1
+
+
+class LocalTSDB:
+    """
+    Embedded metrics backend with the interface the monitors already call
+
+    Raw points are Gorilla-compressed into chunks appended to a single file
+    and read back through mmap. Every point also updates 1m/5m/1h rollups,
+    so window queries (success rate, percentiles) read a handful of rollup
+    buckets instead of scanning raw data. A window only counts buckets that
+    start inside it, so a 5m query reads the last five 1m buckets (the
+    newest still filling) and never data older than five minutes.
+    """
+    CHUNK_POINTS = 120
+
+    def __init__(self, directory, clock=time.time):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, 'chunks.tsc')
+        self.clock = clock
+        self.series = {}
+        self.by_name = {}
+        self._lock = threading.RLock()
+        self._mmap = None
+        self._file = open(self.path, 'a+b')
+        self._replay()
+
+    # Writes ----------------------------------------------------------------
+
+    def histogram(self, name, value, tags=None, timestamp=None):
+        self._append(name, tags, HISTOGRAM, value, timestamp)
+
+    def increment(self, name, tags=None, value=1, timestamp=None):
+        self._append(name, tags, COUNTER, value, timestamp)
+
+    def gauge(self, name, value, tags=None, timestamp=None):
+        self._append(name, tags, GAUGE, value, timestamp)
+
+    def _append(self, name, tags, kind, value, timestamp):
+        ts = self.clock() if timestamp is None else timestamp
+        with self._lock:
+            series = self._series(name, tags, kind)
+            series.head.append(int(ts * 1000), float(value))
+            series.add_to_rollups(ts, float(value))
+            if series.head.count >= self.CHUNK_POINTS:
+                self._seal(series)
+
+    def _series(self, name, tags, kind):
+        key = series_key(name, tags)
+        series = self.series.get(key)
+        if series is None:
+            # Stored as strings, as replay will read them back from the key
+            tags = {str(label): str(value) for label, value in (tags or {}).items()}
+            series = self.series[key] = Series(key, name, tags, kind)
+            self.by_name.setdefault(name, []).append(series)
+        return series
+
+    def _seal(self, series):
+        head = series.head
+        if head.count == 0:
+            return
+        key = series.key.encode()
+        payload = head.bits.getvalue()
+        header = CHUNK_HEADER.pack(
+            CHUNK_MAGIC, series.kind, len(key), head.count,
+            head.first_ts, head.last_ts, len(payload)
+        )
+        self._file.seek(0, os.SEEK_END)
+        offset = self._file.tell() + len(header) + len(key)
+        self._file.write(header + key + payload)
+        series.chunks.append((offset, len(payload), head.count, head.first_ts, head.last_ts))
+        series.head = ChunkEncoder()
+
+    def flush(self):
+        """Seal every open chunk and write it to disk"""
+        with self._lock:
+            for series in self.series.values():
+                self._seal(series)
+            self._file.flush()
+
+    def close(self):
+        self.flush()
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    # Reads -----------------------------------------------------------------
+
+    def get_success_rate(self, name, window='5m'):
+        """
+        Percentage of `name` increments tagged success=True over the window
+        """
+        succeeded = failed = 0
+        with self._lock:
+            for series in self.by_name.get(name, ()):
+                total = self._window_total(series, window, 1)
+                if series.tags.get('success') in ('True', 'true'):
+                    succeeded += total
+                else:
+                    failed += total
+        if succeeded + failed == 0:
+            # No traffic is not an outage
+            return 100.0
+        return 100.0 * succeeded / (succeeded + failed)
+
+    def get_percentile(self, name, percentile=95, window='5m'):
+        with self._lock:
+            return percentile_from_sparse(
+                self._merged_histogram(self.by_name.get(name, ()), window), percentile
+            )
+
+    def _merged_histogram(self, series_list, window):
+        merged = {}
+        for series in series_list:
+            for stats in self._window_buckets(series, window):
+                for index, count in stats[5].items():
+                    merged[index] = merged.get(index, 0) + count
+        return merged
+
+    def _window_buckets(self, series, window):
+        """
+        Rollup buckets that start inside the window; callers hold the lock
+        """
+        seconds = parse_window(window)
+        # Coarsest rollup that tiles the window in at least WINDOW_MIN_BUCKETS
+        resolution = min(ROLLUP_RETENTION)
+        for candidate in sorted(ROLLUP_RETENTION):
+            if seconds >= candidate * WINDOW_MIN_BUCKETS and seconds % candidate == 0:
+                resolution = candidate
+
+        buckets = series.rollups[resolution]
+        now = self.clock()
+        start = math.ceil((now - seconds) / resolution) * resolution
+        end = int(now // resolution) * resolution
+        for bucket_start in range(start, end + resolution, resolution):
+            stats = buckets.get(bucket_start)
+            if stats is not None:
+                yield stats
+
+    def _window_total(self, series, window, column):
+        return sum(stats[column] for stats in self._window_buckets(series, window))
+
+    def range_query(self, name, start=None, end=None, tags=None):
+        """
+        Raw points per series as {series_key: [(timestamp_seconds, value), ...]}
+        """
+        start_ms = None if start is None else int(start * 1000)
+        end_ms = None if end is None else int(end * 1000)
+        results = {}
+
+        with self._lock:
+            for series in self.by_name.get(name, ()):
+                if tags and any(series.tags.get(k) != str(v) for k, v in tags.items()):
+                    continue
+
+                points = []
+                sources = [
+                    (self._payload(offset, length), count, first, last)
+                    for offset, length, count, first, last in series.chunks
+                ]
+                head = series.head
+                if head.count:
+                    sources.append((head.bits.getvalue(), head.count, head.first_ts, head.last_ts))
+
+                for payload, count, first, last in sources:
+                    if (end_ms is not None and first > end_ms) or \
+                            (start_ms is not None and last < start_ms):
+                        continue
+                    for ts, value in decode_chunk(payload, count):
+                        if (start_ms is None or ts >= start_ms) and \
+                                (end_ms is None or ts <= end_ms):
+                            points.append((ts / 1000.0, value))
+                results[series.key] = points
+
+        return results
+
+    def _payload(self, offset, length):
+        if self._mmap is None or offset + length > len(self._mmap):
+            self._remap()
+        return self._mmap[offset:offset + length]
+
+    def _remap(self):
+        # Chunks are append-only, so a grown file only ever needs a larger map
+        self._file.flush()
+        if self._mmap is not None:
+            self._mmap.close()
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def query(self, expression, window='5m'):
+        """
+        Evaluate the small PromQL subset used by SLI_DEFINITIONS
+
+        Supports `a / b`, `max(selector)`, `histogram_quantile(q, selector)`
+        and selectors with `=`, `!=`, `=~` and `!~` label matchers. Counters
+        evaluate to their total over the window, gauges to their latest value;
+        histograms can only be read through histogram_quantile.
+        """
+        with self._lock:
+            return self._evaluate(expression.strip(), window)
+
+    def _evaluate(self, expression, window):
+        depth = 0
+        for i, char in enumerate(expression):
+            depth += char in '({'
+            depth -= char in ')}'
+            if char == '/' and depth == 0:
+                numerator = self._evaluate(expression[:i].strip(), window)
+                denominator = self._evaluate(expression[i + 1:].strip(), window)
+                return numerator / denominator if denominator else 0.0
+
+        match = re.fullmatch(r'histogram_quantile\(\s*([\d.]+)\s*,\s*(.+)\)', expression)
+        if match:
+            merged = self._merged_histogram(self._select(match.group(2)), window)
+            return percentile_from_sparse(merged, float(match.group(1)) * 100)
+
+        match = re.fullmatch(r'max\((.+)\)', expression)
+        if match:
+            values = [self._instant_value(s, window) for s in self._select(match.group(1))]
+            return max(values) if values else 0.0
+
+        return sum(self._instant_value(s, window) for s in self._select(expression))
+
+    def _instant_value(self, series, window):
+        if series.kind == HISTOGRAM:
+            raise ValueError(
+                f"{series.key} is a histogram; query it with histogram_quantile()"
+            )
+        buckets = list(self._window_buckets(series, window))
+        if not buckets:
+            return 0.0
+        if series.kind == GAUGE:
+            return buckets[-1][4]
+        return sum(stats[1] for stats in buckets)
+
+    def _select(self, selector):
+        match = re.fullmatch(r'\s*([\w:.]+)\s*(?:\{(.*)\})?\s*', selector)
+        if not match:
+            raise ValueError(f"Unsupported query expression: {selector!r}")
+
+        name, labels = match.groups()
+        matchers = re.findall(r'(\w+)\s*(=~|!~|!=|=)\s*"([^"]*)"', labels or '')
+        for series in self.by_name.get(name, ()):
+            if all(_label_matches(series.tags.get(label, ''), op, value)
+                   for label, op, value in matchers):
+                yield series
+
+    # Recovery --------------------------------------------------------------
+
+    def _replay(self):
+        """Rebuild the chunk index and rollups from the chunk file"""
+        self._file.seek(0, os.SEEK_END)
+        if self._file.tell() == 0:
+            return
+
+        self._remap()
+        data = self._mmap
+        position = 0
+        while position + CHUNK_HEADER.size <= len(data):
+            magic, kind, key_length, count, first, last, length = \
+                CHUNK_HEADER.unpack_from(data, position)
+            if magic != CHUNK_MAGIC:
+                break
+            key_start = position + CHUNK_HEADER.size
+            offset = key_start + key_length
+            if offset + length > len(data):
+                # Torn write at the tail from a crash; drop it
+                break
+
+            key = data[key_start:offset].decode()
+            name, tags = _parse_series_key(key)
+            series = self._series(name, tags, kind)
+            series.chunks.append((offset, length, count, first, last))
+            for ts, value in decode_chunk(data[offset:offset + length], count):
+                series.add_to_rollups(ts / 1000.0, value)
+            position = offset + length
+
+
+class LocalHealthChecker:
+    """
+    health_checker for AutomatedRollback backed by a LocalTSDB
+
+    Reads service.<name>.requests (tagged success=True/False) and
+    service.<name>.latency_ms.
+    """
+    def __init__(self, tsdb, baseline_window='1h', current_window='5m'):
+        self.tsdb = tsdb
+        self.baseline_window = baseline_window
+        self.current_window = current_window
+
+    def get_baseline(self, service_name):
+        return self._health(service_name, self.baseline_window)
+
+    def get_current(self, service_name):
+        return self._health(service_name, self.current_window)
+
+    def _health(self, service_name, window):
+        success_rate = self.tsdb.get_success_rate(f'service.{service_name}.requests', window)
+        return {
+            'success_rate': success_rate,
+            'error_rate': 100.0 - success_rate,
+            'latency_p95': self.tsdb.get_percentile(
+                f'service.{service_name}.latency_ms', percentile=95, window=window
+            ),
+        }
+
+
+def _label_matches(actual, op, expected):
+    if op == '=':
+        return actual == expected
+    if op == '!=':
+        return actual != expected
+    found = re.fullmatch(expected, actual) is not None
+    return found if op == '=~' else not found
+
+
+def _parse_series_key(key):
+    match = KEY_PATTERN.fullmatch(key)
+    if match is None:
+        return _unescape_key(key), {}
+    name, labels = match.groups()
+    return _unescape_key(name), {
+        _unescape_key(label): _unescape_key(value)
+        for label, value in LABEL_PATTERN.findall(labels)
+    }
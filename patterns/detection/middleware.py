@@ -0,0 +1,164 @@
+# Drop-in ASGI/WSGI middleware: every request on a critical path is tracked automatically
+import os
+import time
+
+from patterns.detection.critical_path_monitor import CRITICAL_PATHS
+
+# Endpoint segments written as {id} or :id match any single path segment
+PARAM = object()
+
+
+class RouteTrie:
+    """
+    Prefix trie compiled from CRITICAL_PATHS endpoints
+
+    A request matches the deepest endpoint that is a segment-wise prefix of
+    its path, so /api/v1/payments/42/refund is tracked as payment_processing.
+    Paths outside the shared prefix of all endpoints are rejected with a
+    single startswith() before the trie is touched.
+    """
+    def __init__(self, critical_paths=None):
+        critical_paths = CRITICAL_PATHS if critical_paths is None else critical_paths
+        self.root = {}
+        endpoints = []
+
+        for path_name, config in critical_paths.items():
+            endpoint = config['endpoint']
+            endpoints.append(endpoint)
+            node = self.root
+            for segment in filter(None, endpoint.split('/')):
+                if segment.startswith('{') or segment.startswith(':'):
+                    segment = PARAM
+                node = node.setdefault(segment, {})
+            node[None] = path_name
+
+        # Longest literal prefix every endpoint shares, cut at a segment boundary
+        prefix = os.path.commonprefix(endpoints) if endpoints else ''
+        prefix = prefix[:prefix.rfind('/') + 1]
+        for marker in ('{', ':'):
+            if marker in prefix:
+                prefix = prefix[:prefix.rfind('/', 0, prefix.index(marker)) + 1]
+        self.prefix = prefix
+
+    def match(self, path):
+        """
+        Return the critical path name for a request path, or None
+        """
+        if not path.startswith(self.prefix):
+            return None
+
+        node = self.root
+        matched = node.get(None)
+        start = 1
+        length = len(path)
+
+        while start <= length:
+            end = path.find('/', start)
+            if end == -1:
+                end = length
+            if end > start:
+                child = node.get(path[start:end])
+                if child is None:
+                    child = node.get(PARAM)
+                    if child is None:
+                        break
+                node = child
+                matched = node.get(None, matched)
+            start = end + 1
+
+        return matched
+
+
+class _Tracked:
+    def __init__(self, monitor, critical_paths):
+        self.monitor = monitor
+        self.routes = RouteTrie(critical_paths)
+
+
+class CriticalPathWSGIMiddleware(_Tracked):
+    """
+    WSGI middleware: times each tracked request until its response body is done
+
+    5xx responses and exceptions count as failures.
+    """
+    def __init__(self, app, monitor, critical_paths=None):
+        super().__init__(monitor, critical_paths)
+        self.app = app
+
+    def __call__(self, environ, start_response):
+        path_name = self.routes.match(environ.get('PATH_INFO', ''))
+        if path_name is None:
+            return self.app(environ, start_response)
+
+        start = time.monotonic()
+        status = [500]
+
+        def tracking_start_response(status_line, headers, exc_info=None):
+            status[0] = int(status_line[:3])
+            return start_response(status_line, headers, exc_info)
+
+        try:
+            body = self.app(environ, tracking_start_response)
+        except BaseException:
+            self._record(path_name, start, False)
+            raise
+
+        return _TrackedBody(body, self, path_name, start, status)
+
+    def _record(self, path_name, start, success):
+        self.monitor.track_request(path_name, (time.monotonic() - start) * 1000, success)
+
+
+class _TrackedBody:
+    """
+    Wraps a WSGI response iterable so streaming time counts toward latency
+    """
+    def __init__(self, body, middleware, path_name, start, status):
+        self.body = body
+        self.middleware = middleware
+        self.path_name = path_name
+        self.start = start
+        self.status = status
+
+    def __iter__(self):
+        return iter(self.body)
+
+    def close(self):
+        try:
+            close = getattr(self.body, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            self.middleware._record(self.path_name, self.start, self.status[0] < 500)
+
+
+class CriticalPathASGIMiddleware(_Tracked):
+    """
+    ASGI middleware: times each tracked HTTP request until its last body chunk
+    """
+    def __init__(self, app, monitor, critical_paths=None):
+        super().__init__(monitor, critical_paths)
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        path_name = self.routes.match(scope['path'])
+        if path_name is None:
+            return await self.app(scope, receive, send)
+
+        start = time.monotonic()
+        status = [500]
+
+        async def tracking_send(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+            await send(message)
+
+        success = False
+        try:
+            await self.app(scope, receive, tracking_send)
+            success = status[0] < 500
+        finally:
+            self.monitor.track_request(path_name, (time.monotonic() - start) * 1000, success)
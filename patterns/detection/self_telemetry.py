@@ -0,0 +1,308 @@
+# Self-telemetry: how much of a monitor's time is backend, alerting, or its own
+import functools
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+# Categories every span falls into; 'evaluate' wraps the other two, so
+# backend and alert calls must happen inside an evaluation to be split out
+EVALUATE = 'evaluate'
+BACKEND = 'backend'
+ALERT = 'alert'
+
+
+class MonitorTelemetry:
+    """
+    Timing spans, sampled profiling and stack capture for the monitors
+
+    Spans are plain counters updated without a lock: under heavy thread
+    contention a few samples may be lost, which is an acceptable trade for
+    keeping the hot path to two clock reads and a few list updates.
+    """
+    def __init__(self):
+        # (component, category, step) -> [calls, total_ns, max_ns]
+        self.spans = {}
+        self.profile_sample_rate = 0.0
+        self.profiles = {}
+        self.stacks = Counter()
+        self._stack_sampler = None
+        self._exported = {}
+        # Per thread: whether a timed evaluation is already running
+        self._evaluating = threading.local()
+
+    def span_stats(self, component, category, step):
+        key = (component, category, step)
+        stats = self.spans.get(key)
+        if stats is None:
+            stats = self.spans.setdefault(key, [0, 0, 0])
+        return stats
+
+    def wrap_callable(self, component, category, step, func):
+        # Resolve the counters once so each call only touches a list
+        stats = self.span_stats(component, category, step)
+        clock = time.perf_counter_ns
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                stats[0] += 1
+                stats[1] += elapsed
+                if elapsed > stats[2]:
+                    stats[2] = elapsed
+
+        return wrapper
+
+    def instrument(self, monitor, backend_attr, alert_methods=()):
+        """
+        Time every call a monitor makes to its backend and its alert hooks
+
+        Alert hooks are host-provided and often assigned after construction.
+        Hooks the monitor already defines are wrapped here; monitors built on
+        AlertHooks also wrap any hook assigned later. On other monitors a
+        hook assigned after this call is not timed.
+        """
+        component = monitor.telemetry_component
+        backend = getattr(monitor, backend_attr)
+        setattr(monitor, backend_attr, InstrumentedBackend(backend, self, component))
+
+        for name in alert_methods:
+            method = getattr(monitor, name, None)
+            if method is not None:
+                setattr(monitor, name, self.wrap_callable(component, ALERT, name, method))
+        if isinstance(monitor, AlertHooks):
+            monitor._alert_hooks = (self, frozenset(alert_methods))
+
+    # Profiling -------------------------------------------------------------
+
+    def enable_profiling(self, sample_rate=0.01):
+        """
+        Run roughly one in 1/sample_rate evaluations under cProfile
+        """
+        self.profile_sample_rate = sample_rate
+
+    def disable_profiling(self):
+        self.profile_sample_rate = 0.0
+
+    def profile_call(self, component, func, *args, **kwargs):
+        # cProfile and pstats cost ~20ms to import; only sampled calls need them
+        import cProfile
+        import pstats
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active on this thread
+            return func(*args, **kwargs)
+
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.disable()
+            stats = self.profiles.get(component)
+            if stats is None:
+                self.profiles[component] = pstats.Stats(profiler)
+            else:
+                stats.add(profiler)
+
+    def profile_report(self, component, limit=20, sort='cumulative'):
+        stats = self.profiles.get(component)
+        if stats is None:
+            return ''
+        import io
+
+        out = io.StringIO()
+        stats.stream = out
+        stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    def start_stack_sampler(self, interval=0.005):
+        """
+        Sample every thread's stack in the background, as collapsed stacks
+        suitable for flamegraph.pl or speedscope
+        """
+        if self._stack_sampler is not None:
+            return
+
+        stop = threading.Event()
+        sampler_id = []
+
+        def sample():
+            sampler_id.append(threading.get_ident())
+            while not stop.wait(interval):
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id in sampler_id:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f"{code.co_filename}:{code.co_name}")
+                        frame = frame.f_back
+                    self.stacks[';'.join(reversed(stack))] += 1
+
+        thread = threading.Thread(target=sample, name='monitor-stack-sampler', daemon=True)
+        self._stack_sampler = (thread, stop)
+        thread.start()
+
+    def stop_stack_sampler(self):
+        if self._stack_sampler is None:
+            return
+        thread, stop = self._stack_sampler
+        stop.set()
+        thread.join()
+        self._stack_sampler = None
+
+    def collapsed_stacks(self):
+        return '\n'.join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+    def install_signal_toggle(self, signum=None, sample_rate=0.01):
+        """
+        Flip profiling and stack sampling on/off with a signal (default
+        SIGUSR2), no redeploy needed
+        """
+        import signal
+
+        if signum is None:
+            signum = signal.SIGUSR2
+
+        def toggle(signum, frame):
+            if self.profile_sample_rate:
+                self.disable_profiling()
+                self.stop_stack_sampler()
+            else:
+                self.enable_profiling(sample_rate)
+                self.start_stack_sampler()
+
+        signal.signal(signum, toggle)
+
+    # Reporting -------------------------------------------------------------
+
+    def overhead(self):
+        """
+        Milliseconds per component split into backend, alert and self time
+        """
+        report = {}
+        for (component, category, step), (calls, total_ns, max_ns) in list(self.spans.items()):
+            totals = report.setdefault(
+                component, {EVALUATE: 0.0, BACKEND: 0.0, ALERT: 0.0, 'calls': 0}
+            )
+            totals[category] += total_ns / 1e6
+            if category == EVALUATE:
+                totals['calls'] += calls
+
+        for totals in report.values():
+            # Whatever the evaluation spent outside backend and alert calls
+            # is the library's own bookkeeping
+            totals['self'] = max(totals[EVALUATE] - totals[BACKEND] - totals[ALERT], 0.0)
+
+        return report
+
+    def export(self, metrics_backend):
+        """
+        Push overhead accrued since the last export as monitor.overhead_ms
+        """
+        for component, totals in self.overhead().items():
+            for category in (BACKEND, ALERT, 'self'):
+                key = (component, category)
+                delta = totals[category] - self._exported.get(key, 0.0)
+                self._exported[key] = totals[category]
+                if delta > 0:
+                    metrics_backend.increment(
+                        'monitor.overhead_ms',
+                        value=delta,
+                        tags={'component': component, 'category': category}
+                    )
+
+    def reset(self):
+        # Zero in place: wrapped callables hold references to these lists
+        for stats in self.spans.values():
+            stats[:] = [0, 0, 0]
+        self.profiles.clear()
+        self.stacks.clear()
+        self._exported.clear()
+
+
+class AlertHooks:
+    """
+    Mixin for monitors whose alert hooks the host assigns after construction
+
+    Once MonitorTelemetry.instrument() has run, assigning one of the
+    instrumented alert hooks wraps it in an alert span as well.
+    """
+    # (telemetry, hook names), set by MonitorTelemetry.instrument()
+    _alert_hooks = None
+
+    def __setattr__(self, name, value):
+        hooks = self._alert_hooks
+        if hooks is not None and name in hooks[1] and callable(value):
+            value = hooks[0].wrap_callable(self.telemetry_component, ALERT, name, value)
+        object.__setattr__(self, name, value)
+
+
+class InstrumentedBackend:
+    """
+    Proxy that times every method call on a metrics/query backend
+    """
+    def __init__(self, backend, telemetry, component):
+        self._backend = backend
+        self._telemetry = telemetry
+        self._component = component
+
+    def __getattr__(self, name):
+        attr = getattr(self._backend, name)
+        if not callable(attr):
+            return attr
+        wrapped = self._telemetry.wrap_callable(self._component, BACKEND, name, attr)
+        # Cache on the instance so later lookups skip __getattr__
+        self.__dict__[name] = wrapped
+        return wrapped
+
+
+def timed(step=None):
+    """
+    Time a monitor entry point as an evaluation span, profiling a sample of calls
+
+    A timed method called from inside another evaluation on the same thread
+    is part of that span and is not recorded again.
+    """
+    def decorator(func):
+        name = step or func.__name__
+        clock = time.perf_counter_ns
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            telemetry = self.telemetry
+            evaluating = telemetry._evaluating
+            if getattr(evaluating, 'active', False):
+                return func(self, *args, **kwargs)
+            evaluating.active = True
+            start = clock()
+            try:
+                rate = telemetry.profile_sample_rate
+                if rate and random.random() < rate:
+                    return telemetry.profile_call(
+                        self.telemetry_component, func, self, *args, **kwargs
+                    )
+                return func(self, *args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                evaluating.active = False
+                stats = telemetry.span_stats(self.telemetry_component, EVALUATE, name)
+                stats[0] += 1
+                stats[1] += elapsed
+                if elapsed > stats[2]:
+                    stats[2] = elapsed
+
+        return wrapper
+
+    return decorator
+
+
+# Shared by every monitor unless one is given its own
+TELEMETRY = MonitorTelemetry()
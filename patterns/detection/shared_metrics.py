@@ -0,0 +1,271 @@
+# Multi-process mode: pre-fork workers aggregate into one shared segment per host
+import fcntl
+import mmap
+import os
+import socket
+import struct
+import tempfile
+import time
+import weakref
+import zlib
+from collections import deque
+from contextlib import contextmanager
+
+from patterns.detection.critical_path_monitor import CRITICAL_PATHS, CriticalPathMonitor
+from patterns.detection.histogram import NUM_BUCKETS, bucket_index, percentile_from_buckets
+from patterns.detection.self_telemetry import TELEMETRY, timed
+
+MAGIC = b'RELSHM01'
+
+# magic, worker slots, paths, latency buckets, checksum of the path names
+HEADER = struct.Struct('<8sQQQQ')
+HEADER_SIZE = 64
+WORD = 8
+
+# Per worker, per path: successes, failures, then one counter per latency bucket
+SUCCESSES = 0
+FAILURES = 1
+FIRST_BUCKET = 2
+ROW_WIDTH = FIRST_BUCKET + NUM_BUCKETS
+
+DEFAULT_SEGMENT_PATH = os.path.join(
+    '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(),
+    'reliability-critical-paths'
+)
+
+
+class SharedSegment:
+    """
+    Memory-mapped counters with one row per worker process
+
+    Every worker only ever writes its own row, so updates need no lock: each
+    counter has exactly one writer, and aligned 8-byte stores are never torn.
+    The collector sums the rows. The file lock is only taken when the segment
+    is created and when a worker claims its row.
+    """
+    def __init__(self, path=DEFAULT_SEGMENT_PATH, slots=64, path_names=None):
+        self.path = path
+        self.slots = slots
+        self.path_names = tuple(sorted(path_names or CRITICAL_PATHS))
+        self.path_index = {name: i for i, name in enumerate(self.path_names)}
+
+        self.slot_width = len(self.path_names) * ROW_WIDTH
+        self.owner_offset = HEADER_SIZE // WORD
+        self.data_offset = self.owner_offset + slots
+        size = WORD * (self.data_offset + slots * self.slot_width)
+
+        header = HEADER.pack(
+            MAGIC, slots, len(self.path_names), NUM_BUCKETS,
+            zlib.crc32('\0'.join(self.path_names).encode())
+        )
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            with _locked(fd):
+                if os.fstat(fd).st_size == 0:
+                    os.ftruncate(fd, size)
+                    os.pwrite(fd, header, 0)
+                elif os.pread(fd, HEADER.size, 0) != header:
+                    raise ValueError(
+                        f"{path} was created for different critical paths or slot count; "
+                        f"remove it or use another segment path"
+                    )
+            self._mmap = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        self.words = memoryview(self._mmap).cast('Q')
+
+    def claim_slot(self, pid):
+        """
+        Give a worker its own row, reusing rows left behind by dead workers
+
+        A reused row keeps its counts: totals only ever grow, which is what
+        lets the collector export deltas.
+        """
+        # A fresh descriptor: flock() on one inherited across fork() would be
+        # shared with the parent and exclude nothing
+        fd = os.open(self.path, os.O_RDWR)
+        try:
+            with _locked(fd):
+                owners = self.words[self.owner_offset:self.data_offset]
+                for slot, owner in enumerate(owners):
+                    if owner == pid:
+                        return slot
+                for slot, owner in enumerate(owners):
+                    if owner == 0 or not _alive(owner):
+                        self.words[self.owner_offset + slot] = pid
+                        return slot
+        finally:
+            os.close(fd)
+
+        raise RuntimeError(f"All {self.slots} worker slots in {self.path} are in use")
+
+    def row_offset(self, slot, path_name):
+        return self.data_offset + slot * self.slot_width + self.path_index[path_name] * ROW_WIDTH
+
+    def totals(self):
+        """
+        Sum every worker's row into one cumulative row per path
+        """
+        totals = {name: [0] * ROW_WIDTH for name in self.path_names}
+        for slot in range(self.slots):
+            for name in self.path_names:
+                start = self.row_offset(slot, name)
+                row = self.words[start:start + ROW_WIDTH]
+                if not any(row):
+                    continue
+                total = totals[name]
+                for i, count in enumerate(row):
+                    total[i] += count
+        return totals
+
+
+# Worker-side monitors in this process; one fork hook unbinds them all
+_MONITORS = weakref.WeakSet()
+
+
+def _unbind_all():
+    for monitor in list(_MONITORS):
+        monitor._unbind()
+
+
+# Workers forked after a monitor is built must claim their own row
+os.register_at_fork(after_in_child=_unbind_all)
+
+
+class SharedMemoryCriticalPathMonitor(CriticalPathMonitor):
+    """
+    Worker-side monitor: records into shared memory, never calls the backend
+    """
+    telemetry_component = 'critical_path_worker'
+
+    def __init__(self, segment, telemetry=TELEMETRY):
+        self.segment = segment
+        self.telemetry = telemetry
+        self._offsets = None
+        _MONITORS.add(self)
+
+    def _unbind(self):
+        self._offsets = None
+
+    def _bind(self):
+        slot = self.segment.claim_slot(os.getpid())
+        self._offsets = {
+            name: self.segment.row_offset(slot, name) for name in self.segment.path_names
+        }
+
+    @timed()
+    def track_request(self, path_name, duration_ms, success):
+        """Count the request in this worker's row; the host collector exports it"""
+        if self._offsets is None:
+            self._bind()
+
+        base = self._offsets[path_name]
+        words = self.segment.words
+        words[base + (SUCCESSES if success else FAILURES)] += 1
+        words[base + FIRST_BUCKET + bucket_index(duration_ms)] += 1
+
+
+class HostMetricsCollector(CriticalPathMonitor):
+    """
+    One per host: exports aggregated worker metrics and checks thresholds
+    """
+    telemetry_component = 'critical_path_collector'
+
+    def __init__(self, segment, metrics_backend, window_seconds=300, host=None,
+                 telemetry=TELEMETRY):
+        if window_seconds <= 0:
+            raise ValueError(f"window_seconds must be positive, got {window_seconds}")
+        super().__init__(metrics_backend, telemetry=telemetry)
+        self.segment = segment
+        self.window_seconds = window_seconds
+        self.host = host or socket.gethostname()
+
+        # Start from what is already in the segment so a collector restart
+        # does not re-export history
+        self._last_totals = segment.totals()
+        self._window = {name: deque() for name in segment.path_names}
+        self._window_sums = {name: [0] * ROW_WIDTH for name in segment.path_names}
+
+    @timed()
+    def flush(self, now=None):
+        """
+        Export what every worker recorded since the last flush, then evaluate
+        each path's thresholds over the rolling window
+        """
+        now = time.time() if now is None else now
+        totals = self.segment.totals()
+
+        for path_name in self.segment.path_names:
+            delta = [
+                current - previous
+                for current, previous in zip(totals[path_name], self._last_totals[path_name])
+            ]
+            self._export(path_name, delta)
+
+            # Rolling 5-minute window, kept as a running sum of flush deltas
+            window = self._window[path_name]
+            sums = self._window_sums[path_name]
+            window.append((now, delta))
+            for i, count in enumerate(delta):
+                sums[i] += count
+            while window[0][0] <= now - self.window_seconds:
+                _, expired = window.popleft()
+                for i, count in enumerate(expired):
+                    sums[i] -= count
+
+            requests = sums[SUCCESSES] + sums[FAILURES]
+            if requests:
+                self._evaluate_thresholds(
+                    path_name,
+                    100.0 * sums[SUCCESSES] / requests,
+                    percentile_from_buckets(sums[FIRST_BUCKET:], 95)
+                )
+
+        self._last_totals = totals
+
+    def _export(self, path_name, delta):
+        tags = {'host': self.host}
+
+        for column, success in ((SUCCESSES, 'True'), (FAILURES, 'False')):
+            if delta[column]:
+                self.metrics.increment(
+                    f'critical_path.{path_name}.requests',
+                    value=delta[column],
+                    tags={**tags, 'success': success}
+                )
+
+        if delta[SUCCESSES] + delta[FAILURES]:
+            buckets = delta[FIRST_BUCKET:]
+            for percentile in (50, 95, 99):
+                self.metrics.gauge(
+                    f'critical_path.{path_name}.latency_p{percentile}_ms',
+                    percentile_from_buckets(buckets, percentile),
+                    tags=tags
+                )
+
+    def run(self, interval_seconds=10):
+        """Flush on a fixed interval; run this in the pre-fork master"""
+        while True:
+            time.sleep(interval_seconds)
+            self.flush()
+
+
+@contextmanager
+def _locked(fd):
+    fcntl.flock(fd, fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
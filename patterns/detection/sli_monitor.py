@@ -1,31 +1,19 @@
+from patterns.config.loader import LazyConfig
+from patterns.detection.self_telemetry import TELEMETRY, AlertHooks, timed
+
 # Week 2: Service-level indicators
-SLI_DEFINITIONS = {
-    'api_availability': {
-        'description': 'Percentage of API requests that succeed',
-        'target': 99.5,
-        'measurement': 'http_requests_total{status=~"2.."} / http_requests_total'
-    },
-    'api_latency': {
-        'description': 'API request latency at 95th percentile',
-        'target': 500,  # milliseconds
-        'measurement': 'histogram_quantile(0.95, http_request_duration_ms)'
-    },
-    'database_health': {
-        'description': 'Database query success rate',
-        'target': 99.9,
-        'measurement': 'db_queries_success / db_queries_total'
-    },
-    'queue_lag': {
-        'description': 'Maximum message age in any queue',
-        'target': 60,  # seconds
-        'measurement': 'max(queue_message_age_seconds)'
-    }
-}
+# Thresholds live in patterns/config/sli_definitions.yaml and load on first use
+SLI_DEFINITIONS = LazyConfig('sli_definitions')
+
+class SLIMonitor(AlertHooks):
+    telemetry_component = 'sli'
 
-class SLIMonitor:
-    def __init__(self, prometheus_client):
+    def __init__(self, prometheus_client, telemetry=TELEMETRY):
         self.prometheus = prometheus_client
+        self.telemetry = telemetry
+        telemetry.instrument(self, 'prometheus', alert_methods=('alert_sli_violation',))
         
+    @timed()
     def check_sli(self, sli_name):
         """Evaluate SLI against target"""
         sli = SLI_DEFINITIONS[sli_name]
@@ -51,13 +39,19 @@ class SLIMonitor:
         
         return None
     
+    @timed()
+    def check_all(self):
+        """Check every SLI once, alerting on violations"""
+        for sli_name in SLI_DEFINITIONS:
+            violation = self.check_sli(sli_name)
+            
+            if violation:
+                self.alert_sli_violation(violation)
+    
     def continuous_monitoring(self):
         """Check all SLIs every minute"""
         while True:
-            for sli_name in SLI_DEFINITIONS:
-                violation = self.check_sli(sli_name)
-                
-                if violation:
-                    self.alert_sli_violation(violation)
+            # One evaluation span per tick, so alert time falls inside it
+            self.check_all()
             
             time.sleep(60)
@@ -1,4 +1,7 @@
-class AutomatedRollback:
+from patterns.detection.alert_pipeline import PipelineAlerting
+
+
+class AutomatedRollback(PipelineAlerting):
     def __init__(self, deployment_service, health_checker):
         self.deployment = deployment_service
         self.health = health_checker
@@ -1,4 +1,7 @@
-class FeatureFlagMitigation:
+from patterns.detection.alert_pipeline import PipelineAlerting
+
+
+class FeatureFlagMitigation(PipelineAlerting):
     def __init__(self, flag_service):
         self.flags = flag_service
         
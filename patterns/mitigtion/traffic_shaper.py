@@ -1,3 +1,6 @@
+from patterns.mitigtion.traffic_shift import TrafficShiftController
+
+
 class TrafficShaper:
     def __init__(self, load_balancer):
         self.lb = load_balancer
@@ -42,10 +45,18 @@ class TrafficShaper:
             f"Circuit breaker opened for {service_name} → {dependency}"
         )
     
-    def redirect_traffic(self, service_name, from_region, to_region):
+    def redirect_traffic(self, service_name, from_region, to_region, region_health=None):
         """
         Redirect traffic from unhealthy region
+        
+        With `region_health`, traffic ramps over in steps weighted by each
+        destination's headroom and stops if their latency rises; `to_region`
+        may then list several regions.
         """
+        if region_health is not None:
+            controller = TrafficShiftController(self.lb, region_health)
+            return controller.shift(service_name, from_region, to_region)
+        
         config = {
             'service': service_name,
             'traffic_routing': {
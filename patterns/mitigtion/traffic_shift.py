@@ -0,0 +1,221 @@
+# Gradual, health-weighted traffic shifting between regions
+import hashlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Fraction of the source region's traffic moved after each step
+SHIFT_STEPS = (0.1, 0.25, 0.5, 0.75, 1.0)
+
+# Seconds to let each step settle before checking destination health
+STEP_SECONDS = 60
+
+# Abort if a destination's p95 grows past this multiple of its pre-shift value
+LATENCY_ABORT_RATIO = 1.5
+
+# Capacity share a destination keeps in reserve; never shift into it
+HEADROOM_RESERVE = 0.2
+
+# Consistent-hash slots; clients hash onto a slot, slots map to regions
+HASH_SLOTS = 1024
+
+
+def slot_for(key, slots=HASH_SLOTS):
+    """
+    Stable slot for a client or session key
+    """
+    digest = hashlib.blake2b(str(key).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % slots
+
+
+class SlotTable:
+    """
+    Slot -> region assignment that moves as few slots as possible on reweighting
+
+    A client keeps landing in the same region until its slot has to move,
+    so each step only disturbs caches for the traffic actually shifted.
+    """
+    def __init__(self, initial_region, slots=HASH_SLOTS):
+        self.assignment = [initial_region] * slots
+
+    def counts(self):
+        counts = {}
+        for region in self.assignment:
+            counts[region] = counts.get(region, 0) + 1
+        return counts
+
+    def rebalance(self, weights):
+        """
+        Reassign slots to match percentage weights; returns how many slots moved
+        """
+        slots = len(self.assignment)
+        desired = _apportion(weights, slots)
+        counts = self.counts()
+
+        # Overweight regions give up their highest-numbered slots
+        freed = []
+        for index in range(slots - 1, -1, -1):
+            region = self.assignment[index]
+            if counts.get(region, 0) > desired.get(region, 0):
+                counts[region] -= 1
+                freed.append(index)
+
+        moved = len(freed)
+        for region, want in desired.items():
+            while counts.get(region, 0) < want:
+                self.assignment[freed.pop()] = region
+                counts[region] = counts.get(region, 0) + 1
+
+        return moved
+
+    def region_for(self, key):
+        return self.assignment[slot_for(key, len(self.assignment))]
+
+
+def _apportion(weights, slots):
+    """
+    Whole slot counts proportional to weights (largest remainder)
+    """
+    total = sum(weights.values())
+    exact = {region: slots * weight / total for region, weight in weights.items()}
+    counts = {region: int(share) for region, share in exact.items()}
+    short = slots - sum(counts.values())
+    for region in sorted(exact, key=lambda r: exact[r] - counts[r], reverse=True)[:short]:
+        counts[region] += 1
+    return counts
+
+
+def destination_weights(health, destinations, reserve=HEADROOM_RESERVE):
+    """
+    Split incoming traffic across destinations by spare capacity and latency
+
+    Each destination scores its headroom (capacity above current load, minus
+    the reserve) scaled down once its p95 exceeds its latency target.
+    Returns ({region: share summing to 1}, total usable headroom in rps).
+    """
+    scores = {}
+    usable = 0.0
+    for region in destinations:
+        h = health[region]
+        headroom = max(h['capacity_rps'] * (1 - reserve) - h['current_rps'], 0.0)
+        usable += headroom
+        latency_factor = min(1.0, h['latency_target_ms'] / max(h['latency_p95_ms'], 1e-9))
+        scores[region] = headroom * latency_factor
+
+    total = sum(scores.values())
+    if total == 0:
+        return {}, 0.0
+    return {region: score / total for region, score in scores.items()}, usable
+
+
+class TrafficShiftController:
+    """
+    Ramp a service's traffic out of a region in steps instead of all at once
+
+    `region_health(service_name, region)` returns live figures for a region:
+    capacity_rps, current_rps, latency_p95_ms and latency_target_ms. Every
+    step re-reads them, re-splits the moved share across destinations by
+    headroom and latency, and pushes weights plus the sticky slot table to
+    the load balancer. If any destination's p95 rises past
+    LATENCY_ABORT_RATIO of its pre-shift value, or over a target it was
+    within, the last step is undone and the shift stops there.
+    """
+    def __init__(self, load_balancer, region_health, steps=SHIFT_STEPS,
+                 step_seconds=STEP_SECONDS, abort_ratio=LATENCY_ABORT_RATIO,
+                 sleep=time.sleep):
+        self.lb = load_balancer
+        self.region_health = region_health
+        self.steps = steps
+        self.step_seconds = step_seconds
+        self.abort_ratio = abort_ratio
+        self.sleep = sleep
+
+    def shift(self, service_name, from_region, to_regions):
+        """
+        Move traffic from `from_region` to `to_regions`
+
+        Returns a dict with `completed`, the `reason` it stopped, the final
+        `weights` (percent per region) and a record of each step.
+        """
+        to_regions = [to_regions] if isinstance(to_regions, str) else list(to_regions)
+        health = self._read(service_name, [from_region] + to_regions)
+        source_rps = health[from_region]['current_rps']
+        baseline = {region: health[region]['latency_p95_ms'] for region in to_regions}
+
+        table = SlotTable(from_region)
+        weights = {from_region: 100.0}
+        history = []
+
+        for fraction in self.steps:
+            split, usable = destination_weights(health, to_regions)
+            moved_already = source_rps * (100.0 - weights[from_region]) / 100.0
+            needed = source_rps * fraction - moved_already
+            if not split or needed > usable:
+                return self._stop(service_name, 'insufficient_headroom', weights, history)
+
+            previous = dict(weights)
+            weights = self._step_weights(weights, from_region, split, fraction)
+            moved = table.rebalance(weights)
+            self._apply(service_name, from_region, weights, table)
+            history.append({'fraction': fraction, 'weights': dict(weights), 'slots_moved': moved})
+
+            self.sleep(self.step_seconds)
+            health = self._read(service_name, [from_region] + to_regions)
+            degraded = [
+                region for region in to_regions
+                if self._degraded(health[region], baseline[region])
+            ]
+            if degraded:
+                logger.error(
+                    "Traffic shift for %s stopped: latency rising in %s",
+                    service_name, ', '.join(degraded)
+                )
+                weights = previous
+                table.rebalance(weights)
+                self._apply(service_name, from_region, weights, table)
+                return self._stop(service_name, 'destination_latency', weights, history,
+                                  degraded=degraded)
+
+        logger.critical(
+            "Traffic redirected: %s from %s → %s", service_name, from_region,
+            ', '.join(f'{r} {weights.get(r, 0):.0f}%' for r in to_regions)
+        )
+        return {'completed': True, 'reason': None, 'weights': weights, 'steps': history}
+
+    def _degraded(self, health, baseline_p95):
+        p95 = health['latency_p95_ms']
+        # Crossing the target only counts if the region was within it before the shift
+        return p95 > baseline_p95 * self.abort_ratio or (
+            p95 > health['latency_target_ms'] >= baseline_p95
+        )
+
+    def _read(self, service_name, regions):
+        return {region: self.region_health(service_name, region) for region in regions}
+
+    @staticmethod
+    def _step_weights(weights, from_region, split, fraction):
+        # Destinations keep what they already hold; only the new increment is re-split
+        moved_before = 100.0 - weights[from_region]
+        increment = fraction * 100.0 - moved_before
+        new = dict(weights)
+        new[from_region] = 100.0 - fraction * 100.0
+        for region, share in split.items():
+            new[region] = new.get(region, 0.0) + increment * share
+        return new
+
+    def _apply(self, service_name, from_region, weights, table):
+        self.lb.update_config({
+            'service': service_name,
+            'traffic_routing': {
+                'from': from_region,
+                'weights': {region: round(weight, 2) for region, weight in weights.items()},
+                'hash_slots': list(table.assignment),
+            }
+        })
+
+    @staticmethod
+    def _stop(service_name, reason, weights, history, **details):
+        logger.error("Traffic shift for %s halted (%s) at %s", service_name, reason, weights)
+        return {'completed': False, 'reason': reason, 'weights': weights, 'steps': history,
+                **details}
@@ -0,0 +1,88 @@
+# Process-pool fan-out shared by the simulators and offline analysis tools
+import itertools
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# Read-only state for the task functions, installed once per worker process
+_STATE = {}
+
+# Tasks submitted per worker ahead of the results being consumed
+IN_FLIGHT_PER_WORKER = 2
+
+
+def _install_state(state):
+    _STATE.clear()
+    _STATE.update(state)
+
+
+def worker_state():
+    """
+    The `state` passed to the run_tasks call this process is working for
+    """
+    return _STATE
+
+
+def run_tasks(func, tasks, workers=None, state=None):
+    """
+    [func(task) for task in tasks], spread across a process pool
+
+    `state` is sent to each worker once rather than pickled with every task,
+    which matters when it is a large curve or history; `func` reads it
+    through worker_state() and must be a module-level function. With
+    workers=1, or a single task, everything runs in this process instead of
+    paying for pool startup. Results are in task order.
+    """
+    tasks = list(tasks)
+
+    if workers == 1 or len(tasks) <= 1:
+        _install_state(state or {})
+        try:
+            return [func(task) for task in tasks]
+        finally:
+            _STATE.clear()
+
+    with ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        initializer=_install_state,
+        initargs=(state or {},)
+    ) as pool:
+        return list(pool.map(func, tasks))
+
+
+def iter_tasks(func, tasks, workers=None, state=None):
+    """
+    Like run_tasks, but yields each result as soon as it is done
+
+    Only a few tasks per worker are submitted ahead of the consumer, and a
+    result is dropped once yielded, so folding large partial results into a
+    running total holds a bounded number of them however many tasks there
+    are. Results arrive in completion order.
+    """
+    tasks = list(tasks)
+
+    if workers == 1 or len(tasks) <= 1:
+        _install_state(state or {})
+        try:
+            for task in tasks:
+                yield func(task)
+        finally:
+            _STATE.clear()
+        return
+
+    workers = workers or os.cpu_count()
+    remaining = iter(tasks)
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_install_state,
+        initargs=(state or {},)
+    ) as pool:
+        pending = {
+            pool.submit(func, task)
+            for task in itertools.islice(remaining, workers * IN_FLIGHT_PER_WORKER)
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for task in itertools.islice(remaining, len(done)):
+                pending.add(pool.submit(func, task))
+            for future in done:
+                yield future.result()
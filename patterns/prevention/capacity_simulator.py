@@ -0,0 +1,216 @@
+# Queueing simulation: how tail latency behaves as load approaches capacity
+import heapq
+import itertools
+import math
+import random
+from collections import deque
+
+from patterns.detection.histogram import NUM_BUCKETS, bucket_index, percentile_from_buckets
+from patterns.mitigtion.graceful_degradation import GracefulDegradation
+from patterns.parallel import run_tasks, worker_state
+
+# Requests an instance may queue beyond its busy workers before rejecting
+DEFAULT_QUEUE_LIMIT = 100
+
+
+class ServiceTime:
+    """
+    Per-request service time in ms: resampled from measurements, or lognormal
+
+    `scale` multiplies every sample, which is how a degradation level's
+    cheaper code path is modelled.
+    """
+    def __init__(self, samples_ms=None, median_ms=None, sigma=0.5, scale=1.0):
+        if samples_ms is None and median_ms is None:
+            raise ValueError("Provide measured samples_ms or a median_ms")
+        self.samples_ms = list(samples_ms) if samples_ms is not None else None
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.scale = scale
+
+    def scaled(self, factor):
+        return ServiceTime(self.samples_ms, self.median_ms, self.sigma, self.scale * factor)
+
+    def sampler(self, rng):
+        """
+        Zero-argument callable returning one service time in seconds
+        """
+        scale = self.scale / 1000.0
+        if self.samples_ms is not None:
+            samples = self.samples_ms
+            choice = rng.choice
+            return lambda: choice(samples) * scale
+        median, sigma = self.median_ms, self.sigma
+        lognormvariate = rng.lognormvariate
+        mu = math.log(median)
+        return lambda: lognormvariate(mu, sigma) * scale
+
+
+def degradation_scale(service_name, level, levels=None):
+    """
+    Service-time factor for a GracefulDegradation level, relative to FULL
+    """
+    levels = levels or GracefulDegradation.DEGRADATION_LEVELS
+    modes = levels[service_name]
+    return modes[level]['latency_target'] / modes['FULL']['latency_target']
+
+
+def curve_from_counts(counts, interval_seconds=60):
+    """
+    Arrival curve from recorded request counts per interval
+    """
+    return [(interval_seconds, count / interval_seconds) for count in counts]
+
+
+def arrivals(curve, rng, load_scale=1.0):
+    """
+    Poisson arrival times following a piecewise-constant (duration, rps) curve
+    """
+    start = 0.0
+    for duration, rps in curve:
+        rate = rps * load_scale
+        end = start + duration
+        if rate > 0:
+            t = start + rng.expovariate(rate)
+            while t < end:
+                yield t
+                t += rng.expovariate(rate)
+        start = end
+
+
+def simulate(curve, service_time, instances, bulkhead, queue_limit=DEFAULT_QUEUE_LIMIT,
+             timeout_ms=None, load_scale=1.0, seed=0):
+    """
+    Replay an arrival curve against `instances` x `bulkhead` FCFS workers
+
+    Requests are spread round-robin; each instance queues up to
+    `queue_limit` requests beyond its busy workers and rejects the rest.
+    Each instance keeps a heap of worker free-at times, so a request's start
+    is the earliest free worker (or its arrival) and events are processed in
+    arrival order without a separate event calendar. Latency includes queue
+    wait; requests slower than `timeout_ms` are counted as timed out but
+    still hold their worker, as an abandoned call does in production.
+    """
+    rng = random.Random(seed)
+    next_service_time = service_time.sampler(rng)
+    workers = [[0.0] * bulkhead for _ in range(instances)]
+    waiting = [deque() for _ in range(instances)]
+    buckets = [0] * NUM_BUCKETS
+    timeout = timeout_ms / 1000.0 if timeout_ms is not None else None
+
+    requests = rejected = timed_out = 0
+    busy_seconds = 0.0
+    last_finish = 0.0
+    target = itertools.cycle(range(instances))
+
+    for arrived in arrivals(curve, rng, load_scale):
+        requests += 1
+        instance = next(target)
+
+        # Drop queued requests that have started by now
+        queue = waiting[instance]
+        while queue and queue[0] <= arrived:
+            queue.popleft()
+        if len(queue) >= queue_limit:
+            rejected += 1
+            continue
+
+        free = workers[instance]
+        start = heapq.heappop(free)
+        if start <= arrived:
+            start = arrived
+        else:
+            queue.append(start)
+        service = next_service_time()
+        finish = start + service
+        heapq.heappush(free, finish)
+
+        busy_seconds += service
+        if finish > last_finish:
+            last_finish = finish
+        latency = finish - arrived
+        if timeout is not None and latency > timeout:
+            timed_out += 1
+        buckets[bucket_index(latency * 1000)] += 1
+
+    served = requests - rejected
+    capacity_seconds = instances * bulkhead * last_finish
+    return {
+        'requests': requests,
+        'rejected_rate': round(100.0 * rejected / requests, 3) if requests else 0.0,
+        'timeout_rate': round(100.0 * timed_out / served, 3) if served else 0.0,
+        'latency_p50_ms': round(percentile_from_buckets(buckets, 50), 1),
+        'latency_p95_ms': round(percentile_from_buckets(buckets, 95), 1),
+        'latency_p99_ms': round(percentile_from_buckets(buckets, 99), 1),
+        'utilization': round(busy_seconds / capacity_seconds, 3) if capacity_seconds else 0.0,
+    }
+
+
+def _simulate_task(task):
+    instances, bulkhead, level, scale, load_scale, budget_ms, seed = task
+    state = worker_state()
+    result = simulate(
+        state['curve'], state['service_time'].scaled(scale),
+        instances, bulkhead, state['queue_limit'], state['timeout_ms'],
+        load_scale, seed
+    )
+    result.update(instances=instances, bulkhead=bulkhead, level=level, load_scale=load_scale,
+                  latency_budget_ms=budget_ms,
+                  within_budget=budget_ms is None or result['latency_p99_ms'] <= budget_ms)
+    return result
+
+
+def sweep(curve, service_time, instance_counts, bulkhead_sizes, service_name=None,
+          levels=('FULL',), load_scales=(1.0,), queue_limit=DEFAULT_QUEUE_LIMIT,
+          timeout_ms=None, latency_budget_ms=None, workers=None, seed=0):
+    """
+    Simulate every combination of instance count, bulkhead size, degradation
+    level and load scale across a process pool
+
+    With a `service_name` from GracefulDegradation.DEGRADATION_LEVELS, each
+    level scales service time by its latency_target relative to FULL and,
+    unless `latency_budget_ms` is given, is judged against its own
+    latency_target as a p99 budget.
+    """
+    tasks = []
+    for level in levels:
+        scale, budget = 1.0, latency_budget_ms
+        if service_name is not None:
+            scale = degradation_scale(service_name, level)
+            if budget is None:
+                budget = GracefulDegradation.DEGRADATION_LEVELS[service_name][level][
+                    'latency_target'
+                ]
+        for instances, bulkhead, load_scale in itertools.product(
+            instance_counts, bulkhead_sizes, load_scales
+        ):
+            tasks.append((instances, bulkhead, level, scale, load_scale, budget, seed))
+
+    return run_tasks(_simulate_task, tasks, workers, state={
+        'curve': curve, 'service_time': service_time, 'queue_limit': queue_limit,
+        'timeout_ms': timeout_ms,
+    })
+
+
+def recommend(results, max_rejected_rate=0.1):
+    """
+    Fewest total workers, then the fullest level, that keeps p99 in budget
+    at every simulated load scale; returns that configuration's worst run
+    """
+    level_order = {'FULL': 0, 'DEGRADED': 1, 'EMERGENCY': 2}
+    configs = {}
+    for result in results:
+        configs.setdefault(
+            (result['instances'], result['bulkhead'], result['level']), []
+        ).append(result)
+
+    eligible = [
+        max(runs, key=lambda r: r['latency_p99_ms'])
+        for runs in configs.values()
+        if all(r['within_budget'] and r['rejected_rate'] <= max_rejected_rate for r in runs)
+    ]
+    if not eligible:
+        return None
+    return min(eligible, key=lambda r: (
+        r['instances'] * r['bulkhead'], level_order.get(r['level'], 3), r['latency_p99_ms']
+    ))
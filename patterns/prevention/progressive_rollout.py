@@ -14,23 +14,31 @@ class ProgressiveRollout:
         Deploy with progressive rollout
         """
         for stage in self.ROLLOUT_STAGES:
-            logger.info(
-                f"Deploying {service_name} {new_version} to {stage['percentage']}%"
-            )
-            
-            # Update traffic routing
-            self.set_traffic_split(service_name, new_version, stage['percentage'])
-            
-            # Monitor health during this stage
-            if not self.monitor_health(service_name, stage['duration_minutes']):
-                logger.error(f"Health degradation detected at {stage['name']} stage")
+            if not self.deploy_stage(service_name, new_version, stage):
                 self.rollback(service_name, new_version)
                 return DeploymentResult(success=False, stage=stage['name'])
-            
-            logger.info(f"Stage {stage['name']} completed successfully")
         
         return DeploymentResult(success=True, stage='full')
     
+    def deploy_stage(self, service_name, new_version, stage):
+        """
+        Shift traffic to one stage and watch it; False means roll back
+        """
+        logger.info(
+            f"Deploying {service_name} {new_version} to {stage['percentage']}%"
+        )
+        
+        # Update traffic routing
+        self.set_traffic_split(service_name, new_version, stage['percentage'])
+        
+        # Monitor health during this stage
+        if not self.monitor_health(service_name, stage['duration_minutes']):
+            logger.error(f"Health degradation detected at {stage['name']} stage")
+            return False
+        
+        logger.info(f"Stage {stage['name']} completed successfully")
+        return True
+    
     def monitor_health(self, service_name, duration_minutes):
         """
         Monitor service health during rollout stage
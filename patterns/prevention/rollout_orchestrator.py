@@ -0,0 +1,175 @@
+# Release trains: progressive rollouts for many services, in dependency order
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from patterns.prevention.progressive_rollout import ProgressiveRollout
+
+logger = logging.getLogger(__name__)
+
+# Blast-radius cap: most services allowed in each stage at once (absent = no cap)
+STAGE_CONCURRENCY = {
+    'canary': 5,
+    'small': 10,
+    'medium': 10,
+}
+
+DEPLOYED = 'deployed'
+ROLLED_BACK = 'rolled_back'
+CANCELLED = 'cancelled'
+
+
+def topological_levels(dependencies):
+    """
+    Group services into levels that can deploy together; raises ValueError on a cycle
+
+    `dependencies` maps each service in the release to the services it
+    depends on. Dependencies outside the release are already running and
+    impose no ordering.
+    """
+    remaining = {
+        service: {dep for dep in deps if dep in dependencies and dep != service}
+        for service, deps in dependencies.items()
+    }
+    levels = []
+    while remaining:
+        ready = sorted(service for service, deps in remaining.items() if not deps)
+        if not ready:
+            raise ValueError(f"Dependency cycle between: {', '.join(sorted(remaining))}")
+        levels.append(ready)
+        for service in ready:
+            del remaining[service]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return levels
+
+
+class RolloutOrchestrator:
+    """
+    Run ProgressiveRollout stages for a whole release train concurrently
+
+    A service starts once everything it depends on is fully deployed, so
+    wall-clock time grows with the depth of the dependency graph rather than
+    the number of services. STAGE_CONCURRENCY bounds how many services sit
+    in each stage at once; a service takes its next stage's slot before
+    giving up the current one, so it never drops back in traffic while
+    waiting. When a service rolls back, every service depending on it,
+    directly or transitively, is cancelled before it ships.
+    """
+    def __init__(self, rollout=None, stage_limits=STAGE_CONCURRENCY, max_workers=32):
+        self.rollout = rollout or ProgressiveRollout()
+        self.max_workers = max_workers
+        self._slots = {
+            stage['name']: threading.BoundedSemaphore(stage_limits[stage['name']])
+            for stage in self.rollout.ROLLOUT_STAGES if stage['name'] in stage_limits
+        }
+
+    def deploy_all(self, versions, dependencies=None):
+        """
+        Deploy every service in `versions` ({service: new_version})
+
+        Returns {'services': {service: {...}}, 'wall_clock_seconds': float},
+        each service reporting its status (deployed, rolled_back or
+        cancelled), the stage it reached, if cancelled, which failed
+        dependency blocked it and, if its rollback itself raised, the error.
+        """
+        dependencies = {
+            service: set((dependencies or {}).get(service, ())) & versions.keys()
+            for service in versions
+        }
+        topological_levels(dependencies)  # Reject cycles before anything ships
+
+        dependents = {service: [] for service in versions}
+        for service, deps in dependencies.items():
+            for dep in deps:
+                dependents[dep].append(service)
+
+        waiting = {service: set(deps) for service, deps in dependencies.items()}
+        ready = sorted(service for service, deps in waiting.items() if not deps)
+        results = {}
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix='rollout') as pool:
+            running = {}
+
+            def launch_ready():
+                for service in ready:
+                    del waiting[service]
+                    future = pool.submit(self._deploy_service, service, versions[service])
+                    running[future] = service
+                ready.clear()
+
+            launch_ready()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    service = running.pop(future)
+                    results[service] = future.result()
+                    if results[service]['status'] == DEPLOYED:
+                        for dependent in dependents[service]:
+                            deps = waiting.get(dependent)
+                            if deps:
+                                deps.discard(service)
+                                if not deps:
+                                    ready.append(dependent)
+                    else:
+                        self._cancel_dependents(service, dependents, waiting, results)
+                launch_ready()
+
+        return {
+            'services': results,
+            'wall_clock_seconds': time.monotonic() - started,
+        }
+
+    def _deploy_service(self, service_name, new_version):
+        started = time.monotonic()
+        held = None
+        reached = None
+        try:
+            for stage in self.rollout.ROLLOUT_STAGES:
+                slot = self._slots.get(stage['name'])
+                if slot is not None:
+                    slot.acquire()
+                if held is not None:
+                    held.release()
+                held = slot
+                reached = stage['name']
+
+                try:
+                    healthy = self.rollout.deploy_stage(service_name, new_version, stage)
+                except Exception:
+                    logger.exception("Stage %s of %s raised", stage['name'], service_name)
+                    healthy = False
+
+                if not healthy:
+                    try:
+                        self.rollout.rollback(service_name, new_version)
+                    except Exception as exc:
+                        # Still report it rolled back so its dependents are cancelled
+                        logger.exception("Rollback of %s raised", service_name)
+                        return self._result(ROLLED_BACK, reached, started, error=repr(exc))
+                    return self._result(ROLLED_BACK, reached, started)
+        finally:
+            if held is not None:
+                held.release()
+
+        return self._result(DEPLOYED, reached, started)
+
+    def _cancel_dependents(self, failed, dependents, waiting, results):
+        pending = list(dependents[failed])
+        while pending:
+            service = pending.pop()
+            if service not in waiting:
+                continue
+            del waiting[service]
+            logger.warning("Cancelling %s: dependency %s rolled back", service, failed)
+            results[service] = {'status': CANCELLED, 'stage': None, 'blocked_by': failed,
+                                'duration_seconds': 0.0, 'error': None}
+            pending.extend(dependents[service])
+
+    @staticmethod
+    def _result(status, stage, started, error=None):
+        return {'status': status, 'stage': stage, 'blocked_by': None,
+                'duration_seconds': time.monotonic() - started, 'error': error}
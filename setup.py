@@ -3,7 +3,7 @@
 Build 99.9% reliability into your product from day one
 """
 
-from setuptools import setup, find_packages
+from setuptools import setup, find_namespace_packages
 from pathlib import Path
 
 # Read the README file
@@ -26,7 +26,12 @@ setup(
         "InfoQ Article": "https://www.infoq.com/",
         "Research Paper": "https://doi.org/10.36227/techrxiv.xxxxx",
     },
-    packages=find_packages(exclude=["tests", "tests.*", "examples", "docs"]),
+    # patterns/ and tools/ have no __init__.py, so find them as namespace packages
+    packages=find_namespace_packages(
+        include=["patterns", "patterns.*", "tools", "tools.*"],
+        exclude=["*.__pycache__", "tests", "tests.*", "benchmarks", "benchmarks.*",
+                 "examples", "docs"],
+    ),
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
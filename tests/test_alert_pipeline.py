@@ -0,0 +1,230 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import pytest
+
+from patterns.detection import alert_pipeline
+from patterns.detection.alert_pipeline import (
+    DELIVERY_ATTEMPTS, GROUP_WAIT, RETRY_BACKOFF, AlertPipeline, TokenBucket
+)
+
+
+class Receiver:
+    def __init__(self, failures=0, delay=0.0):
+        self.failures = failures
+        self.delay = delay
+        self.batches = []
+
+    def send_batch(self, alerts):
+        if self.delay:
+            time.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('receiver down')
+        self.batches.append([alert['title'] for alert in alerts])
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def manual(clock):
+    """
+    Pipeline driven step by step from the test instead of its thread
+    """
+    pipelines = []
+
+    def make(**receivers):
+        pipeline = AlertPipeline(receivers, clock=clock)
+        pipeline._delivery = ThreadPoolExecutor(max_workers=2)
+        pipelines.append(pipeline)
+        return pipeline
+
+    yield make
+    for pipeline in pipelines:
+        pipeline._delivery.shutdown(wait=True)
+
+
+def pump(pipeline, flush_all=False):
+    pipeline._drain(block=False)
+    pipeline._dispatch(flush_all=flush_all)
+    wait([future for future, *_ in pipeline._in_flight.values()])
+    pipeline._collect()
+
+
+class TestTokenBucket:
+    def test_burst_then_refill(self, clock):
+        bucket = TokenBucket(per_minute=6, burst=2, clock=clock)
+        assert bucket.take() and bucket.take()
+        assert not bucket.take()
+        clock.now += 10
+        assert bucket.take()
+        assert not bucket.take()
+
+
+class TestGrouping:
+    def test_routes_by_severity(self, manual):
+        pager, chat = Receiver(), Receiver()
+        pipeline = manual(pager=pager, chat=chat)
+        pipeline.submit('P0', 'db down', 'primary unreachable')
+        pump(pipeline)
+        assert pager.batches == [['db down']] and chat.batches == [['db down']]
+
+        pipeline.submit('P2', 'disk 80%', '')
+        pump(pipeline, flush_all=True)
+        assert pager.batches == [['db down']]
+        assert chat.batches[-1] == ['disk 80%']
+
+    def test_group_wait_batches_related_alerts(self, manual, clock):
+        chat = Receiver()
+        pipeline = manual(chat=chat)
+        pipeline.submit('P2', 'a', '')
+        pipeline.submit('P2', 'b', '')
+        pipeline.submit('P2', 'a', '')
+        pump(pipeline)
+        assert chat.batches == []
+
+        clock.now += GROUP_WAIT['P2']
+        pump(pipeline)
+        assert chat.batches == [['a', 'b']]
+        assert pipeline.stats['deduplicated'] == 1
+
+    def test_repeat_within_interval_is_deduplicated(self, manual):
+        pager = Receiver()
+        pipeline = manual(pager=pager)
+        pipeline.submit('P0', 'db down', '')
+        pump(pipeline)
+        pipeline.submit('P0', 'db down', '')
+        pump(pipeline)
+        assert pager.batches == [['db down']]
+        assert pipeline.stats['deduplicated'] == 1
+
+    def test_full_queue_drops(self):
+        pipeline = AlertPipeline({'pager': Receiver()}, max_queue=1)
+        assert pipeline.submit('P0', 'a', '')
+        assert not pipeline.submit('P0', 'b', '')
+        assert pipeline.stats['dropped'] == 1
+
+
+class TestDeliveryFailures:
+    def test_failed_batch_is_retried_with_backoff(self, manual, clock):
+        pager = Receiver(failures=1)
+        pipeline = manual(pager=pager)
+        pipeline.submit('P0', 'db down', '')
+        pump(pipeline)
+        assert pager.batches == []
+        assert pipeline.stats['batches_failed'] == 1
+
+        pump(pipeline)
+        assert pager.batches == []
+        clock.now += RETRY_BACKOFF
+        pump(pipeline)
+        assert pager.batches == [['db down']]
+
+    def test_failed_alert_is_not_a_duplicate(self, manual):
+        pager = Receiver(failures=1)
+        pipeline = manual(pager=pager)
+        pipeline.submit('P0', 'db down', '')
+        pump(pipeline)
+        pipeline.submit('P0', 'db down', '')
+        pipeline._drain(block=False)
+        # Joins the retry rather than being dropped as already sent
+        assert pipeline._groups[('pager', 'P0')]['alerts']['P0:db down']['count'] == 2
+        pump(pipeline, flush_all=True)
+        assert pager.batches == [['db down']]
+        assert 'P0:db down' in pipeline._last_sent
+
+    def test_repeat_while_in_flight_is_deduplicated(self, manual):
+        gate = threading.Event()
+
+        class Blocking(Receiver):
+            def send_batch(self, alerts):
+                gate.wait(5)
+                super().send_batch(alerts)
+
+        pager = Blocking()
+        pipeline = manual(pager=pager)
+        pipeline.submit('P0', 'db down', '')
+        pipeline._drain(block=False)
+        pipeline._dispatch()
+        pipeline.submit('P0', 'db down', '')
+        pipeline._drain(block=False)
+        gate.set()
+        pump(pipeline)
+        pump(pipeline)
+        assert pager.batches == [['db down']]
+        assert pipeline.stats['deduplicated'] == 1
+
+    def test_dropped_after_max_attempts(self, manual, clock):
+        pager = Receiver(failures=DELIVERY_ATTEMPTS)
+        pipeline = manual(pager=pager)
+        pipeline.submit('P0', 'db down', '')
+        for _ in range(DELIVERY_ATTEMPTS):
+            pump(pipeline, flush_all=True)
+        assert pipeline.stats['batches_failed'] == DELIVERY_ATTEMPTS
+        assert pipeline.stats['batches_dropped'] == 1
+        assert pipeline._groups == {}
+
+
+class TestLifecycle:
+    def test_stop_flushes_grouped_alerts(self):
+        chat = Receiver()
+        pipeline = AlertPipeline({'chat': chat}, tick_seconds=0.01).start()
+        pipeline.submit('P2', 'disk 80%', '')
+        pipeline.stop(timeout=5)
+        assert chat.batches == [['disk 80%']]
+        assert pipeline._delivery._shutdown
+
+    def test_stop_timeout_leaves_delivery_running(self):
+        pager = Receiver(delay=0.5)
+        pipeline = AlertPipeline({'pager': pager}, tick_seconds=0.01).start()
+        pipeline.submit('P0', 'db down', '')
+        time.sleep(0.05)
+        thread = pipeline._thread
+        pipeline.stop(timeout=0.01)
+        assert thread.is_alive()
+        assert not pipeline._delivery._shutdown
+        thread.join(5)
+        assert pager.batches == [['db down']]
+        assert pipeline._delivery._shutdown
+
+    def test_default_pipeline_flushes_at_exit(self):
+        script = (
+            'from patterns.detection.alert_pipeline import AlertPipeline, set_pipeline\n'
+            'class Receiver:\n'
+            '    def send_batch(self, alerts):\n'
+            '        print("sent", *[alert["title"] for alert in alerts], flush=True)\n'
+            'set_pipeline(AlertPipeline({"chat": Receiver()}))\n'
+            'from patterns.detection.alert_pipeline import get_pipeline\n'
+            'get_pipeline().submit("P2", "disk", "80%")\n'
+        )
+        out = subprocess.run(
+            [sys.executable, '-c', script], capture_output=True, text=True, timeout=30,
+            cwd=os.path.dirname(os.path.dirname(__file__)), check=True
+        )
+        assert out.stdout.strip() == 'sent disk'
+
+    def test_pipeline_alerting_uses_shared_pipeline(self, monkeypatch):
+        submitted = []
+
+        class Pipeline:
+            def submit(self, *args, **kwargs):
+                submitted.append(args)
+
+        monkeypatch.setattr(alert_pipeline, '_pipeline', Pipeline())
+        alert_pipeline.PipelineAlerting().alert('P1', 'title', 'message')
+        assert submitted == [('P1', 'title', 'message')]
@@ -0,0 +1,139 @@
+import numpy as np
+import pytest
+
+from tools.analysis.backtest import (
+    ACTIONABILITY_CUTOFF, Rule, backtest, load_history_from_tsdb, load_history_npz, recommend,
+    rules_from_config, sweep_actionability_cutoff, sweep_rule
+)
+
+# One step a minute for two hours
+TIMESTAMPS = np.arange(0, 7200, 60, dtype=np.float64)
+
+
+def series_with_dips(*dips, baseline=99.99, dip=97.0):
+    values = np.full(len(TIMESTAMPS), baseline)
+    for start, end in dips:
+        values[(TIMESTAMPS >= start) & (TIMESTAMPS <= end)] = dip
+    return values
+
+
+class TestSweepRule:
+    def test_detection_and_delay(self):
+        values = series_with_dips((1200, 1500))
+        result = sweep_rule(values, TIMESTAMPS, [(1080, 1800)], 'below', [99.9, 95.0])
+        assert result['incidents_detected'].tolist() == [1, 0]
+        assert result['median_detection_delay_s'][0] == 120
+        assert np.isnan(result['median_detection_delay_s'][1])
+        assert result['fired'].tolist() == [1, 0]
+        assert result['false_positives'].tolist() == [0, 0]
+
+    def test_breach_after_incident_end_is_not_detection(self):
+        values = np.full(len(TIMESTAMPS), 100.0)
+        values[TIMESTAMPS == 120] = 90.0
+        result = sweep_rule(values, TIMESTAMPS, [(0, 70)], 'below', [99.0])
+        assert result['incidents_detected'].tolist() == [0]
+        assert result['false_positives'].tolist() == [1]
+
+    def test_breach_on_incident_end_counts(self):
+        values = np.full(len(TIMESTAMPS), 100.0)
+        values[TIMESTAMPS == 60] = 90.0
+        result = sweep_rule(values, TIMESTAMPS, [(0, 60)], 'below', [99.0])
+        assert result['incidents_detected'].tolist() == [1]
+        assert result['false_positives'].tolist() == [0]
+
+    def test_false_positives_and_noise(self):
+        values = series_with_dips((600, 600), (3000, 3000), (5000, 5120))
+        result = sweep_rule(values, TIMESTAMPS, [(4980, 5400)], 'below', [99.9])
+        assert result['fired'].tolist() == [3]
+        assert result['false_positives'].tolist() == [2]
+        assert result['noise_ratio'][0] == pytest.approx(2 / 3)
+
+    def test_for_steps_suppresses_blips(self):
+        values = series_with_dips((600, 600), (5000, 5180))
+        result = sweep_rule(values, TIMESTAMPS, [(4980, 5400)], 'below', [99.9], for_steps=3)
+        assert result['fired'].tolist() == [1]
+        assert result['false_positives'].tolist() == [0]
+        assert result['median_detection_delay_s'][0] == 5160 - 4980  # third breaching step
+
+    def test_above_direction_and_missing_data(self):
+        values = np.full(len(TIMESTAMPS), 100.0)
+        values[10:20] = np.nan
+        values[30] = 900.0
+        result = sweep_rule(values, TIMESTAMPS, [], 'above', [500.0])
+        assert result['fired'].tolist() == [1]
+        assert np.isnan(result['median_detection_delay_s'][0])
+
+    def test_accepts_lists(self):
+        result = sweep_rule([100.0, 90.0, 100.0], [0, 60, 120], [(50, 70)], 'below', [99.0])
+        assert result['incidents_detected'].tolist() == [1]
+
+
+class TestRule:
+    def test_rejects_unknown_direction(self):
+        with pytest.raises(ValueError):
+            Rule('x', 'x', 'sideways', 1.0)
+
+    def test_success_rate_candidates_scale_error_budget(self):
+        candidates = Rule('x', 'x', 'below', 99.9).candidates(5)
+        assert candidates[0] == pytest.approx(99.975)
+        assert candidates[-1] == pytest.approx(99.6)
+        assert candidates[2] == pytest.approx(99.9)
+
+    def test_latency_candidates_scale_threshold(self):
+        candidates = Rule('x', 'x', 'above', 500).candidates(3)
+        assert candidates.tolist() == pytest.approx([250, 500, 1000])
+
+    def test_rules_from_config(self):
+        rules = {rule.name: rule for rule in rules_from_config()}
+        assert rules['payment_processing.success_rate'].direction == 'below'
+        assert rules['payment_processing.latency_p95'].direction == 'above'
+
+
+class TestBacktest:
+    def test_serial_and_parallel_agree(self):
+        series = {
+            'a': series_with_dips((1200, 1500)),
+            'b': series_with_dips((600, 600), (4000, 4300)),
+        }
+        rules = [Rule('a', 'a', 'below', 99.9), Rule('b', 'b', 'below', 99.9),
+                 Rule('missing', 'missing', 'below', 99.9)]
+        incidents = [(1080, 1800), (3900, 4500)]
+        serial = backtest(TIMESTAMPS, series, incidents, rules, workers=1, candidates=5)
+        parallel = backtest(TIMESTAMPS, series, incidents, rules, workers=2, candidates=5)
+        assert serial == parallel
+        assert [result['rule'] for result in serial] == ['a', 'b']
+
+    def test_recommend_prefers_detection_within_noise_budget(self):
+        series = {'a': series_with_dips((600, 600), (1200, 1500), dip=99.5)}
+        [result] = backtest(TIMESTAMPS, series, [(1080, 1800)],
+                            [Rule('a', 'a', 'below', 99.9)], workers=1, candidates=9)
+        best = recommend(result, max_noise_ratio=0.5)
+        assert best['incidents_detected'] == 1
+        assert recommend(result, max_noise_ratio=-1) is None
+
+
+def test_sweep_actionability_cutoff():
+    rows = sweep_actionability_cutoff({'disk': 0.2, 'cpu': 0.6, 'latency': 0.9},
+                                      cutoffs=[0.5, ACTIONABILITY_CUTOFF])
+    assert [row['flagged'] for row in rows] == [1, 2]
+    assert rows[1]['current'] and not rows[0]['current']
+    assert rows[1]['alerts'] == ['disk', 'cpu']
+
+
+def test_load_history_npz(tmp_path):
+    path = tmp_path / 'history.npz'
+    np.savez(path, timestamps=TIMESTAMPS.astype(np.int64), a=np.ones(len(TIMESTAMPS)))
+    timestamps, series = load_history_npz(str(path))
+    assert timestamps.dtype == np.float64
+    assert list(series) == ['a']
+
+
+def test_load_history_from_tsdb_carries_values_forward():
+    class FakeTSDB:
+        def range_query(self, name, start, end):
+            return {name: [(130.0, 2.0), (10.0, 1.0)]}
+
+    timestamps, series = load_history_from_tsdb(FakeTSDB(), ['x'], 0, 240, step=60)
+    assert timestamps.tolist() == [0, 60, 120, 180]
+    assert np.isnan(series['x'][0])
+    assert series['x'][1:].tolist() == [1.0, 1.0, 2.0]
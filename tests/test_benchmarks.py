@@ -0,0 +1,38 @@
+import inspect
+import itertools
+
+import pytest
+
+from benchmarks import bench_detection, bench_mitigation, bench_prevention, bench_resolution
+
+MODULES = (bench_detection, bench_mitigation, bench_prevention, bench_resolution)
+
+BENCHMARKS = [
+    cls for module in MODULES
+    for _, cls in inspect.getmembers(module, inspect.isclass)
+    if cls.__module__ == module.__name__
+    and any(name.startswith(('time_', 'track_')) for name in vars(cls))
+]
+
+
+@pytest.mark.parametrize('benchmark', BENCHMARKS, ids=lambda cls: cls.__name__)
+def test_benchmark_runs_once(benchmark):
+    """
+    Every benchmark must run with its first parameter combination, so the
+    suite does not rot between asv runs
+    """
+    params = getattr(benchmark, 'params', ())
+    if params and not isinstance(params[0], (list, tuple)):
+        params = (params,)
+    args = next(itertools.product(*params)) if params else ()
+
+    instance = benchmark()
+    if hasattr(instance, 'setup'):
+        instance.setup(*args)
+    try:
+        for name in sorted(vars(benchmark)):
+            if name.startswith(('time_', 'track_')):
+                getattr(instance, name)(*args)
+    finally:
+        if hasattr(instance, 'teardown'):
+            instance.teardown(*args)
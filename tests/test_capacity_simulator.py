@@ -0,0 +1,96 @@
+import random
+
+import pytest
+
+from patterns.prevention.capacity_simulator import (
+    ServiceTime, arrivals, curve_from_counts, degradation_scale, recommend, simulate, sweep
+)
+
+# One minute at 200 rps
+CURVE = [(60, 200.0)]
+
+
+class TestServiceTime:
+    def test_requires_samples_or_median(self):
+        with pytest.raises(ValueError):
+            ServiceTime()
+
+    def test_resamples_measurements_with_scale(self):
+        sample = ServiceTime(samples_ms=[10, 20]).scaled(0.5).sampler(random.Random(0))
+        assert {sample() for _ in range(100)} == {0.005, 0.01}
+
+    def test_lognormal_median(self):
+        sample = ServiceTime(median_ms=40).sampler(random.Random(0))
+        values = sorted(sample() for _ in range(5001))
+        assert values[2500] == pytest.approx(0.04, rel=0.1)
+
+
+def test_curve_and_arrivals():
+    curve = curve_from_counts([600, 0, 1200])
+    assert curve == [(60, 10.0), (60, 0.0), (60, 20.0)]
+    times = list(arrivals(curve, random.Random(1)))
+    assert not any(60 <= t < 120 for t in times)
+    assert len(times) == pytest.approx(1800, rel=0.1)
+    assert len(list(arrivals(curve, random.Random(1), load_scale=2.0))) == pytest.approx(
+        3600, rel=0.1
+    )
+
+
+def test_degradation_scale():
+    assert degradation_scale('inventory_service', 'FULL') == 1.0
+    assert degradation_scale('inventory_service', 'DEGRADED') == 0.5
+    assert degradation_scale('pricing_service', 'EMERGENCY') == pytest.approx(10 / 150)
+
+
+class TestSimulate:
+    def test_light_load_is_just_service_time(self):
+        result = simulate(CURVE, ServiceTime(samples_ms=[10]), instances=4, bulkhead=8)
+        assert result['rejected_rate'] == 0.0
+        assert result['latency_p99_ms'] == pytest.approx(10, rel=0.1)
+        assert result['utilization'] < 0.1
+
+    def test_overload_queues_then_rejects(self):
+        # 200 rps against 1 x 1 workers of 10ms each is twice capacity
+        result = simulate(CURVE, ServiceTime(samples_ms=[10]), instances=1, bulkhead=1,
+                          queue_limit=10, timeout_ms=50)
+        assert result['rejected_rate'] > 40
+        assert result['latency_p99_ms'] > 50
+        assert result['timeout_rate'] > 0
+        assert result['utilization'] > 0.9
+
+    def test_seeded(self):
+        service_time = ServiceTime(median_ms=20)
+        assert simulate(CURVE, service_time, 2, 2, seed=3) == simulate(
+            CURVE, service_time, 2, 2, seed=3
+        )
+
+
+class TestSweep:
+    def test_serial_and_parallel_agree(self):
+        args = (CURVE, ServiceTime(median_ms=20), [1, 2], [2, 4])
+        kwargs = dict(levels=('FULL', 'DEGRADED'), service_name='inventory_service',
+                      load_scales=(1.0, 1.5))
+        serial = sweep(*args, workers=1, **kwargs)
+        assert len(serial) == 16
+        assert serial == sweep(*args, workers=2, **kwargs)
+
+    def test_levels_use_their_latency_target_as_budget(self):
+        results = sweep(CURVE, ServiceTime(samples_ms=[60]), [4], [8],
+                        service_name='inventory_service', levels=('FULL', 'DEGRADED'),
+                        workers=1)
+        budgets = {r['level']: r['latency_budget_ms'] for r in results}
+        assert budgets == {'FULL': 100, 'DEGRADED': 50}
+        # Halved service time (30ms) fits inside DEGRADED's 50ms target
+        assert all(r['within_budget'] for r in results)
+
+    def test_recommend_fewest_workers_in_budget(self):
+        results = sweep(CURVE, ServiceTime(samples_ms=[10]), [1, 2, 4], [2, 4],
+                        latency_budget_ms=50, load_scales=(1.0, 1.2), workers=1)
+        best = recommend(results)
+        assert (best['instances'], best['bulkhead']) == (1, 4)
+        assert best['load_scale'] == 1.2
+
+    def test_recommend_nothing_in_budget(self):
+        results = sweep(CURVE, ServiceTime(samples_ms=[100]), [1], [1],
+                        latency_budget_ms=50, workers=1)
+        assert recommend(results) is None
@@ -0,0 +1,162 @@
+from types import SimpleNamespace
+
+import pytest
+
+from patterns.detection import cardinality
+from patterns.detection.alert_quality_tracker import AlertQualityTracker
+from patterns.detection.cardinality import OTHER, SERIES, CardinalityLimiter, HyperLogLog
+
+
+class RecordingBackend:
+    def __init__(self):
+        self.writes = []
+        self.gauges = []
+
+    def increment(self, name, tags=None, value=1):
+        self.writes.append((name, tags))
+
+    def histogram(self, name, value, tags=None):
+        self.writes.append((name, tags))
+
+    def gauge(self, name, value, tags=None):
+        self.gauges.append((name, value, tags))
+
+    def get_success_rate(self, name, window='5m'):
+        return 99.9
+
+
+class TestHyperLogLog:
+    @pytest.mark.parametrize('count', [10, 1000, 50000])
+    def test_estimate_within_error(self, count):
+        sketch = HyperLogLog()
+        for i in range(count):
+            sketch.add(f'value-{i}')
+        assert sketch.estimate() == pytest.approx(count, rel=0.1)
+
+    def test_duplicates_do_not_count(self):
+        sketch = HyperLogLog()
+        for _ in range(5):
+            for i in range(100):
+                sketch.add(i)
+        assert sketch.estimate() == pytest.approx(100, rel=0.1)
+
+    def test_merge_is_union(self):
+        a, b = HyperLogLog(), HyperLogLog()
+        for i in range(3000):
+            a.add(i)
+        for i in range(2000, 5000):
+            b.add(i)
+        a.merge(b)
+        assert a.estimate() == pytest.approx(5000, rel=0.1)
+
+    def test_merge_requires_same_precision(self):
+        with pytest.raises(ValueError):
+            HyperLogLog(10).merge(HyperLogLog(12))
+
+
+class TestTagLimits:
+    def test_values_past_limit_fold_to_other(self):
+        backend = RecordingBackend()
+        limiter = CardinalityLimiter(backend, default_limit=2)
+        for user in ('a', 'b', 'c', 'a'):
+            limiter.increment('api.requests', tags={'user': user})
+        assert [tags['user'] for _, tags in backend.writes] == ['a', 'b', OTHER, 'a']
+
+    def test_per_metric_override(self):
+        backend = RecordingBackend()
+        limiter = CardinalityLimiter(backend, limits={'x': {'user': 1}}, default_limit=5)
+        limiter.increment('x', tags={'user': 'a'})
+        limiter.increment('x', tags={'user': 'b'})
+        limiter.increment('y', tags={'user': 'b'})
+        assert [tags['user'] for _, tags in backend.writes] == ['a', OTHER, 'b']
+
+    def test_admitted_combinations_share_one_dict(self):
+        backend = RecordingBackend()
+        limiter = CardinalityLimiter(backend)
+        limiter.increment('api.requests', tags={'status': '200'})
+        limiter.histogram('api.requests', 1.0, tags={'status': '200'})
+        assert backend.writes[0][1] is backend.writes[1][1]
+
+    def test_untagged_and_queries_pass_through(self):
+        backend = RecordingBackend()
+        limiter = CardinalityLimiter(backend)
+        limiter.increment('api.requests')
+        assert backend.writes == [('api.requests', None)]
+        assert limiter.get_success_rate('api.requests') == 99.9
+
+
+class TestSeriesLimits:
+    def test_combinations_are_capped_per_metric(self):
+        backend = RecordingBackend()
+        limiter = CardinalityLimiter(backend, default_limit=100, default_series_limit=50)
+        for a in range(10):
+            for b in range(10):
+                for c in range(10):
+                    limiter.increment('m', tags={'a': str(a), 'b': str(b), 'c': str(c)})
+
+        emitted = {tuple(sorted(tags.items())) for _, tags in backend.writes}
+        assert len(emitted) == 51
+        assert (('a', OTHER), ('b', OTHER), ('c', OTHER)) in emitted
+
+        report = limiter.report()[f'm:{SERIES}']
+        assert report['admitted'] == 50
+        assert report['folded_writes'] == 950
+        assert report['estimated_distinct'] == pytest.approx(1000, rel=0.1)
+
+    def test_admitted_combinations_keep_their_tags(self):
+        backend = RecordingBackend()
+        limiter = CardinalityLimiter(backend, default_series_limit=1)
+        limiter.increment('m', tags={'a': '1', 'b': '1'})
+        limiter.increment('m', tags={'a': '2', 'b': '1'})
+        limiter.increment('m', tags={'b': '1', 'a': '1'})
+        assert [tags for _, tags in backend.writes] == [
+            {'a': '1', 'b': '1'}, {'a': OTHER, 'b': OTHER}, {'a': '1', 'b': '1'}
+        ]
+
+    def test_series_override(self):
+        backend = RecordingBackend()
+        limiter = CardinalityLimiter(backend, series_limits={'m': 1}, default_series_limit=10)
+        limiter.increment('m', tags={'a': '1'})
+        limiter.increment('m', tags={'a': '2'})
+        assert backend.writes[-1][1] == {'a': OTHER}
+
+    def test_resolved_cache_is_bounded(self, monkeypatch):
+        monkeypatch.setattr(cardinality, 'MAX_RESOLVED', 10)
+        backend = RecordingBackend()
+        limiter = CardinalityLimiter(backend)
+        for i in range(25):
+            limiter.increment(f'metric.{i}', tags={'status': '200'})
+        assert len(limiter._resolved) <= 10
+        limiter.increment('metric.0', tags={'status': '200'})
+        assert backend.writes[-1][1] == {'status': '200'}
+
+
+def test_export_reports_limits_that_were_hit():
+    backend = RecordingBackend()
+    limiter = CardinalityLimiter(backend, default_limit=1, default_series_limit=1)
+    limiter.increment('m', tags={'user': 'a'})
+    limiter.increment('m', tags={'user': 'b'})
+    limiter.increment('n', tags={'user': 'a'})
+    limiter.export()
+    exported = {(tags['metric'], tags['tag']) for _, _, tags in backend.gauges}
+    assert exported == {('m', 'user'), ('m', SERIES), ('n', 'user'), ('n', SERIES)}
+
+
+class TestAlertQualityTracker:
+    class Tracker(AlertQualityTracker):
+        def get_alert_outcome(self, alert):
+            return 'actionable'
+
+    def test_alert_names_past_the_override_fold(self):
+        backend = RecordingBackend()
+        tracker = self.Tracker(backend)
+        limit = cardinality.CARDINALITY_LIMITS['alert.outcomes']['alert_name']
+        for i in range(limit + 10):
+            tracker.track_alert(SimpleNamespace(name=f'alert-{i}', severity='P2'))
+        names = [tags['alert_name'] for _, tags in backend.writes]
+        assert len(set(names) - {OTHER}) == limit
+        assert names[-10:] == [OTHER] * 10
+
+    def test_existing_limiter_is_not_wrapped_again(self):
+        limiter = CardinalityLimiter(RecordingBackend())
+        assert self.Tracker(limiter).metrics is limiter
@@ -0,0 +1,180 @@
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from tools.chaos import cli, proxy as proxy_module
+from tools.chaos.proxy import (
+    FaultInjectionProxy, FaultProfile, LatencyDistribution, StandInDependency, Throttle
+)
+from tools.chaos.scenarios import CHAOS_CRITERIA, http_probe, run_scenarios, summarize
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 30))
+
+
+async def with_proxy(profile, body):
+    stand_in = await StandInDependency().start()
+    proxy = await FaultInjectionProxy(stand_in.address, profile, seed=1).start()
+    try:
+        return await body(proxy)
+    finally:
+        await proxy.stop()
+        await stand_in.stop()
+
+
+async def raw_exchange(address, payload, timeout=2.0):
+    """
+    Send bytes and return what comes back before close, or the exception type
+    """
+    reader, writer = await asyncio.open_connection(*address)
+    try:
+        writer.write(payload)
+        return await asyncio.wait_for(reader.read(), timeout)
+    except (ConnectionResetError, asyncio.TimeoutError) as exc:
+        return type(exc)
+    finally:
+        writer.close()
+
+
+class TestFaultProfile:
+    def test_outcome_mix(self):
+        profile = FaultProfile(error_rate=0.2, reset_rate=0.3, hang_rate=0.1)
+        rng = random.Random(3)
+        outcomes = [profile.outcome(rng) for _ in range(20000)]
+        assert outcomes.count('reset') / len(outcomes) == pytest.approx(0.3, abs=0.02)
+        assert outcomes.count('hang') / len(outcomes) == pytest.approx(0.1, abs=0.02)
+        assert outcomes.count('error') / len(outcomes) == pytest.approx(0.2, abs=0.02)
+
+    def test_rates_must_fit(self):
+        with pytest.raises(ValueError):
+            FaultProfile(error_rate=0.6, reset_rate=0.6)
+
+    def test_protocol_is_validated(self):
+        with pytest.raises(ValueError):
+            FaultProfile(protocol='udp')
+
+    def test_latency_from_dict(self):
+        profile = FaultProfile(latency={'distribution': 'fixed', 'ms': 250})
+        assert profile.latency.sample_seconds(random.Random()) == 0.25
+
+
+class TestLatencyDistribution:
+    @pytest.mark.parametrize('params', [
+        {'distribution': 'uniform', 'min_ms': 10, 'max_ms': 20},
+        {'distribution': 'exponential', 'mean_ms': 15},
+        {'distribution': 'lognormal', 'median_ms': 15, 'sigma': 0.3},
+    ])
+    def test_samples_are_non_negative(self, params):
+        latency = LatencyDistribution(**params)
+        rng = random.Random(0)
+        assert all(latency.sample_seconds(rng) >= 0 for _ in range(1000))
+
+    def test_unknown_distribution(self):
+        with pytest.raises(ValueError):
+            LatencyDistribution('pareto')
+
+
+def test_throttle_paces_bytes():
+    throttle = Throttle(1000)
+    assert throttle.delay_after(500) == pytest.approx(0.5, abs=0.01)
+    assert throttle.delay_after(500) == pytest.approx(1.0, abs=0.01)
+
+
+class TestProxy:
+    def test_forwards_requests(self):
+        async def body(proxy):
+            host, port = proxy.address
+            return await http_probe(f'http://{host}:{port}/', requests=20, concurrency=5)
+
+        outcomes = run(with_proxy(FaultProfile(), body))
+        assert all(success for success, _ in outcomes)
+
+    def test_http_error_answers_with_status(self):
+        async def body(proxy):
+            return await raw_exchange(proxy.address, b'GET / HTTP/1.1\r\nHost: x\r\n\r\n')
+
+        response = run(with_proxy(FaultProfile(error_rate=1.0, error_status=502), body))
+        assert response.startswith(b'HTTP/1.1 502')
+
+    def test_http_error_without_request_head_is_reset(self, monkeypatch):
+        monkeypatch.setattr(proxy_module, 'ERROR_HEAD_SECONDS', 0.05)
+
+        async def body(proxy):
+            return await raw_exchange(proxy.address, b'\x00\x00\x00\x08\x04\xd2\x16\x2f')
+
+        assert run(with_proxy(FaultProfile(error_rate=1.0), body)) in (ConnectionResetError, b'')
+
+    def test_tcp_error_is_a_reset(self):
+        async def body(proxy):
+            result = await raw_exchange(proxy.address, b'\x00\x00\x00\x08\x04\xd2\x16\x2f',
+                                        timeout=1.0)
+            return result, dict(proxy.stats)
+
+        result, stats = run(with_proxy(FaultProfile(error_rate=1.0, protocol='tcp'), body))
+        assert result in (ConnectionResetError, b'')
+        assert stats['error'] == 1
+
+    def test_reset_and_hang(self):
+        async def body(proxy):
+            host, port = proxy.address
+            return await http_probe(f'http://{host}:{port}/', requests=10, timeout=0.2)
+
+        outcomes = run(with_proxy(FaultProfile(reset_rate=0.5, hang_rate=0.5, hang_seconds=5),
+                                  body))
+        assert not any(success for success, _ in outcomes)
+
+
+class TestScenarios:
+    def test_summarize(self):
+        outcomes = [(True, float(i)) for i in range(95)] + [(False, 1000.0)] * 5
+        summary = summarize(outcomes)
+        assert summary['error_rate'] == 5.0
+        assert summary['latency_p95_ms'] == 1000.0
+        assert summary['passed'] is (1000.0 <= CHAOS_CRITERIA['max_latency_p95_ms'])
+
+    def test_run_scenarios_reports_gate_format(self):
+        async def body():
+            stand_in = await StandInDependency().start()
+            try:
+                return await run_scenarios(
+                    stand_in.address, ('127.0.0.1', 0),
+                    names=['high_latency', 'partial_deployment'], requests=20, concurrency=20,
+                    timeout=3.0, seed=7
+                )
+            finally:
+                await stand_in.stop()
+
+        results = run(body())
+        assert set(results['results']) == {'high_latency', 'partial_deployment'}
+        # Without a probe URL there is no fallback, so half the requests fail
+        assert 'partial_deployment' not in results['chaos_scenarios']
+        assert results['results']['partial_deployment']['proxy']['error'] > 0
+
+
+class TestCli:
+    def test_run_writes_results(self, tmp_path):
+        output = tmp_path / 'chaos.json'
+        status = cli.main(['run', '--stand-in', '--scenario', 'partial_deployment',
+                           '--requests', '10', '--max-error-rate', '100',
+                           '--output', str(output)])
+        assert status == 0
+        assert json.loads(output.read_text())['chaos_scenarios'] == ['partial_deployment']
+
+    def test_unknown_scenario(self):
+        assert cli.main(['run', '--stand-in', '--scenario', 'meteor_strike']) == 2
+
+    def test_parse_address(self):
+        assert cli.parse_address('db.internal:5432') == ('db.internal', 5432)
+        assert cli.parse_address(':8080') == ('127.0.0.1', 8080)
+
+    def test_import_does_not_load_asyncio(self):
+        code = 'import sys, tools.chaos.cli; print("asyncio" in sys.modules)'
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                             check=True, cwd=os.path.dirname(os.path.dirname(__file__)))
+        assert out.stdout.strip() == 'False'
@@ -0,0 +1,87 @@
+import datetime
+import os
+import sys
+
+import pytest
+
+from patterns.config import loader
+from patterns.config.loader import LazyConfig, lazy_import, load_config
+
+
+@pytest.fixture
+def config_dir(tmp_path, monkeypatch):
+    source = tmp_path / 'config'
+    source.mkdir()
+    monkeypatch.setattr(loader, 'CONFIG_DIR', str(source))
+    monkeypatch.setattr(loader, 'CACHE_DIR', str(tmp_path / 'cache'))
+    (source / 'limits.yaml').write_text('payments:\n  max_error_rate: 0.5\n')
+    return source
+
+
+class TestLoadConfig:
+    def test_parses_yaml_and_writes_snapshot(self, config_dir):
+        assert load_config('limits') == {'payments': {'max_error_rate': 0.5}}
+        assert os.path.exists(loader.snapshot_path('limits'))
+
+    def test_fresh_snapshot_skips_yaml(self, config_dir, monkeypatch):
+        load_config('limits')
+        monkeypatch.setattr(loader, '_parse_yaml', lambda raw: pytest.fail('parsed YAML'))
+        assert load_config('limits')['payments']['max_error_rate'] == 0.5
+
+    def test_touched_source_is_trusted_by_hash(self, config_dir, monkeypatch):
+        load_config('limits')
+        path = config_dir / 'limits.yaml'
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        monkeypatch.setattr(loader, '_parse_yaml', lambda raw: pytest.fail('parsed YAML'))
+        assert load_config('limits')['payments']['max_error_rate'] == 0.5
+
+    def test_edited_source_invalidates_snapshot(self, config_dir):
+        load_config('limits')
+        (config_dir / 'limits.yaml').write_text('payments:\n  max_error_rate: 1.0\n')
+        assert load_config('limits')['payments']['max_error_rate'] == 1.0
+
+    def test_corrupt_snapshot_falls_back_to_yaml(self, config_dir):
+        load_config('limits')
+        with open(loader.snapshot_path('limits'), 'wb') as f:
+            f.write(b'not marshal')
+        assert load_config('limits')['payments']['max_error_rate'] == 0.5
+
+    def test_compile_all(self, config_dir):
+        (config_dir / 'routes.yaml').write_text('- /health\n')
+        assert loader.compile_all() == ['limits', 'routes']
+
+    def test_unmarshallable_values_skip_the_snapshot(self, config_dir):
+        (config_dir / 'freeze.yaml').write_text('starts: 2026-12-20\n')
+        assert load_config('freeze') == {'starts': datetime.date(2026, 12, 20)}
+        assert not os.path.exists(loader.snapshot_path('freeze'))
+        assert load_config('freeze') == {'starts': datetime.date(2026, 12, 20)}
+
+    def test_shipped_configs_load(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(loader, 'CACHE_DIR', str(tmp_path / 'cache'))
+        for name in ('business_metrics', 'critical_paths', 'sli_definitions'):
+            assert load_config(name)
+
+
+class TestLazyConfig:
+    def test_loads_on_first_access(self, config_dir):
+        config = LazyConfig('limits')
+        assert 'not loaded' in repr(config)
+        assert config['payments'] == {'max_error_rate': 0.5}
+        assert list(config) == ['payments']
+        assert len(config) == 1
+
+    def test_reload_picks_up_changes(self, config_dir):
+        config = LazyConfig('limits')
+        assert config['payments']['max_error_rate'] == 0.5
+        (config_dir / 'limits.yaml').write_text('payments:\n  max_error_rate: 2.0\n')
+        assert config.reload()['payments']['max_error_rate'] == 2.0
+
+
+class TestLazyImport:
+    def test_returns_loaded_module(self):
+        assert lazy_import('json') is sys.modules['json']
+
+    def test_missing_module_names_extra(self):
+        with pytest.raises(ImportError, match=r'zero-to-one-reliability\[analysis\]'):
+            lazy_import('surely_not_an_installed_module', extra='analysis')
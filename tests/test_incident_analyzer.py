@@ -0,0 +1,156 @@
+import gzip
+import json
+
+import pytest
+
+from tools.analysis.incident_analyzer import (
+    DurationHistogram, analyze, analyze_shard, find_inputs, main, parse_timestamp, plan_shards
+)
+
+T0 = 1_700_000_000
+
+
+def incident(i, **fields):
+    record = {
+        'id': f'INC-{i}', 'severity': 'P1' if i % 3 else 'P0',
+        'root_cause': 'Connection pool  exhausted' if i % 2 else 'bad deploy',
+        'started_at': T0 + i * 3600,
+        'detected_at': T0 + i * 3600 + 300,
+        'resolved_at': T0 + i * 3600 + 1800,
+    }
+    record.update(fields)
+    return record
+
+
+def write_jsonl(path, records, compress=False):
+    lines = ''.join(
+        (record if isinstance(record, str) else json.dumps(record)) + '\n' for record in records
+    )
+    if compress:
+        with gzip.open(path, 'wt') as f:
+            f.write(lines)
+    else:
+        path.write_text(lines)
+    return str(path)
+
+
+class TestSharding:
+    @pytest.mark.parametrize('shard_bytes', [1, 7, 100, 1000, 10 ** 6])
+    def test_every_line_counted_once(self, tmp_path, shard_bytes):
+        path = write_jsonl(tmp_path / 'incidents.jsonl', [incident(i) for i in range(50)])
+        total = 0
+        for shard in plan_shards([path], shard_bytes):
+            total += analyze_shard(shard).incidents
+        assert total == 50
+
+    def test_gzip_is_read_whole(self, tmp_path):
+        path = write_jsonl(tmp_path / 'incidents.jsonl.gz', [incident(1)], compress=True)
+        assert plan_shards([path], 1) == [(path, 0, None)]
+        assert analyze_shard((path, 0, None)).incidents == 1
+
+    def test_empty_file(self, tmp_path):
+        path = write_jsonl(tmp_path / 'empty.jsonl', [])
+        assert analyze([path], workers=1)['incidents'] == 0
+
+    def test_find_inputs_walks_directories(self, tmp_path):
+        (tmp_path / 'nested').mkdir()
+        write_jsonl(tmp_path / 'a.jsonl', [])
+        write_jsonl(tmp_path / 'nested' / 'b.jsonl.gz', [], compress=True)
+        (tmp_path / 'notes.txt').write_text('ignored')
+        found = find_inputs([str(tmp_path)])
+        assert sorted(p.rsplit('/', 1)[1] for p in found) == ['a.jsonl', 'b.jsonl.gz']
+
+
+class TestAnalyze:
+    def test_report(self, tmp_path):
+        records = [incident(i) for i in range(10)] + [
+            incident(10, root_cause='Connection pool exhausted'), '{not json', ''
+        ]
+        path = write_jsonl(tmp_path / 'incidents.jsonl', records)
+        report = analyze([path], workers=1)
+
+        assert report['incidents'] == 11
+        assert report['malformed_lines'] == 1
+        assert report['by_severity'] == {'P1': 7, 'P0': 4}
+        assert report['mttd_minutes']['count'] == 11
+        assert report['mttd_minutes']['p50'] == pytest.approx(5, rel=0.1)
+        assert report['mttr_minutes']['p50'] == pytest.approx(30, rel=0.1)
+        assert report['top_root_causes'] == [
+            {'root_cause': 'connection pool exhausted', 'incidents': 6},
+            {'root_cause': 'bad deploy', 'incidents': 5},
+        ]
+
+    def test_events_in_other_files_complete_milestones(self, tmp_path):
+        base = incident(1)
+        record = {key: value for key, value in base.items()
+                  if key not in ('detected_at', 'resolved_at')}
+        events = [
+            {'incident_id': 'INC-1', 'event': 'acknowledged',
+             'timestamp': '2023-11-14T23:23:20Z'},  # T0 + 3600 + 600
+            {'incident_id': 'INC-1', 'event': 'detected', 'timestamp': T0 + 3600 + 300},
+            {'incident_id': 'INC-1', 'event': 'resolved', 'timestamp': T0 + 3600 + 3600},
+            {'incident_id': 'INC-1', 'event': 'comment', 'timestamp': T0},
+        ]
+        paths = [write_jsonl(tmp_path / 'incidents.jsonl', [record]),
+                 write_jsonl(tmp_path / 'events.jsonl.gz', events, compress=True)]
+        report = analyze(paths, workers=2, shard_bytes=10)
+
+        assert report['events'] == 4
+        assert report['mttd_minutes']['mean'] == pytest.approx(5, rel=0.1)
+        assert report['mttr_minutes']['mean'] == pytest.approx(60, rel=0.1)
+
+    def test_serial_and_parallel_agree(self, tmp_path):
+        path = write_jsonl(tmp_path / 'incidents.jsonl', [incident(i) for i in range(200)])
+        assert analyze([path], workers=1) == analyze([path], workers=3, shard_bytes=2048)
+
+    def test_action_items(self, tmp_path):
+        items = [
+            {'priority': 'P0', 'status': 'Done'},
+            {'priority': 'P0', 'completed': False},
+            {'frequency': 'weekly', 'typical_duration': 'hours',
+             'user_impact': 'revenue_blocking', 'completed': True},
+            {'frequency': 'sometimes'},
+        ]
+        path = write_jsonl(tmp_path / 'incidents.jsonl', [incident(1, action_items=items)])
+        action_items = analyze([path], workers=1)['action_items']
+        assert action_items['P0'] == {'total': 3, 'completed': 2, 'completion_rate': 66.7}
+        assert action_items['unknown']['total'] == 1
+
+    def test_nested_root_cause(self, tmp_path):
+        record = incident(1, root_cause={'root_cause': 'Expired TLS cert', 'whys': []})
+        path = write_jsonl(tmp_path / 'incidents.jsonl', [record])
+        report = analyze([path], workers=1)
+        assert report['top_root_causes'][0]['root_cause'] == 'expired tls cert'
+
+
+class TestDurationHistogram:
+    def test_merge_and_summary(self):
+        a, b = DurationHistogram(), DurationHistogram()
+        for minutes in range(1, 51):
+            a.add(minutes)
+        for minutes in range(51, 101):
+            b.add(minutes)
+        a.merge(b)
+        summary = a.summary()
+        assert summary['count'] == 100
+        assert summary['mean'] == 50.5
+        assert summary['p50'] == pytest.approx(50, rel=0.1)
+        assert summary['p99'] == pytest.approx(99, rel=0.1)
+
+    def test_empty(self):
+        assert DurationHistogram().summary() == {'count': 0}
+
+
+def test_parse_timestamp():
+    assert parse_timestamp(5) == 5.0
+    assert parse_timestamp('1970-01-01T00:01:00Z') == 60.0
+    assert parse_timestamp('1970-01-01T01:00:00+01:00') == 0.0
+
+
+def test_main_writes_report(tmp_path, capsys):
+    path = write_jsonl(tmp_path / 'incidents.jsonl', [incident(1)])
+    output = tmp_path / 'report.json'
+    assert main([path, '--workers', '1', '--output', str(output)]) == 0
+    assert json.loads(output.read_text())['incidents'] == 1
+    assert main([path, '--workers', '1']) == 0
+    assert json.loads(capsys.readouterr().out)['incidents'] == 1
@@ -0,0 +1,258 @@
+import math
+import random
+import threading
+
+import pytest
+
+from patterns.detection.local_tsdb import (
+    ChunkEncoder, LocalHealthChecker, LocalTSDB, _parse_series_key, decode_chunk,
+    parse_window, series_key
+)
+
+NOW = 1_700_000_000.0
+
+
+@pytest.fixture
+def clock():
+    return {'now': NOW}
+
+
+@pytest.fixture
+def tsdb(tmp_path, clock):
+    db = LocalTSDB(str(tmp_path), clock=lambda: clock['now'])
+    yield db
+    db.close()
+
+
+def encode(points):
+    encoder = ChunkEncoder()
+    for ts, value in points:
+        encoder.append(ts, value)
+    return encoder.bits.getvalue(), encoder.count
+
+
+class TestGorillaCodec:
+    def test_regular_series_round_trips(self):
+        points = [(1_700_000_000_000 + i * 10_000, 42.0) for i in range(120)]
+        payload, count = encode(points)
+        assert list(decode_chunk(payload, count)) == points
+        # 16 bytes for the first point, 68 bits for the first delta, then
+        # one bit per timestamp and one per value
+        assert len(payload) == 16 + math.ceil((68 + 1 + 2 * 118) / 8)
+
+    def test_irregular_series_round_trips(self):
+        rng = random.Random(7)
+        ts = -5_000
+        points = []
+        for _ in range(500):
+            ts += rng.choice([0, 1, 63, 64, 255, 256, 2047, 2048, 10 ** 9, 3])
+            points.append((ts, rng.choice([0.0, -1.5, rng.random() * 1e6, 1e-300, 7.0])))
+        payload, count = encode(points)
+        assert list(decode_chunk(payload, count)) == points
+
+    def test_special_floats_round_trip(self):
+        points = [(i, value) for i, value in enumerate([math.inf, -math.inf, -0.0, 5e-324])]
+        payload, count = encode(points)
+        assert list(decode_chunk(payload, count)) == points
+
+    def test_nan_round_trips(self):
+        payload, count = encode([(0, 1.0), (1, math.nan)])
+        assert math.isnan(list(decode_chunk(payload, count))[1][1])
+
+    def test_empty_chunk(self):
+        assert list(decode_chunk(b'', 0)) == []
+
+
+class TestSeriesKey:
+    @pytest.mark.parametrize('name, tags', [
+        ('requests', None),
+        ('requests', {'success': 'True'}),
+        ('requests', {'path': 'a,b', 'query': 'x=1', 'braces': '{}', 'slash': 'c\\d'}),
+        ('odd{name}', {'k=ey': '', 'z': 'v'}),
+    ])
+    def test_round_trips(self, name, tags):
+        expected = {key: str(value) for key, value in (tags or {}).items()}
+        assert _parse_series_key(series_key(name, tags)) == (name, expected)
+
+    def test_labels_are_sorted(self):
+        assert series_key('m', {'b': '2', 'a': '1'}) == 'm{a=1,b=2}'
+
+    def test_parse_window(self):
+        assert parse_window('90s') == 90
+        assert parse_window('5m') == 300
+        assert parse_window('1h') == 3600
+        assert parse_window('2d') == 172800
+        assert parse_window(42) == 42
+
+
+class TestWindows:
+    def test_five_minute_window_ignores_older_failures(self, tsdb):
+        # Failures 6-9 minutes ago, successes in the last 5 minutes
+        for seconds_ago in range(540, 360, -10):
+            tsdb.increment('requests', tags={'success': 'False'}, timestamp=NOW - seconds_ago)
+            tsdb.histogram('latency_ms', 5000, timestamp=NOW - seconds_ago)
+        for seconds_ago in range(290, 0, -10):
+            tsdb.increment('requests', tags={'success': 'True'}, timestamp=NOW - seconds_ago)
+            tsdb.histogram('latency_ms', 100, timestamp=NOW - seconds_ago)
+
+        assert tsdb.get_success_rate('requests', '5m') == 100.0
+        assert tsdb.get_percentile('latency_ms', 95, '5m') < 200
+        assert tsdb.get_success_rate('requests', '1h') < 100.0
+
+    def test_bucket_straddling_window_start_is_dropped(self, tsdb, clock):
+        clock['now'] = NOW + 30
+        tsdb.increment('requests', tags={'success': 'False'}, timestamp=NOW - 290)
+        tsdb.increment('requests', tags={'success': 'True'}, timestamp=NOW + 10)
+        assert tsdb.get_success_rate('requests', '5m') == 100.0
+
+    def test_current_bucket_is_included(self, tsdb):
+        tsdb.increment('requests', tags={'success': 'False'}, timestamp=NOW)
+        assert tsdb.get_success_rate('requests', '5m') == 0.0
+
+    def test_hour_window_uses_five_minute_rollups(self, tsdb):
+        tsdb.increment('requests', tags={'success': 'False'}, timestamp=NOW - 3500)
+        tsdb.increment('requests', tags={'success': 'False'}, timestamp=NOW - 3700)
+        tsdb.increment('requests', tags={'success': 'True'}, timestamp=NOW - 10)
+        assert tsdb.get_success_rate('requests', '1h') == 50.0
+
+    def test_no_traffic_is_not_an_outage(self, tsdb):
+        assert tsdb.get_success_rate('requests', '5m') == 100.0
+
+    def test_health_checker(self, tsdb):
+        for i in range(100):
+            tsdb.increment('service.api.requests', tags={'success': str(i % 10 != 0)},
+                           timestamp=NOW - i)
+            tsdb.histogram('service.api.latency_ms', 100, timestamp=NOW - i)
+        health = LocalHealthChecker(tsdb).get_current('api')
+        assert health['success_rate'] == pytest.approx(90.0)
+        assert health['error_rate'] == pytest.approx(10.0)
+        assert 90 <= health['latency_p95'] <= 110
+
+
+class TestQuery:
+    @pytest.fixture
+    def loaded(self, tsdb):
+        for i in range(60):
+            tsdb.increment('http_requests_total', tags={'status': '200'}, timestamp=NOW - i)
+        for i in range(20):
+            tsdb.increment('http_requests_total', tags={'status': '503'}, timestamp=NOW - i)
+        tsdb.gauge('queue_depth', 3, tags={'queue': 'a'}, timestamp=NOW - 20)
+        tsdb.gauge('queue_depth', 7, tags={'queue': 'b'}, timestamp=NOW - 10)
+        tsdb.gauge('queue_depth', 5, tags={'queue': 'b'}, timestamp=NOW - 1)
+        return tsdb
+
+    def test_ratio(self, loaded):
+        value = loaded.query(
+            'http_requests_total{status!~"5.."} / http_requests_total'
+        )
+        assert value == pytest.approx(0.75)
+
+    def test_max_of_latest_gauges(self, loaded):
+        assert loaded.query('max(queue_depth)') == 5.0
+
+    def test_label_matchers(self, loaded):
+        assert loaded.query('http_requests_total{status="503"}') == 20.0
+        assert loaded.query('http_requests_total{status=~"2.*"}') == 60.0
+        assert loaded.query('http_requests_total{status!="200"}') == 20.0
+
+    def test_histogram_quantile(self, tsdb):
+        for value in range(1, 101):
+            tsdb.histogram('latency', value, timestamp=NOW - 1)
+        assert 85 <= tsdb.query('histogram_quantile(0.9, latency)') <= 95
+
+    def test_non_string_tags_match_before_reopen(self, tsdb):
+        for i in range(10):
+            tsdb.increment('req', tags={'status': 200 if i < 7 else 503, 'success': i < 7},
+                           timestamp=NOW - i)
+        assert tsdb.query('req{status=~"2.."} / req') == pytest.approx(0.7)
+        assert tsdb.query('req{success="True"}') == 7.0
+        assert len(tsdb.range_query('req', tags={'success': True})) == 1
+        assert tsdb.get_success_rate('req') == pytest.approx(70.0)
+
+    def test_histogram_needs_quantile(self, tsdb):
+        tsdb.histogram('latency', 12.5, timestamp=NOW - 1)
+        with pytest.raises(ValueError, match='histogram_quantile'):
+            tsdb.query('max(latency)')
+        with pytest.raises(ValueError, match='histogram_quantile'):
+            tsdb.query('latency')
+
+    def test_unsupported_expression(self, tsdb):
+        with pytest.raises(ValueError):
+            tsdb.query('rate(x[5m])')
+
+
+class TestPersistence:
+    def test_replay_restores_points_and_rollups(self, tmp_path, clock):
+        tags = {'path': '/a,b', 'filter': 'x=1'}
+        db = LocalTSDB(str(tmp_path), clock=lambda: clock['now'])
+        for i in range(300):
+            db.increment('requests', tags={**tags, 'success': str(i % 3 != 0)},
+                         timestamp=NOW - 299 + i)
+        before = db.range_query('requests')
+        rate = db.get_success_rate('requests', '5m')
+        db.close()
+
+        reopened = LocalTSDB(str(tmp_path), clock=lambda: clock['now'])
+        try:
+            assert reopened.range_query('requests') == before
+            assert reopened.get_success_rate('requests', '5m') == pytest.approx(rate)
+            assert reopened.range_query('requests', tags={**tags, 'success': 'True'})
+        finally:
+            reopened.close()
+
+    def test_range_query_bounds(self, tsdb):
+        for i in range(200):
+            tsdb.gauge('temperature', i, timestamp=NOW + i)
+        points = tsdb.range_query('temperature', start=NOW + 50, end=NOW + 59)['temperature']
+        assert [value for _, value in points] == [float(v) for v in range(50, 60)]
+
+    def test_torn_tail_is_dropped(self, tmp_path, clock):
+        db = LocalTSDB(str(tmp_path), clock=lambda: clock['now'])
+        for i in range(LocalTSDB.CHUNK_POINTS * 2):
+            db.gauge('g', i, timestamp=NOW + i)
+        db.close()
+        with open(db.path, 'r+b') as f:
+            f.seek(0, 2)
+            f.truncate(f.tell() - 5)
+
+        reopened = LocalTSDB(str(tmp_path), clock=lambda: clock['now'])
+        try:
+            assert len(reopened.range_query('g')['g']) == LocalTSDB.CHUNK_POINTS
+        finally:
+            reopened.close()
+
+
+class TestConcurrency:
+    def test_reads_during_writes(self, tsdb):
+        errors = []
+        stop = threading.Event()
+
+        def write():
+            i = 0
+            while not stop.is_set() and i < 20000:
+                # New series and new rollup buckets on every write
+                tsdb.increment('requests', tags={'success': 'True', 'n': str(i % 500)},
+                               timestamp=NOW - 3000 + i)
+                tsdb.histogram('latency', i % 1000, tags={'n': str(i % 500)},
+                               timestamp=NOW - 3000 + i)
+                i += 1
+
+        def read():
+            try:
+                for _ in range(50):
+                    tsdb.get_success_rate('requests', '1h')
+                    tsdb.get_percentile('latency', 95, '1h')
+                    tsdb.query('histogram_quantile(0.99, latency)', window='1h')
+            except Exception as exc:  # pragma: no cover - reported below
+                errors.append(exc)
+
+        writer = threading.Thread(target=write)
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        writer.start()
+        for reader in readers:
+            reader.start()
+        for reader in readers:
+            reader.join()
+        stop.set()
+        writer.join()
+        assert errors == []
@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+
+from patterns.detection.middleware import (
+    CriticalPathASGIMiddleware, CriticalPathWSGIMiddleware, RouteTrie
+)
+
+PATHS = {
+    'payment_processing': {'endpoint': '/api/v1/payments'},
+    'refunds': {'endpoint': '/api/v1/payments/{id}/refund'},
+    'user_signup': {'endpoint': '/api/v1/signup'},
+    'order_status': {'endpoint': '/api/v1/orders/:order_id'},
+}
+
+
+class RecordingMonitor:
+    def __init__(self):
+        self.requests = []
+
+    def track_request(self, path_name, duration_ms, success):
+        self.requests.append((path_name, success))
+
+
+@pytest.fixture
+def monitor():
+    return RecordingMonitor()
+
+
+class TestRouteTrie:
+    @pytest.fixture
+    def trie(self):
+        return RouteTrie(PATHS)
+
+    @pytest.mark.parametrize('path, expected', [
+        ('/api/v1/payments', 'payment_processing'),
+        ('/api/v1/payments/', 'payment_processing'),
+        ('/api/v1/payments/42', 'payment_processing'),
+        ('/api/v1/payments/42/refund', 'refunds'),
+        ('/api/v1/payments/42/refund/7', 'refunds'),
+        ('/api/v1//payments', 'payment_processing'),
+        ('/api/v1/signup', 'user_signup'),
+        ('/api/v1/orders/17', 'order_status'),
+        ('/api/v1/orders', None),
+        ('/api/v1/paymentsx', None),
+        ('/api/v1', None),
+        ('/health', None),
+        ('', None),
+    ])
+    def test_match(self, trie, path, expected):
+        assert trie.match(path) == expected
+
+    def test_shared_prefix(self, trie):
+        assert trie.prefix == '/api/v1/'
+
+    def test_prefix_stops_before_parameters(self):
+        trie = RouteTrie({
+            'a': {'endpoint': '/tenants/{tenant}/a'},
+            'b': {'endpoint': '/tenants/{tenant}/b'},
+        })
+        assert trie.prefix == '/tenants/'
+        assert trie.match('/tenants/acme/b') == 'b'
+
+    def test_empty_config_matches_nothing(self):
+        assert RouteTrie({}).match('/api/v1/payments') is None
+
+    def test_defaults_to_configured_critical_paths(self):
+        assert RouteTrie().match('/api/v1/payments/42') == 'payment_processing'
+
+
+class TestWSGIMiddleware:
+    def make(self, monitor, status='200 OK', body=(b'ok',), error=None):
+        def app(environ, start_response):
+            if error is not None:
+                raise error
+            start_response(status, [])
+            return list(body)
+
+        return CriticalPathWSGIMiddleware(app, monitor, PATHS)
+
+    def call(self, middleware, path):
+        response = middleware({'PATH_INFO': path}, lambda status, headers, exc_info=None: None)
+        chunks = list(response)
+        getattr(response, 'close', lambda: None)()
+        return chunks
+
+    def test_tracks_after_body_closes(self, monitor):
+        middleware = self.make(monitor)
+        response = middleware({'PATH_INFO': '/api/v1/signup'}, lambda *args: None)
+        assert monitor.requests == []
+        assert list(response) == [b'ok']
+        response.close()
+        assert monitor.requests == [('user_signup', True)]
+
+    def test_server_error_is_a_failure(self, monitor):
+        self.call(self.make(monitor, status='503 Service Unavailable'), '/api/v1/payments')
+        assert monitor.requests == [('payment_processing', False)]
+
+    def test_client_error_is_a_success(self, monitor):
+        self.call(self.make(monitor, status='404 Not Found'), '/api/v1/payments')
+        assert monitor.requests == [('payment_processing', True)]
+
+    def test_exception_is_a_failure(self, monitor):
+        with pytest.raises(RuntimeError):
+            self.call(self.make(monitor, error=RuntimeError()), '/api/v1/payments')
+        assert monitor.requests == [('payment_processing', False)]
+
+    def test_untracked_paths_pass_straight_through(self, monitor):
+        assert self.call(self.make(monitor), '/health') == [b'ok']
+        assert monitor.requests == []
+
+
+class TestASGIMiddleware:
+    def run(self, middleware, scope):
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request'}
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(middleware(scope, receive, send))
+        return sent
+
+    def make(self, monitor, status=200, error=None):
+        async def app(scope, receive, send):
+            if error is not None:
+                raise error
+            await send({'type': 'http.response.start', 'status': status})
+            await send({'type': 'http.response.body', 'body': b'ok'})
+
+        return CriticalPathASGIMiddleware(app, monitor, PATHS)
+
+    def test_tracks_http_requests(self, monitor):
+        sent = self.run(self.make(monitor), {'type': 'http', 'path': '/api/v1/orders/9'})
+        assert [message['type'] for message in sent] == [
+            'http.response.start', 'http.response.body'
+        ]
+        assert monitor.requests == [('order_status', True)]
+
+    def test_server_error_is_a_failure(self, monitor):
+        self.run(self.make(monitor, status=502), {'type': 'http', 'path': '/api/v1/signup'})
+        assert monitor.requests == [('user_signup', False)]
+
+    def test_exception_is_a_failure(self, monitor):
+        with pytest.raises(ValueError):
+            self.run(self.make(monitor, error=ValueError()),
+                     {'type': 'http', 'path': '/api/v1/signup'})
+        assert monitor.requests == [('user_signup', False)]
+
+    def test_ignores_other_scopes(self, monitor):
+        self.run(self.make(monitor), {'type': 'lifespan'})
+        self.run(self.make(monitor), {'type': 'http', 'path': '/metrics'})
+        assert monitor.requests == []
@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+from patterns.parallel import iter_tasks, run_tasks, worker_state
+
+
+def _scaled(task):
+    return task * worker_state()['factor']
+
+
+def _pid(task):
+    return os.getpid()
+
+
+class TestRunTasks:
+    @pytest.mark.parametrize('workers', [1, 2, None])
+    def test_results_in_task_order(self, workers):
+        assert run_tasks(_scaled, range(20), workers, state={'factor': 3}) == [
+            task * 3 for task in range(20)
+        ]
+
+    def test_single_task_runs_in_process(self):
+        assert run_tasks(_pid, [0], workers=4) == [os.getpid()]
+
+    def test_serial_state_is_released(self):
+        assert run_tasks(_scaled, [1], workers=1, state={'factor': 2}) == [2]
+        assert worker_state() == {}
+
+    def test_pool_uses_other_processes(self):
+        assert os.getpid() not in run_tasks(_pid, range(4), workers=2)
+
+    def test_no_tasks(self):
+        assert run_tasks(_scaled, [], workers=2) == []
+
+
+class TestIterTasks:
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_yields_every_result(self, workers):
+        results = iter_tasks(_scaled, range(25), workers, state={'factor': 3})
+        assert sorted(results) == [task * 3 for task in range(25)]
+        assert worker_state() == {}
+
+    def test_serial_state_lives_while_iterating(self):
+        results = iter_tasks(_scaled, [1, 2], workers=1, state={'factor': 5})
+        assert next(results) == 5
+        assert worker_state() == {'factor': 5}
+        results.close()
+        assert worker_state() == {}
+
+    def test_no_tasks(self):
+        assert list(iter_tasks(_scaled, [], workers=2)) == []
@@ -0,0 +1,145 @@
+import threading
+import time
+
+import pytest
+
+from patterns.prevention.progressive_rollout import ProgressiveRollout
+from patterns.prevention.rollout_orchestrator import (
+    CANCELLED, DEPLOYED, ROLLED_BACK, RolloutOrchestrator, topological_levels
+)
+
+
+class ScriptedRollout(ProgressiveRollout):
+    """
+    Stages pass unless listed in `failures` (unhealthy) or `raises` as
+    (service, stage); records how many services sit in each stage at once
+    """
+    def __init__(self, failures=(), raises=(), stage_seconds=0.0, rollback_raises=()):
+        self.failures = set(failures)
+        self.rollback_raises = set(rollback_raises)
+        self.raises = set(raises)
+        self.stage_seconds = stage_seconds
+        self.lock = threading.Lock()
+        self.active = {}
+        self.peak = {}
+        self.order = []
+        self.rolled_back = []
+
+    def deploy_stage(self, service_name, new_version, stage):
+        name = stage['name']
+        with self.lock:
+            self.order.append((service_name, name))
+            self.active[name] = self.active.get(name, 0) + 1
+            self.peak[name] = max(self.peak.get(name, 0), self.active[name])
+        time.sleep(self.stage_seconds)
+        with self.lock:
+            self.active[name] -= 1
+        if (service_name, name) in self.raises:
+            raise RuntimeError('stage blew up')
+        return (service_name, name) not in self.failures
+
+    def rollback(self, service_name, new_version):
+        self.rolled_back.append(service_name)
+        if service_name in self.rollback_raises:
+            raise RuntimeError('rollback blew up')
+
+
+class TestTopologicalLevels:
+    def test_levels(self):
+        levels = topological_levels({
+            'web': {'api'}, 'api': {'db', 'cache'}, 'db': set(), 'cache': set(),
+            'worker': {'db', 'external'},
+        })
+        assert levels == [['cache', 'db'], ['api', 'worker'], ['web']]
+
+    def test_cycle_is_rejected(self):
+        with pytest.raises(ValueError, match='a, b'):
+            topological_levels({'a': {'b'}, 'b': {'a'}, 'c': set()})
+
+    def test_self_dependency_is_ignored(self):
+        assert topological_levels({'a': {'a'}}) == [['a']]
+
+
+class TestRolloutOrchestrator:
+    def test_dependencies_deploy_first(self):
+        rollout = ScriptedRollout()
+        result = RolloutOrchestrator(rollout).deploy_all(
+            {'db': 'v2', 'api': 'v2', 'web': 'v2'}, {'api': ['db'], 'web': ['api']}
+        )
+        assert {s: r['status'] for s, r in result['services'].items()} == dict.fromkeys(
+            ('db', 'api', 'web'), DEPLOYED
+        )
+        finished = {service: i for i, (service, stage) in enumerate(rollout.order)
+                    if stage == 'full'}
+        started = {}
+        for i, (service, _) in enumerate(rollout.order):
+            started.setdefault(service, i)
+        assert finished['db'] < started['api'] and finished['api'] < started['web']
+
+    def test_independent_services_run_concurrently(self):
+        rollout = ScriptedRollout(stage_seconds=0.05)
+        versions = {f's{i}': 'v2' for i in range(8)}
+        result = RolloutOrchestrator(rollout).deploy_all(versions)
+        # Four stages each: serial would take 8 * 4 * 0.05s
+        assert result['wall_clock_seconds'] < 8 * 4 * 0.05 / 2
+        assert rollout.peak['full'] > 1
+
+    def test_stage_limits_cap_concurrency(self):
+        rollout = ScriptedRollout(stage_seconds=0.02)
+        versions = {f's{i}': 'v2' for i in range(12)}
+        RolloutOrchestrator(rollout, stage_limits={'canary': 2, 'small': 3}).deploy_all(versions)
+        assert rollout.peak['canary'] <= 2
+        assert rollout.peak['small'] <= 3
+
+    def test_rollback_cancels_dependents_transitively(self):
+        rollout = ScriptedRollout(failures={('api', 'canary')})
+        result = RolloutOrchestrator(rollout).deploy_all(
+            {'db': 'v2', 'api': 'v2', 'web': 'v2', 'admin': 'v2', 'jobs': 'v2'},
+            {'api': ['db'], 'web': ['api'], 'admin': ['web'], 'jobs': ['db']}
+        )['services']
+        assert result['api']['status'] == ROLLED_BACK
+        assert result['api']['stage'] == 'canary'
+        assert result['web'] == {'status': CANCELLED, 'stage': None, 'blocked_by': 'api',
+                                 'duration_seconds': 0.0, 'error': None}
+        assert result['admin']['status'] == CANCELLED
+        assert result['jobs']['status'] == DEPLOYED
+        assert rollout.rolled_back == ['api']
+
+    def test_stage_exception_rolls_back(self):
+        rollout = ScriptedRollout(raises={('db', 'small')})
+        result = RolloutOrchestrator(rollout).deploy_all({'db': 'v2'})['services']
+        assert result['db']['status'] == ROLLED_BACK
+        assert result['db']['stage'] == 'small'
+
+    def test_failed_rollback_still_cancels_dependents(self):
+        rollout = ScriptedRollout(failures={('api', 'canary')}, rollback_raises={'api'},
+                                  stage_seconds=0.01)
+        result = RolloutOrchestrator(rollout).deploy_all(
+            {'db': 'v2', 'api': 'v2', 'web': 'v2', 'jobs': 'v2'},
+            {'api': ['db'], 'web': ['api'], 'jobs': ['db']}
+        )['services']
+        assert result['api']['status'] == ROLLED_BACK
+        assert 'rollback blew up' in result['api']['error']
+        assert result['web']['status'] == CANCELLED
+        assert result['jobs']['status'] == DEPLOYED
+        assert result['db']['error'] is None
+
+    def test_slots_are_released_after_rollback(self):
+        rollout = ScriptedRollout(failures={('a', 'medium')})
+        orchestrator = RolloutOrchestrator(rollout, stage_limits={'medium': 1})
+        orchestrator.deploy_all({'a': 'v2'})
+        result = orchestrator.deploy_all({'b': 'v2'})['services']
+        assert result['b']['status'] == DEPLOYED
+
+    def test_dependencies_outside_release_are_ignored(self):
+        result = RolloutOrchestrator(ScriptedRollout()).deploy_all(
+            {'api': 'v2'}, {'api': ['postgres']}
+        )
+        assert result['services']['api']['status'] == DEPLOYED
+
+    def test_cycle_rejected_before_deploying(self):
+        rollout = ScriptedRollout()
+        with pytest.raises(ValueError):
+            RolloutOrchestrator(rollout).deploy_all({'a': 'v2', 'b': 'v2'},
+                                                    {'a': ['b'], 'b': ['a']})
+        assert rollout.order == []
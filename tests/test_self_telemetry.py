@@ -0,0 +1,198 @@
+import os
+import subprocess
+import sys
+import time
+from collections import namedtuple
+
+import pytest
+
+from patterns.detection.business_metrics import BusinessMetricsMonitor
+from patterns.detection.self_telemetry import (
+    ALERT, BACKEND, EVALUATE, AlertHooks, InstrumentedBackend, MonitorTelemetry, timed
+)
+from patterns.detection import sli_monitor
+from patterns.detection.sli_monitor import SLIMonitor
+
+
+class Backend:
+    def __init__(self):
+        self.calls = 0
+        self.name = 'fake'
+
+    def query(self, expression):
+        self.calls += 1
+        return 1.0
+
+
+class Monitor(AlertHooks):
+    telemetry_component = 'test'
+
+    def __init__(self, backend, telemetry):
+        self.backend = backend
+        self.telemetry = telemetry
+        telemetry.instrument(self, 'backend', alert_methods=('on_alert', 'on_page'))
+
+    def on_alert(self, message):
+        return message
+
+    @timed('check')
+    def check(self):
+        self.backend.query('up')
+        if hasattr(self, 'on_page'):
+            self.on_page('down')
+        return self.on_alert('checked')
+
+
+@pytest.fixture
+def telemetry():
+    return MonitorTelemetry()
+
+
+class TestSpans:
+    def test_records_evaluate_backend_and_alert(self, telemetry):
+        monitor = Monitor(Backend(), telemetry)
+        assert monitor.check() == 'checked'
+        assert telemetry.spans[('test', EVALUATE, 'check')][0] == 1
+        assert telemetry.spans[('test', BACKEND, 'query')][0] == 1
+        assert telemetry.spans[('test', ALERT, 'on_alert')][0] == 1
+
+    def test_overhead_splits_self_time(self, telemetry):
+        monitor = Monitor(Backend(), telemetry)
+        for _ in range(10):
+            monitor.check()
+        totals = telemetry.overhead()['test']
+        assert totals['calls'] == 10
+        assert totals['self'] >= 0.0
+        assert totals[EVALUATE] >= totals[BACKEND] + totals[ALERT] - 1e-6
+
+    def test_nested_evaluation_is_recorded_once(self, telemetry):
+        class Outer(Monitor):
+            @timed('outer')
+            def outer(self):
+                return self.check()
+
+        monitor = Outer(Backend(), telemetry)
+        monitor.outer()
+        assert telemetry.spans[('test', EVALUATE, 'outer')][0] == 1
+        assert ('test', EVALUATE, 'check') not in telemetry.spans
+        monitor.check()
+        assert telemetry.spans[('test', EVALUATE, 'check')][0] == 1
+        assert telemetry.overhead()['test']['calls'] == 2
+
+    def test_sli_tick_includes_alert_time(self, telemetry, monkeypatch):
+        monkeypatch.setattr(sli_monitor, 'SLIViolation', namedtuple(
+            'SLIViolation', 'sli_name description current_value target'
+        ), raising=False)
+
+        class Prometheus:
+            def query(self, expression):
+                return 0.0
+
+        monitor = SLIMonitor(Prometheus(), telemetry)
+        alerts = []
+        monitor.alert_sli_violation = lambda violation: (alerts.append(violation),
+                                                         time.sleep(0.005))
+        monitor.check_all()
+        totals = telemetry.overhead()['sli']
+        assert [a.sli_name for a in alerts] == ['api_availability']
+        assert totals['calls'] == 1
+        assert totals[ALERT] >= 5
+        assert totals[EVALUATE] >= totals[BACKEND] + totals[ALERT]
+
+    def test_export_pushes_deltas_only(self, telemetry):
+        class Recorder:
+            def __init__(self):
+                self.values = []
+
+            def increment(self, name, value=1, tags=None):
+                self.values.append((tags['category'], value))
+
+        monitor = Monitor(Backend(), telemetry)
+        monitor.check()
+        recorder = Recorder()
+        telemetry.export(recorder)
+        assert {category for category, _ in recorder.values} <= {BACKEND, ALERT, 'self'}
+        recorder.values.clear()
+        telemetry.export(recorder)
+        assert recorder.values == []
+
+    def test_reset_keeps_wrapped_counters_live(self, telemetry):
+        monitor = Monitor(Backend(), telemetry)
+        monitor.check()
+        telemetry.reset()
+        monitor.check()
+        assert telemetry.spans[('test', BACKEND, 'query')][0] == 1
+
+
+class TestAlertHooks:
+    def test_hook_assigned_after_instrument_is_timed(self, telemetry):
+        monitor = Monitor(Backend(), telemetry)
+        pages = []
+        monitor.on_page = pages.append
+        monitor.check()
+        assert pages == ['down']
+        assert telemetry.spans[('test', ALERT, 'on_page')][0] == 1
+
+    def test_reassigned_hook_is_not_double_wrapped(self, telemetry):
+        monitor = Monitor(Backend(), telemetry)
+        monitor.on_alert = lambda message: message
+        monitor.on_alert = lambda message: message
+        monitor.check()
+        assert telemetry.spans[('test', ALERT, 'on_alert')][0] == 1
+
+    def test_other_attributes_untouched(self, telemetry):
+        monitor = Monitor(Backend(), telemetry)
+        handler = print
+        monitor.handler = handler
+        assert monitor.handler is handler
+
+    def test_shipped_monitors_wrap_late_hooks(self, telemetry):
+        class Prometheus:
+            def query(self, expression):
+                return 0.0
+
+        monitor = SLIMonitor(Prometheus(), telemetry)
+        seen = []
+        monitor.alert_sli_violation = seen.append
+        monitor.alert_sli_violation('violation')
+        assert seen == ['violation']
+        assert telemetry.spans[('sli', ALERT, 'alert_sli_violation')][0] == 1
+
+        business = BusinessMetricsMonitor(object(), telemetry)
+        business.alert_business_anomaly = lambda **kwargs: None
+        business.alert_business_anomaly(metric_name='orders')
+        assert telemetry.spans[('business_metrics', ALERT, 'alert_business_anomaly')][0] == 1
+
+
+class TestInstrumentedBackend:
+    def test_passes_through_attributes_and_caches_methods(self, telemetry):
+        backend = Backend()
+        proxy = InstrumentedBackend(backend, telemetry, 'test')
+        assert proxy.name == 'fake'
+        assert proxy.query is proxy.query
+        proxy.query('up')
+        assert backend.calls == 1
+
+
+class TestProfiling:
+    def test_profile_report(self, telemetry):
+        telemetry.profile_call('test', sum, range(100))
+        assert 'function calls' in telemetry.profile_report('test')
+        assert telemetry.profile_report('missing') == ''
+
+    def test_sampled_evaluations_are_profiled(self, telemetry):
+        monitor = Monitor(Backend(), telemetry)
+        telemetry.enable_profiling(sample_rate=1.0)
+        monitor.check()
+        telemetry.disable_profiling()
+        assert 'test' in telemetry.profiles
+
+    def test_profiling_modules_load_lazily(self):
+        # Only meaningful in a fresh interpreter; pytest itself may import them
+        code = (
+            'import sys, patterns.detection.self_telemetry; '
+            'print(any(m in sys.modules for m in ("cProfile", "pstats")))'
+        )
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                             check=True, cwd=os.path.dirname(os.path.dirname(__file__)))
+        assert out.stdout.strip() == 'False'
@@ -0,0 +1,142 @@
+import gc
+import os
+
+import pytest
+
+from patterns.detection import shared_metrics
+from patterns.detection.histogram import bucket_index
+from patterns.detection.self_telemetry import MonitorTelemetry
+from patterns.detection.shared_metrics import (
+    FAILURES, FIRST_BUCKET, SUCCESSES, HostMetricsCollector, SharedMemoryCriticalPathMonitor,
+    SharedSegment
+)
+
+PATHS = ('payment_processing', 'user_signup')
+
+
+class RecordingBackend:
+    def __init__(self):
+        self.increments = []
+        self.gauges = {}
+
+    def increment(self, name, tags=None, value=1):
+        self.increments.append((name, tags, value))
+
+    def gauge(self, name, value, tags=None):
+        self.gauges[name] = value
+
+    def histogram(self, name, value, tags=None):
+        pass
+
+
+@pytest.fixture
+def segment(tmp_path):
+    return SharedSegment(str(tmp_path / 'segment'), slots=4, path_names=PATHS)
+
+
+def make_collector(segment, **kwargs):
+    collector = HostMetricsCollector(segment, RecordingBackend(), host='web-1',
+                                     telemetry=MonitorTelemetry(), **kwargs)
+    collector.alerts = []
+    collector.alert = lambda **alert: collector.alerts.append(alert)
+    return collector
+
+
+class TestSharedSegment:
+    def test_rejects_mismatched_layout(self, segment):
+        with pytest.raises(ValueError):
+            SharedSegment(segment.path, slots=8, path_names=PATHS)
+
+    def test_claim_slot_is_stable_per_pid(self, segment):
+        assert segment.claim_slot(os.getpid()) == segment.claim_slot(os.getpid())
+
+    def test_dead_worker_slots_are_reused(self, segment):
+        dead = 2 ** 22 + 12345  # above the default pid_max
+        slot = segment.claim_slot(dead)
+        assert segment.claim_slot(os.getpid()) == slot
+
+    def test_full_segment_raises(self, segment):
+        for slot in range(segment.slots):
+            segment.words[segment.owner_offset + slot] = os.getpid()
+        with pytest.raises(RuntimeError):
+            segment.claim_slot(1)
+
+    def test_totals_sum_rows(self, segment):
+        for pid, slot in ((os.getpid(), 0), (os.getppid(), 1)):
+            assert segment.claim_slot(pid) == slot
+            segment.words[segment.row_offset(slot, 'user_signup') + SUCCESSES] += 3
+        assert segment.totals()['user_signup'][SUCCESSES] == 6
+        assert segment.totals()['payment_processing'][SUCCESSES] == 0
+
+
+class TestWorkerMonitor:
+    def test_track_request_counts_into_own_row(self, segment):
+        monitor = SharedMemoryCriticalPathMonitor(segment, telemetry=MonitorTelemetry())
+        monitor.track_request('user_signup', 120, True)
+        monitor.track_request('user_signup', 120, False)
+        row = segment.totals()['user_signup']
+        assert row[SUCCESSES] == 1 and row[FAILURES] == 1
+        assert row[FIRST_BUCKET + bucket_index(120)] == 2
+
+    def test_forked_child_claims_its_own_row(self, segment):
+        monitor = SharedMemoryCriticalPathMonitor(segment, telemetry=MonitorTelemetry())
+        monitor.track_request('user_signup', 10, True)
+        parent_offsets = dict(monitor._offsets)
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                monitor.track_request('user_signup', 10, True)
+                os._exit(0 if monitor._offsets != parent_offsets else 1)
+            finally:
+                os._exit(2)
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
+        assert segment.totals()['user_signup'][SUCCESSES] == 2
+
+    def test_monitors_do_not_leak_through_fork_hook(self, segment):
+        before = len(shared_metrics._MONITORS)
+        for _ in range(10):
+            SharedMemoryCriticalPathMonitor(segment, telemetry=MonitorTelemetry())
+        gc.collect()
+        assert len(shared_metrics._MONITORS) == before
+
+
+class TestHostMetricsCollector:
+    def test_rejects_non_positive_window(self, segment):
+        with pytest.raises(ValueError):
+            make_collector(segment, window_seconds=0)
+
+    def test_flush_exports_deltas(self, segment):
+        collector = make_collector(segment)
+        worker = SharedMemoryCriticalPathMonitor(segment, telemetry=MonitorTelemetry())
+        for _ in range(5):
+            worker.track_request('user_signup', 100, True)
+        collector.flush(now=1000)
+        collector.flush(now=1010)
+
+        requests = [entry for entry in collector.metrics.increments
+                    if entry[0] == 'critical_path.user_signup.requests']
+        assert requests == [
+            ('critical_path.user_signup.requests', {'host': 'web-1', 'success': 'True'}, 5)
+        ]
+        assert 'critical_path.user_signup.latency_p95_ms' in collector.metrics.gauges
+
+    def test_restart_does_not_reexport_history(self, segment):
+        worker = SharedMemoryCriticalPathMonitor(segment, telemetry=MonitorTelemetry())
+        worker.track_request('user_signup', 100, True)
+        collector = make_collector(segment)
+        collector.flush(now=1000)
+        assert collector.metrics.increments == []
+
+    def test_failures_expire_from_window(self, segment):
+        collector = make_collector(segment, window_seconds=60)
+        worker = SharedMemoryCriticalPathMonitor(segment, telemetry=MonitorTelemetry())
+        worker.track_request('user_signup', 100, False)
+        collector.flush(now=1000)
+        assert collector.alerts
+
+        collector.alerts.clear()
+        worker.track_request('user_signup', 100, True)
+        collector.flush(now=1061)
+        assert collector.alerts == []
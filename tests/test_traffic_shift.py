@@ -0,0 +1,157 @@
+import pytest
+
+from patterns.mitigtion import traffic_shaper
+from patterns.mitigtion.traffic_shift import (
+    HASH_SLOTS, SHIFT_STEPS, SlotTable, TrafficShiftController, _apportion,
+    destination_weights, slot_for
+)
+
+
+def region(capacity=1000, current=200, p95=100, target=200):
+    return {'capacity_rps': capacity, 'current_rps': current, 'latency_p95_ms': p95,
+            'latency_target_ms': target}
+
+
+class LoadBalancer:
+    def __init__(self):
+        self.configs = []
+
+    def update_config(self, config):
+        self.configs.append(config)
+
+
+class Health:
+    """
+    region_health callable whose answers can change between reads
+    """
+    def __init__(self, regions):
+        self.regions = regions
+        self.reads = 0
+        self.on_read = None
+
+    def __call__(self, service_name, name):
+        self.reads += 1
+        if self.on_read is not None:
+            self.on_read(self)
+        return self.regions[name]
+
+
+def controller(health, lb=None):
+    return TrafficShiftController(lb or LoadBalancer(), health, sleep=lambda seconds: None)
+
+
+class TestSlotTable:
+    def test_rebalance_matches_weights(self):
+        table = SlotTable('us-east')
+        table.rebalance({'us-east': 50, 'us-west': 30, 'eu-west': 20})
+        counts = table.counts()
+        assert sum(counts.values()) == HASH_SLOTS
+        assert counts == _apportion({'us-east': 50, 'us-west': 30, 'eu-west': 20}, HASH_SLOTS)
+
+    def test_rebalance_moves_only_what_it_must(self):
+        table = SlotTable('a')
+        table.rebalance({'a': 90, 'b': 10})
+        before = list(table.assignment)
+        moved = table.rebalance({'a': 75, 'b': 25})
+        changed = sum(1 for old, new in zip(before, table.assignment) if old != new)
+        assert moved == changed
+        assert all(old == 'b' for old, new in zip(before, table.assignment) if old == 'b')
+
+    def test_clients_are_sticky(self):
+        table = SlotTable('a')
+        table.rebalance({'a': 50, 'b': 50})
+        assert table.region_for('session-1') == table.region_for('session-1')
+        assert slot_for('session-1') == slot_for('session-1')
+
+    def test_apportion_sums_to_slots(self):
+        counts = _apportion({'a': 1, 'b': 1, 'c': 1}, 100)
+        assert sum(counts.values()) == 100
+        assert sorted(counts.values()) == [33, 33, 34]
+
+
+class TestDestinationWeights:
+    def test_weights_follow_headroom(self):
+        weights, usable = destination_weights(
+            {'b': region(capacity=1000, current=200), 'c': region(capacity=500, current=200)},
+            ['b', 'c']
+        )
+        assert usable == pytest.approx(600 + 200)
+        assert weights == pytest.approx({'b': 0.75, 'c': 0.25})
+
+    def test_slow_destination_is_discounted(self):
+        weights, _ = destination_weights(
+            {'b': region(p95=400, target=200), 'c': region()}, ['b', 'c']
+        )
+        assert weights['b'] == pytest.approx(weights['c'] / 2)
+
+    def test_no_headroom(self):
+        assert destination_weights({'b': region(current=900)}, ['b']) == ({}, 0.0)
+
+
+class TestTrafficShiftController:
+    def test_full_shift(self):
+        health = Health({'a': region(current=400), 'b': region(), 'c': region()})
+        lb = LoadBalancer()
+        result = controller(health, lb).shift('api', 'a', ['b', 'c'])
+        assert result['completed']
+        assert result['weights']['a'] == 0
+        assert result['weights'] == pytest.approx({'a': 0, 'b': 50, 'c': 50})
+        assert [step['fraction'] for step in result['steps']] == list(SHIFT_STEPS)
+        assert len(lb.configs) == len(SHIFT_STEPS)
+        assert lb.configs[-1]['traffic_routing']['hash_slots'].count('a') == 0
+
+    def test_stops_without_headroom(self):
+        regions = {'a': region(current=1000), 'b': region(current=500)}
+        health = Health(regions)
+        lb = LoadBalancer()
+
+        def follow_load(h):
+            # b's load grows with the share it has been given
+            if lb.configs:
+                moved = lb.configs[-1]['traffic_routing']['weights'].get('b', 0)
+                regions['b'] = region(current=500 + 1000 * moved / 100)
+
+        health.on_read = follow_load
+        result = controller(health, lb).shift('api', 'a', 'b')
+        assert not result['completed']
+        assert result['reason'] == 'insufficient_headroom'
+        # 300rps of headroom covers the 10% and 25% steps only
+        assert [step['fraction'] for step in result['steps']] == [0.1, 0.25]
+
+    def test_rising_latency_undoes_last_step(self):
+        regions = {'a': region(current=400), 'b': region(p95=100)}
+        health = Health(regions)
+        lb = LoadBalancer()
+        shift = controller(health, lb)
+
+        def degrade(h):
+            if len(lb.configs) == 2:
+                regions['b'] = region(p95=180)
+
+        health.on_read = degrade
+        result = shift.shift('api', 'a', 'b')
+        assert result['reason'] == 'destination_latency'
+        assert result['degraded'] == ['b']
+        assert result['weights'] == pytest.approx({'a': 90, 'b': 10})
+        assert lb.configs[-1]['traffic_routing']['weights'] == {'a': 90.0, 'b': 10.0}
+
+    def test_crossing_target_counts_only_if_within_before(self):
+        regions = {'a': region(current=100), 'b': region(p95=250, target=200)}
+        result = controller(Health(regions)).shift('api', 'a', 'b')
+        assert result['completed']
+
+
+class TestTrafficShaper:
+    def test_redirect_with_region_health_shifts_gradually(self, monkeypatch):
+        class Instant(TrafficShiftController):
+            def __init__(self, load_balancer, region_health):
+                super().__init__(load_balancer, region_health, sleep=lambda seconds: None)
+
+        monkeypatch.setattr(traffic_shaper, 'TrafficShiftController', Instant)
+        lb = LoadBalancer()
+        health = Health({'a': region(current=100), 'b': region()})
+        result = traffic_shaper.TrafficShaper(lb).redirect_traffic(
+            'api', 'a', 'b', region_health=health
+        )
+        assert result['completed']
+        assert len(lb.configs) == len(SHIFT_STEPS)
@@ -0,0 +1,281 @@
+# Replay alert rules over historical metrics to tune thresholds before they page anyone
+import argparse
+import json
+import sys
+import warnings
+
+from patterns.config.loader import LazyConfig, lazy_import
+from patterns.parallel import run_tasks, worker_state
+
+np = lazy_import('numpy', extra='analysis')
+
+CRITICAL_PATHS = LazyConfig('critical_paths')
+SLI_DEFINITIONS = LazyConfig('sli_definitions')
+
+# AlertQualityTracker.identify_noisy_alerts flags anything below this
+ACTIONABILITY_CUTOFF = 0.7
+
+
+class Rule:
+    """
+    A threshold alert over one evaluated series
+
+    `series` holds what the monitor compared at each evaluation step (for
+    example the 5-minute success rate sampled every minute); `for_steps` is
+    how many consecutive breaching steps it takes to fire.
+    """
+    def __init__(self, name, series, direction, threshold, for_steps=1):
+        if direction not in ('below', 'above'):
+            raise ValueError(f"direction must be 'below' or 'above', got {direction!r}")
+        self.name = name
+        self.series = series
+        self.direction = direction
+        self.threshold = threshold
+        self.for_steps = for_steps
+
+    def candidates(self, count=41):
+        """
+        Threshold grid around the configured value
+
+        Success-rate style thresholds sweep the error budget (100 - threshold)
+        from a quarter to four times its size; the rest sweep the threshold
+        itself from half to double.
+        """
+        factors = np.geomspace(0.25, 4.0, count) if self.direction == 'below' \
+            else np.geomspace(0.5, 2.0, count)
+        if self.direction == 'below' and self.threshold <= 100:
+            return np.clip(100.0 - (100.0 - self.threshold) * factors, 0.0, 100.0)
+        return self.threshold * factors
+
+
+def rules_from_config(for_steps=1):
+    """
+    One rule per threshold in CRITICAL_PATHS and SLI_DEFINITIONS
+    """
+    rules = []
+    for path_name, config in CRITICAL_PATHS.items():
+        rules.append(Rule(
+            f'{path_name}.success_rate',
+            f'critical_path.{path_name}.success_rate',
+            'below', config['success_rate_threshold'], for_steps
+        ))
+        rules.append(Rule(
+            f'{path_name}.latency_p95',
+            f'critical_path.{path_name}.latency_p95_ms',
+            'above', config['latency_p95_threshold'], for_steps
+        ))
+
+    for sli_name, sli in SLI_DEFINITIONS.items():
+        # Same direction rule SLIMonitor.check_sli applies
+        direction = 'below' if sli_name.endswith('_availability') else 'above'
+        rules.append(Rule(sli_name, sli_name, direction, sli['target'], for_steps))
+
+    return rules
+
+
+def load_history_npz(path):
+    """
+    History saved with np.savez(path, timestamps=..., **{series_name: values})
+    """
+    with np.load(path) as data:
+        timestamps = data['timestamps'].astype(np.float64)
+        series = {
+            name: data[name].astype(np.float64)
+            for name in data.files if name != 'timestamps'
+        }
+    return timestamps, series
+
+
+def load_history_from_tsdb(tsdb, names, start, end, step=60):
+    """
+    Resample LocalTSDB series onto a regular grid, carrying the last value forward
+    """
+    timestamps = np.arange(start, end, step, dtype=np.float64)
+    series = {}
+    for name in names:
+        points = [point for values in tsdb.range_query(name, start, end).values()
+                  for point in values]
+        if not points:
+            continue
+        points.sort()
+        raw = np.asarray(points, dtype=np.float64)
+        index = np.searchsorted(raw[:, 0], timestamps, side='right') - 1
+        values = raw[np.clip(index, 0, None), 1]
+        values[index < 0] = np.nan
+        series[name] = values
+    return timestamps, series
+
+
+def sweep_rule(values, timestamps, incidents, direction, thresholds, for_steps=1):
+    """
+    Evaluate every candidate threshold against a series in one pass
+
+    Returns a dict of arrays, one entry per threshold.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+
+    # (thresholds x steps) breach matrix; missing data never breaches
+    with np.errstate(invalid='ignore'):
+        if direction == 'below':
+            breach = values[None, :] < thresholds[:, None]
+        else:
+            breach = values[None, :] > thresholds[:, None]
+
+    # Firing means `for_steps` consecutive breaches, via a running sum
+    if for_steps > 1:
+        running = np.cumsum(breach, axis=1, dtype=np.int32)
+        shifted = np.zeros_like(running)
+        shifted[:, for_steps:] = running[:, :-for_steps]
+        firing = (running - shifted) >= for_steps
+    else:
+        firing = breach
+
+    # An alert is raised on each rising edge of `firing`
+    raised = firing.copy()
+    raised[:, 1:] &= ~firing[:, :-1]
+
+    in_incident = np.zeros(len(timestamps), dtype=bool)
+    delays = np.full((len(thresholds), len(incidents)), np.nan)
+    for i, (start, end) in enumerate(incidents):
+        # Steps with start <= t <= end
+        lo = np.searchsorted(timestamps, start, side='left')
+        hi = np.searchsorted(timestamps, end, side='right')
+        in_incident[lo:hi] = True
+        window = firing[:, lo:hi]
+        if window.shape[1] == 0:
+            continue
+        detected = window.any(axis=1)
+        first = window.argmax(axis=1)
+        delays[detected, i] = timestamps[lo + first[detected]] - start
+
+    fired = raised.sum(axis=1)
+    false_positives = (raised & ~in_incident[None, :]).sum(axis=1)
+    detected = ~np.isnan(delays)
+
+    noise = false_positives / np.maximum(fired, 1)
+    if len(incidents):
+        with warnings.catch_warnings():
+            # Thresholds that detect nothing have an all-NaN row
+            warnings.simplefilter('ignore', RuntimeWarning)
+            median_delay = np.nanmedian(delays, axis=1)
+    else:
+        median_delay = np.full(len(thresholds), np.nan)
+
+    return {
+        'threshold': thresholds,
+        'fired': fired,
+        'false_positives': false_positives,
+        'noise_ratio': noise,
+        'incidents_detected': detected.sum(axis=1),
+        'incidents_missed': len(incidents) - detected.sum(axis=1),
+        'median_detection_delay_s': median_delay,
+    }
+
+
+def sweep_actionability_cutoff(actionable_rates, cutoffs=None):
+    """
+    How many alerts AlertQualityTracker would flag as noisy at each cutoff
+    """
+    names = list(actionable_rates)
+    rates = np.asarray([actionable_rates[name] for name in names], dtype=np.float64)
+    cutoffs = np.linspace(0.3, 0.95, 14) if cutoffs is None else np.asarray(cutoffs)
+    flagged = rates[None, :] < cutoffs[:, None]
+    return [
+        {
+            'cutoff': float(cutoff),
+            'current': bool(np.isclose(cutoff, ACTIONABILITY_CUTOFF)),
+            'flagged': int(row.sum()),
+            'alerts': [name for name, hit in zip(names, row) if hit],
+        }
+        for cutoff, row in zip(cutoffs, flagged)
+    ]
+
+
+def _sweep_task(task):
+    name, series_name, direction, thresholds, for_steps, configured = task
+    history = worker_state()
+    result = sweep_rule(
+        history['series'][series_name], history['timestamps'], history['incidents'],
+        direction, thresholds, for_steps
+    )
+    rows = [
+        {key: _plain(values[i]) for key, values in result.items()}
+        for i in range(len(thresholds))
+    ]
+    return {'rule': name, 'configured_threshold': configured, 'candidates': rows}
+
+
+def backtest(timestamps, series, incidents=(), rules=None, workers=None, candidates=41):
+    """
+    Sweep candidate thresholds for every rule whose series is in the history,
+    spreading rules across a process pool
+    """
+    rules = rules_from_config() if rules is None else rules
+    tasks = [
+        (rule.name, rule.series, rule.direction, rule.candidates(candidates),
+         rule.for_steps, rule.threshold)
+        for rule in rules if rule.series in series
+    ]
+    incidents = sorted(tuple(incident) for incident in incidents)
+
+    return run_tasks(_sweep_task, tasks, workers, state={
+        'timestamps': timestamps, 'series': series, 'incidents': incidents,
+    })
+
+
+def recommend(rule_result, max_noise_ratio=0.3):
+    """
+    Candidate that detects the most incidents, fastest, within the noise budget
+    """
+    eligible = [c for c in rule_result['candidates'] if c['noise_ratio'] <= max_noise_ratio]
+    if not eligible:
+        return None
+
+    def score(candidate):
+        delay = candidate['median_detection_delay_s']
+        return (-candidate['incidents_detected'], delay if delay is not None else float('inf'),
+                candidate['fired'])
+
+    return min(eligible, key=score)
+
+
+def _plain(value):
+    value = value.item() if hasattr(value, 'item') else value
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Replay CRITICAL_PATHS and SLI thresholds over historical metrics'
+    )
+    parser.add_argument('history', help='.npz with a timestamps array plus one array per series')
+    parser.add_argument('--incidents', help='JSON list of [start, end] unix timestamps')
+    parser.add_argument('--for-steps', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-noise', type=float, default=0.3)
+    args = parser.parse_args(argv)
+
+    timestamps, series = load_history_npz(args.history)
+    incidents = []
+    if args.incidents:
+        with open(args.incidents) as f:
+            incidents = json.load(f)
+
+    results = backtest(
+        timestamps, series, incidents,
+        rules=rules_from_config(args.for_steps), workers=args.workers
+    )
+    for result in results:
+        result['recommended'] = recommend(result, args.max_noise)
+
+    json.dump(results, sys.stdout, indent=2)
+    print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
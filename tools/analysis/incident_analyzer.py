@@ -0,0 +1,315 @@
+# reliability-analyze: mine incident history for MTTD/MTTR, recurring causes and follow-through
+import argparse
+import gzip
+import json
+import os
+import sys
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime
+from types import SimpleNamespace
+
+from patterns.detection.histogram import percentile_from_buckets
+from patterns.parallel import iter_tasks
+from patterns.resolution.priority_framework import calculate_action_item_priority
+
+# Byte range each worker reads from an uncompressed file
+SHARD_BYTES = 64 * 1024 * 1024
+
+# Duration buckets from 6 seconds to ~6 months, each 10% wider than the last
+DURATION_BUCKETS_MIN = tuple(round(0.1 * 1.1 ** i, 3) for i in range(160))
+
+# Event names in incident event logs, mapped to the milestone they mark
+MILESTONES = {
+    'started': 'started_at',
+    'detected': 'detected_at',
+    'acknowledged': 'detected_at',
+    'mitigated': 'mitigated_at',
+    'resolved': 'resolved_at',
+}
+
+# Timestamp fields an incident record may carry directly
+MILESTONE_FIELDS = tuple(dict.fromkeys(MILESTONES.values()))
+
+DONE_STATUSES = {'done', 'completed', 'closed', 'resolved'}
+
+
+class DurationHistogram:
+    """
+    Mergeable log-linear histogram of durations in minutes
+    """
+    def __init__(self):
+        self.counts = [0] * (len(DURATION_BUCKETS_MIN) + 1)
+        self.total = 0.0
+
+    def add(self, minutes):
+        self.counts[bisect_left(DURATION_BUCKETS_MIN, minutes)] += 1
+        self.total += minutes
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+
+    def summary(self):
+        count = sum(self.counts)
+        if not count:
+            return {'count': 0}
+        return {
+            'count': count,
+            'mean': round(self.total / count, 1),
+            **{
+                f'p{p}': round(percentile_from_buckets(self.counts, p, DURATION_BUCKETS_MIN), 1)
+                for p in (50, 90, 99)
+            },
+        }
+
+
+class Aggregate:
+    """
+    Partial results for one shard; merged pairwise into the final report
+
+    Milestone timestamps are kept per incident id, earliest wins, because
+    an incident's record and its events may land in different shards or
+    files; durations are only computed once everything is merged. That
+    table grows with the number of incidents, never with log volume.
+    Records without an id go straight into the histograms.
+    """
+    def __init__(self):
+        self.incidents = 0
+        self.events = 0
+        self.malformed = 0
+        self.severities = Counter()
+        self.root_causes = Counter()
+        self.mttd = DurationHistogram()
+        self.mttr = DurationHistogram()
+        # priority -> [total, completed]
+        self.action_items = {}
+        # incident_id -> {milestone: earliest timestamp}
+        self.milestones = {}
+
+    def add_record(self, record):
+        if 'event' in record and 'incident_id' in record:
+            self._add_event(record)
+        else:
+            self._add_incident(record)
+
+    def _add_event(self, record):
+        self.events += 1
+        milestone = MILESTONES.get(record['event'])
+        if milestone is None:
+            return
+        timestamp = parse_timestamp(record['timestamp'])
+        seen = self.milestones.setdefault(record['incident_id'], {})
+        if milestone not in seen or timestamp < seen[milestone]:
+            seen[milestone] = timestamp
+
+    def _add_incident(self, record):
+        self.incidents += 1
+        self.severities[record.get('severity', 'unknown')] += 1
+
+        cause = record.get('root_cause')
+        if isinstance(cause, dict):  # IncidentReview.conduct_review() shape
+            cause = cause.get('root_cause')
+        if cause:
+            self.root_causes[' '.join(str(cause).lower().split())] += 1
+
+        for item in record.get('action_items', ()):
+            self._add_action_item(item)
+
+        times = {
+            milestone: parse_timestamp(record[milestone])
+            for milestone in MILESTONE_FIELDS if record.get(milestone) is not None
+        }
+        if record.get('id') is None:
+            self._add_durations(times)
+            return
+        # The event log may hold the rest of this incident's milestones
+        seen = self.milestones.setdefault(record['id'], {})
+        for milestone, timestamp in times.items():
+            if milestone not in seen or timestamp < seen[milestone]:
+                seen[milestone] = timestamp
+
+    def _add_action_item(self, item):
+        priority = item.get('priority')
+        if priority is None:
+            try:
+                priority = calculate_action_item_priority(
+                    SimpleNamespace(**item)
+                )['priority_level']
+            except (KeyError, AttributeError):
+                priority = 'unknown'
+        done = (item.get('completed') is True
+                or str(item.get('status', '')).lower() in DONE_STATUSES)
+        counts = self.action_items.setdefault(priority, [0, 0])
+        counts[0] += 1
+        counts[1] += done
+
+    def _add_durations(self, times):
+        started = times.get('started_at')
+        if started is None:
+            return
+        if 'detected_at' in times:
+            self.mttd.add(max(times['detected_at'] - started, 0) / 60)
+        ended = times.get('resolved_at', times.get('mitigated_at'))
+        if ended is not None:
+            self.mttr.add(max(ended - started, 0) / 60)
+
+    def merge(self, other):
+        self.incidents += other.incidents
+        self.events += other.events
+        self.malformed += other.malformed
+        self.severities.update(other.severities)
+        self.root_causes.update(other.root_causes)
+        self.mttd.merge(other.mttd)
+        self.mttr.merge(other.mttr)
+        for priority, (total, done) in other.action_items.items():
+            counts = self.action_items.setdefault(priority, [0, 0])
+            counts[0] += total
+            counts[1] += done
+        for incident_id, times in other.milestones.items():
+            seen = self.milestones.setdefault(incident_id, {})
+            for milestone, timestamp in times.items():
+                if milestone not in seen or timestamp < seen[milestone]:
+                    seen[milestone] = timestamp
+        return self
+
+    def report(self, top=10):
+        for times in self.milestones.values():
+            self._add_durations(times)
+        self.milestones = {}
+
+        return {
+            'incidents': self.incidents,
+            'events': self.events,
+            'malformed_lines': self.malformed,
+            'by_severity': dict(self.severities.most_common()),
+            'mttd_minutes': self.mttd.summary(),
+            'mttr_minutes': self.mttr.summary(),
+            'top_root_causes': [
+                {'root_cause': cause, 'incidents': count}
+                for cause, count in self.root_causes.most_common(top)
+            ],
+            'action_items': {
+                priority: {
+                    'total': total,
+                    'completed': done,
+                    'completion_rate': round(100.0 * done / total, 1) if total else None,
+                }
+                for priority, (total, done) in sorted(self.action_items.items())
+            },
+        }
+
+
+def parse_timestamp(value):
+    """
+    Unix seconds from a number or an ISO 8601 string
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
+def plan_shards(paths, shard_bytes=SHARD_BYTES):
+    """
+    (path, start, end) byte ranges; compressed files are read whole
+    """
+    shards = []
+    for path in paths:
+        if path.endswith('.gz'):
+            shards.append((path, 0, None))
+            continue
+        size = os.path.getsize(path)
+        for start in range(0, max(size, 1), shard_bytes):
+            shards.append((path, start, min(start + shard_bytes, size)))
+    return shards
+
+
+def analyze_shard(shard):
+    """
+    Aggregate every line that starts inside [start, end)
+    """
+    path, start, end = shard
+    aggregate = Aggregate()
+
+    if end is None:
+        with gzip.open(path, 'rb') as f:
+            for line in f:
+                _consume(aggregate, line)
+        return aggregate
+
+    with open(path, 'rb') as f:
+        if start:
+            # The line straddling the boundary belongs to the previous shard
+            f.seek(start - 1)
+            f.readline()
+        position = f.tell()
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            _consume(aggregate, line)
+    return aggregate
+
+
+def _consume(aggregate, line):
+    line = line.strip()
+    if not line:
+        return
+    try:
+        aggregate.add_record(json.loads(line))
+    except (ValueError, KeyError, TypeError, AttributeError):
+        aggregate.malformed += 1
+
+
+def find_inputs(paths):
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                found.extend(
+                    os.path.join(root, name) for name in sorted(files)
+                    if name.endswith(('.jsonl', '.jsonl.gz'))
+                )
+        else:
+            found.append(path)
+    return found
+
+
+def analyze(paths, workers=None, shard_bytes=SHARD_BYTES, top=10):
+    """
+    Stream every input across a process pool and merge the partial aggregates
+    """
+    shards = plan_shards(find_inputs(paths), shard_bytes)
+    total = Aggregate()
+    # Merged as each shard finishes, so only a few partials exist at once
+    for partial in iter_tasks(analyze_shard, shards, workers):
+        total.merge(partial)
+    return total.report(top)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Summarize incident records and event logs (JSONL, optionally gzipped)'
+    )
+    parser.add_argument('paths', nargs='+', help='files or directories of .jsonl / .jsonl.gz')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--shard-mb', type=int, default=SHARD_BYTES // (1024 * 1024))
+    parser.add_argument('--top', type=int, default=10, help='root causes to report')
+    parser.add_argument('--output', help='write the report here instead of stdout')
+    args = parser.parse_args(argv)
+
+    report = analyze(args.paths, workers=args.workers,
+                     shard_bytes=args.shard_mb * 1024 * 1024, top=args.top)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+# reliability-chaos: run the gate's chaos scenarios through a local fault-injection proxy
+import argparse
+import json
+import sys
+
+
+def parse_address(value):
+    host, _, port = value.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+async def _with_upstream(args, run):
+    """
+    Resolve the upstream, starting a stand-in dependency if asked to
+    """
+    from tools.chaos.proxy import StandInDependency
+
+    stand_in = None
+    if args.stand_in:
+        stand_in = await StandInDependency().start()
+        upstream = stand_in.address
+    else:
+        upstream = args.upstream
+    try:
+        return await run(upstream)
+    finally:
+        if stand_in is not None:
+            await stand_in.stop()
+
+
+def run_command(args):
+    # asyncio alone is half the startup budget; only the handlers need it
+    import asyncio
+
+    from tools.chaos.scenarios import CHAOS_CRITERIA, SCENARIOS, run_scenarios
+
+    unknown = set(args.scenario or ()) - SCENARIOS.keys()
+    if unknown:
+        print(f"Unknown scenarios: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    criteria = dict(CHAOS_CRITERIA)
+    if args.max_error_rate is not None:
+        criteria['max_error_rate'] = args.max_error_rate
+    if args.max_p95_ms is not None:
+        criteria['max_latency_p95_ms'] = args.max_p95_ms
+
+    results = asyncio.run(_with_upstream(args, lambda upstream: run_scenarios(
+        upstream, args.listen, probe_url=args.probe_url, names=args.scenario,
+        requests=args.requests, concurrency=args.concurrency, timeout=args.timeout,
+        criteria=criteria, seed=args.seed, protocol=args.protocol,
+    )))
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    return 0 if len(results['chaos_scenarios']) == len(results['results']) else 1
+
+
+def proxy_command(args):
+    import asyncio
+
+    from tools.chaos.proxy import FaultInjectionProxy, FaultProfile
+    from tools.chaos.scenarios import SCENARIOS
+
+    profile = dict(SCENARIOS[args.scenario]) if args.scenario else {}
+    profile['protocol'] = args.protocol
+    if args.faults:
+        profile.update(json.loads(args.faults))
+
+    async def serve(upstream):
+        proxy = await FaultInjectionProxy(
+            upstream, FaultProfile(**profile), listen=args.listen, seed=args.seed
+        ).start()
+        host, port = proxy.address
+        print(f"Proxying {host}:{port} → {upstream[0]}:{upstream[1]} with {profile}",
+              file=sys.stderr)
+        try:
+            await asyncio.sleep(args.duration) if args.duration else await asyncio.Event().wait()
+        finally:
+            await proxy.stop()
+            print(json.dumps(proxy.stats), file=sys.stderr)
+
+    try:
+        asyncio.run(_with_upstream(args, serve))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Inject dependency faults locally and check the service survives them'
+    )
+    subcommands = parser.add_subparsers(dest='command', required=True)
+
+    def add_upstream(sub):
+        target = sub.add_mutually_exclusive_group(required=True)
+        target.add_argument('--upstream', type=parse_address,
+                            help='host:port of the dependency to put the proxy in front of')
+        target.add_argument('--stand-in', action='store_true',
+                            help='proxy a built-in HTTP server that always answers 200')
+        sub.add_argument('--listen', type=parse_address, default=('127.0.0.1', 0),
+                         help='host:port the service under test connects to')
+        sub.add_argument('--protocol', choices=('http', 'tcp'), default='http',
+                         help="the dependency's protocol; with tcp, errors become resets")
+        sub.add_argument('--seed', type=int, default=None)
+
+    run = subcommands.add_parser('run', help='run gate scenarios and emit chaos_scenarios JSON')
+    add_upstream(run)
+    run.add_argument('--probe-url', help='endpoint of the service under test to load')
+    run.add_argument('--scenario', action='append',
+                     help='scenario to run (repeatable; default: all)')
+    run.add_argument('--requests', type=int, default=200)
+    run.add_argument('--concurrency', type=int, default=50)
+    run.add_argument('--timeout', type=float, default=2.0, help='per-request client timeout (s)')
+    run.add_argument('--max-error-rate', type=float, default=None)
+    run.add_argument('--max-p95-ms', type=float, default=None)
+    run.add_argument('--output', help='write results here instead of stdout')
+    run.set_defaults(handler=run_command)
+
+    proxy = subcommands.add_parser('proxy', help='run the fault-injection proxy until stopped')
+    add_upstream(proxy)
+    proxy.add_argument('--scenario', help='start from a named scenario profile')
+    proxy.add_argument('--faults', help='JSON FaultProfile fields, e.g. \'{"error_rate": 0.1}\'')
+    proxy.add_argument('--duration', type=float, default=None, help='seconds to run')
+    proxy.set_defaults(handler=proxy_command)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,379 @@
+# asyncio fault-injection proxy: sits between a service and one of its dependencies
+import asyncio
+import math
+import random
+import socket
+import struct
+import time
+
+# Requests whose headers never end are answered once this much has arrived
+MAX_REQUEST_HEAD = 64 * 1024
+
+# An 'error' connection that never sends a complete request head is reset after this long
+ERROR_HEAD_SECONDS = 5.0
+
+PROTOCOLS = ('http', 'tcp')
+
+# Stand-in for whichever HTTP error the dependency would return
+ERROR_RESPONSE = (
+    b'HTTP/1.1 %d Injected Fault\r\n'
+    b'Content-Type: text/plain\r\n'
+    b'Content-Length: 15\r\n'
+    b'Connection: close\r\n'
+    b'\r\n'
+    b'injected fault\n'
+)
+
+
+class LatencyDistribution:
+    """
+    Added delay per connection, sampled from a named distribution
+
+        {'distribution': 'fixed', 'ms': 200}
+        {'distribution': 'uniform', 'min_ms': 50, 'max_ms': 500}
+        {'distribution': 'exponential', 'mean_ms': 300}
+        {'distribution': 'lognormal', 'median_ms': 400, 'sigma': 0.6}
+    """
+    def __init__(self, distribution='fixed', **params):
+        samplers = {
+            'fixed': lambda rng: params['ms'],
+            'uniform': lambda rng: rng.uniform(params['min_ms'], params['max_ms']),
+            'exponential': lambda rng: rng.expovariate(1.0 / params['mean_ms']),
+            'lognormal': lambda rng: rng.lognormvariate(
+                math.log(params['median_ms']), params.get('sigma', 0.5)
+            ),
+        }
+        if distribution not in samplers:
+            raise ValueError(f"Unknown latency distribution: {distribution!r}")
+        self.distribution = distribution
+        self.params = params
+        self._sample_ms = samplers[distribution]
+
+    def sample_seconds(self, rng):
+        return max(self._sample_ms(rng), 0.0) / 1000.0
+
+
+class FaultProfile:
+    """
+    What the proxy does to each connection
+
+    Each connection draws one outcome: reset (RST before any data), hang
+    (accept, then never answer), error (answer the request with
+    `error_status` without contacting the dependency) or pass through,
+    delayed by `latency` and throttled to `bandwidth_bps` per direction.
+    Errors are HTTP responses; with protocol='tcp' (databases, caches and
+    other non-HTTP dependencies) an error is a connection reset instead.
+    """
+    def __init__(self, latency=None, error_rate=0.0, reset_rate=0.0, hang_rate=0.0,
+                 hang_seconds=30.0, bandwidth_bps=None, error_status=503, protocol='http'):
+        if error_rate + reset_rate + hang_rate > 1.0:
+            raise ValueError("error_rate + reset_rate + hang_rate must not exceed 1")
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"protocol must be one of {PROTOCOLS}, got {protocol!r}")
+        if isinstance(latency, dict):
+            latency = LatencyDistribution(**latency)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.reset_rate = reset_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.bandwidth_bps = bandwidth_bps
+        self.error_status = error_status
+        self.protocol = protocol
+
+    def outcome(self, rng):
+        roll = rng.random()
+        if roll < self.reset_rate:
+            return 'reset'
+        roll -= self.reset_rate
+        if roll < self.hang_rate:
+            return 'hang'
+        roll -= self.hang_rate
+        if roll < self.error_rate:
+            return 'error'
+        return 'forward'
+
+
+class Throttle:
+    """
+    Byte-rate limit for one direction of a connection
+    """
+    def __init__(self, bytes_per_second):
+        self.rate = float(bytes_per_second)
+        self.available_at = time.monotonic()
+
+    def delay_after(self, size):
+        """
+        Seconds the sender should pause after passing on `size` bytes
+        """
+        now = time.monotonic()
+        self.available_at = max(self.available_at, now) + size / self.rate
+        return self.available_at - now
+
+
+class FaultInjectionProxy:
+    """
+    TCP proxy applying a FaultProfile to every accepted connection
+
+    Built on asyncio protocols rather than streams: relaying is a direct
+    transport.write from data_received, with no task per connection, which
+    keeps per-connection overhead low enough for tens of thousands of
+    connections per second. Faults are decided per connection, which for
+    HTTP/1.1 keep-alive means per client connection rather than per
+    request. `profile` may be swapped while the proxy runs to move between
+    scenarios.
+    """
+    def __init__(self, upstream, profile=None, listen=('127.0.0.1', 0), seed=None):
+        self.upstream = upstream
+        self.profile = profile or FaultProfile()
+        self.listen = listen
+        self.rng = random.Random(seed)
+        self.stats = dict.fromkeys(
+            ('connections', 'forwarded', 'reset', 'hang', 'error', 'upstream_failed',
+             'bytes_up', 'bytes_down'), 0
+        )
+        self.loop = None
+        self._server = None
+        self._open = set()
+
+    @property
+    def address(self):
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self._server = await self.loop.create_server(
+            lambda: _ClientSide(self), *self.listen, backlog=4096, reuse_address=True
+        )
+        return self
+
+    async def stop(self):
+        self._server.close()
+        for connection in list(self._open):
+            connection.abort()
+        await self._server.wait_closed()
+
+
+class _ClientSide(asyncio.Protocol):
+    """
+    One accepted connection: applies its fault, then relays to the upstream
+    """
+    def __init__(self, proxy):
+        self.proxy = proxy
+        self.transport = None
+        self.upstream = None
+        self.outcome = None
+        self.timer = None
+        self.pending = []
+        self.pending_eof = False
+        self.head = b''
+        self.throttle_up = self.throttle_down = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        proxy = self.proxy
+        profile = proxy.profile
+        self.profile = profile
+        self.outcome = outcome = profile.outcome(proxy.rng)
+        proxy.stats['connections'] += 1
+        proxy.stats[outcome if outcome != 'forward' else 'forwarded'] += 1
+        proxy._open.add(self)
+
+        if outcome == 'reset':
+            _reset(transport)
+        elif outcome == 'hang':
+            self.timer = proxy.loop.call_later(profile.hang_seconds, transport.close)
+        elif outcome == 'error':
+            if profile.protocol == 'tcp':
+                # No protocol-level error to send, so fail the connection
+                _reset(transport)
+            else:
+                self.timer = proxy.loop.call_later(ERROR_HEAD_SECONDS, _reset, transport)
+        elif outcome == 'forward':
+            if profile.bandwidth_bps:
+                self.throttle_up = Throttle(profile.bandwidth_bps)
+                self.throttle_down = Throttle(profile.bandwidth_bps)
+            delay = profile.latency.sample_seconds(proxy.rng) if profile.latency else 0.0
+            if delay > 0:
+                self.timer = proxy.loop.call_later(delay, self._connect)
+            else:
+                self._connect()
+
+    def _connect(self):
+        self.timer = None
+        proxy = self.proxy
+        connecting = proxy.loop.create_task(
+            proxy.loop.create_connection(lambda: _UpstreamSide(self), *proxy.upstream)
+        )
+        connecting.add_done_callback(self._connected)
+
+    def _connected(self, connecting):
+        if connecting.cancelled() or connecting.exception() is not None:
+            self.proxy.stats['upstream_failed'] += 1
+            if not self.transport.is_closing():
+                _reset(self.transport)
+            return
+        upstream, _ = connecting.result()
+        if self.transport.is_closing():
+            upstream.close()
+            return
+        self.upstream = upstream
+        if self.pending:
+            self.relay(b''.join(self.pending), self.transport, upstream, 'bytes_up',
+                       self.throttle_up)
+            self.pending = []
+        if self.pending_eof and upstream.can_write_eof():
+            upstream.write_eof()
+
+    def data_received(self, data):
+        if self.outcome == 'forward':
+            if self.upstream is None:
+                self.pending.append(data)
+            else:
+                self.relay(data, self.transport, self.upstream, 'bytes_up', self.throttle_up)
+        elif self.outcome == 'error':
+            self.head += data
+            if b'\r\n\r\n' in self.head or len(self.head) > MAX_REQUEST_HEAD:
+                self.timer.cancel()
+                self.transport.write(ERROR_RESPONSE % self.profile.error_status)
+                self.transport.close()
+
+    def relay(self, data, source, destination, counter, throttle):
+        if destination.is_closing():
+            return
+        self.proxy.stats[counter] += len(data)
+        destination.write(data)
+        if throttle is not None:
+            delay = throttle.delay_after(len(data))
+            if delay > 0.001:
+                source.pause_reading()
+                self.proxy.loop.call_later(delay, _resume, source)
+
+    def eof_received(self):
+        if self.outcome != 'forward':
+            return False
+        if self.upstream is None:
+            self.pending_eof = True
+        elif self.upstream.can_write_eof():
+            self.upstream.write_eof()
+        # Keep our side open for the response
+        return True
+
+    # Backpressure: stop reading the upstream while the client is slow
+    def pause_writing(self):
+        if self.upstream is not None:
+            self.upstream.pause_reading()
+
+    def resume_writing(self):
+        if self.upstream is not None and not self.upstream.is_closing():
+            self.upstream.resume_reading()
+
+    def connection_lost(self, exc):
+        if self.timer is not None:
+            self.timer.cancel()
+        if self.upstream is not None:
+            self.upstream.close()
+        self.proxy._open.discard(self)
+
+    def abort(self):
+        if self.upstream is not None:
+            self.upstream.abort()
+        self.transport.abort()
+
+
+class _UpstreamSide(asyncio.Protocol):
+    def __init__(self, client):
+        self.client = client
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        client = self.client
+        client.relay(data, self.transport, client.transport, 'bytes_down', client.throttle_down)
+
+    def eof_received(self):
+        client = self.client.transport
+        if not client.is_closing() and client.can_write_eof():
+            client.write_eof()
+        return False
+
+    def pause_writing(self):
+        self.client.transport.pause_reading()
+
+    def resume_writing(self):
+        if not self.client.transport.is_closing():
+            self.client.transport.resume_reading()
+
+    def connection_lost(self, exc):
+        self.client.transport.close()
+
+
+def _resume(transport):
+    if not transport.is_closing():
+        transport.resume_reading()
+
+
+def _reset(transport):
+    """
+    Close with SO_LINGER 0 so the peer sees a connection reset, not a clean close
+    """
+    sock = transport.get_extra_info('socket')
+    if sock is not None:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+    transport.abort()
+
+
+class StandInDependency:
+    """
+    Minimal keep-alive HTTP server answering 200 to everything
+
+    Used as the upstream when the real dependency is not available locally.
+    """
+    RESPONSE = (
+        b'HTTP/1.1 200 OK\r\n'
+        b'Content-Type: text/plain\r\n'
+        b'Content-Length: 3\r\n'
+        b'\r\n'
+        b'ok\n'
+    )
+
+    def __init__(self, listen=('127.0.0.1', 0)):
+        self.listen = listen
+        self._server = None
+
+    @property
+    def address(self):
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def start(self):
+        self._server = await asyncio.get_running_loop().create_server(
+            lambda: _StandInSide(self.RESPONSE), *self.listen, backlog=4096, reuse_address=True
+        )
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+
+class _StandInSide(asyncio.Protocol):
+    def __init__(self, response):
+        self.response = response
+        self.buffer = b''
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        self.buffer += data
+        while True:
+            end = self.buffer.find(b'\r\n\r\n')
+            if end == -1:
+                return
+            head, self.buffer = self.buffer[:end], self.buffer[end + 4:]
+            self.transport.write(self.response)
+            if b'connection: close' in head.lower():
+                self.transport.close()
+                return
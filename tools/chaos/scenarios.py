@@ -0,0 +1,126 @@
+# The chaos scenarios PreDeploymentGate requires, and how to run them
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from tools.chaos.proxy import FaultInjectionProxy, FaultProfile
+
+# Named after PreDeploymentGate.requirements['chaos_tests']['scenarios']
+SCENARIOS = {
+    # Every connection to the dependency is reset
+    'database_unavailable': {'reset_rate': 1.0},
+    # The dependency accepts connections and never answers
+    'dependency_timeout': {'hang_rate': 1.0, 'hang_seconds': 30.0},
+    # Slow but working: lognormal delay around 800ms with a long tail
+    'high_latency': {'latency': {'distribution': 'lognormal', 'median_ms': 800, 'sigma': 0.5}},
+    # Half the dependency's instances run a broken build
+    'partial_deployment': {'error_rate': 0.5},
+}
+
+# What the service under test must sustain while a scenario runs
+CHAOS_CRITERIA = {
+    'max_error_rate': 5.0,  # percent
+    'max_latency_p95_ms': 2000,
+}
+
+
+async def http_probe(url, requests=200, concurrency=50, timeout=2.0):
+    """
+    Fire GET requests at `url`, one connection each
+
+    Returns a list of (success, latency_ms); timeouts, resets and 5xx
+    responses count as failures.
+    """
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    request = (
+        f'GET {parts.path or "/"} HTTP/1.1\r\n'
+        f'Host: {parts.netloc}\r\n'
+        f'Connection: close\r\n\r\n'
+    ).encode()
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with gate:
+            start = time.monotonic()
+            try:
+                status = await asyncio.wait_for(_get_status(host, port, request), timeout)
+                success = status < 500
+            except (asyncio.TimeoutError, OSError, ValueError, asyncio.IncompleteReadError):
+                success = False
+            return success, (time.monotonic() - start) * 1000
+
+    return await asyncio.gather(*(one() for _ in range(requests)))
+
+
+async def _get_status(host, port, request):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(request)
+        await writer.drain()
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed before a response")
+        status = int(status_line.split()[1])
+        await reader.read()  # Drain the body so the timing covers the whole response
+        return status
+    finally:
+        writer.close()
+
+
+def summarize(outcomes, criteria=CHAOS_CRITERIA):
+    latencies = sorted(latency for _, latency in outcomes)
+    errors = sum(1 for success, _ in outcomes if not success)
+    total = len(outcomes)
+    error_rate = 100.0 * errors / total if total else 0.0
+
+    def percentile(p):
+        if not latencies:
+            return 0.0
+        return round(latencies[min(int(len(latencies) * p / 100), len(latencies) - 1)], 1)
+
+    p95 = percentile(95)
+    return {
+        'requests': total,
+        'errors': errors,
+        'error_rate': round(error_rate, 2),
+        'latency_p50_ms': percentile(50),
+        'latency_p95_ms': p95,
+        'passed': error_rate <= criteria['max_error_rate']
+        and p95 <= criteria['max_latency_p95_ms'],
+    }
+
+
+async def run_scenarios(upstream, listen, probe_url=None, names=None, requests=200,
+                        concurrency=50, timeout=2.0, criteria=CHAOS_CRITERIA, seed=None,
+                        protocol='http'):
+    """
+    Run each scenario in turn behind one proxy and report in the gate's format
+
+    The service under test should be pointed at `listen` in place of its
+    dependency and serve `probe_url`. Without a probe URL the proxy itself is
+    probed, which shows what the fault looks like to a client that has no
+    fallback. `protocol` is the dependency's (see FaultProfile). Returns
+    {'chaos_scenarios': [passed names], 'results': {...}}.
+    """
+    proxy = await FaultInjectionProxy(upstream, listen=listen, seed=seed).start()
+    if probe_url is None:
+        host, port = proxy.address
+        probe_url = f'http://{host}:{port}/'
+
+    results = {}
+    try:
+        for name in names or SCENARIOS:
+            proxy.profile = FaultProfile(protocol=protocol, **SCENARIOS[name])
+            before = dict(proxy.stats)
+            outcomes = await http_probe(probe_url, requests, concurrency, timeout)
+            result = summarize(outcomes, criteria)
+            result['proxy'] = {key: proxy.stats[key] - before[key] for key in before}
+            results[name] = result
+    finally:
+        await proxy.stop()
+
+    return {
+        'chaos_scenarios': [name for name, result in results.items() if result['passed']],
+        'results': results,
+    }
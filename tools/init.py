@@ -0,0 +1,90 @@
+# reliability-init: warm the config snapshots and check CLI startup time
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from patterns.config.loader import CACHE_DIR, compile_all
+
+# Cron-driven runs should spend their time working, not importing
+STARTUP_BUDGET_MS = 100
+
+CONSOLE_SCRIPTS = {
+    'reliability-init': 'tools.init',
+    'reliability-analyze': 'tools.analysis.incident_analyzer',
+    'reliability-chaos': 'tools.chaos.cli',
+}
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import_ms(module, runs=5):
+    """
+    Median wall-clock cost of importing a module in a fresh interpreter,
+    net of bare interpreter startup
+    """
+    def median_run(code):
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, '-c', code],
+                cwd=REPO_ROOT,
+                check=True,
+                stdout=subprocess.DEVNULL,
+            )
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        return samples[len(samples) // 2]
+
+    return median_run(f'import {module}') - median_run('pass')
+
+
+def check_startup(budget_ms=STARTUP_BUDGET_MS, runs=5):
+    """
+    Measure every console script's import cost against the startup budget
+    """
+    results = {}
+    for script, module in CONSOLE_SCRIPTS.items():
+        module_file = os.path.join(REPO_ROOT, *module.split('.')) + '.py'
+        if not os.path.exists(module_file):
+            continue
+
+        import_ms = measure_import_ms(module, runs=runs)
+        results[script] = {
+            'import_ms': round(import_ms, 1),
+            'within_budget': import_ms < budget_ms,
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='reliability-init',
+        description='Compile config snapshots and verify CLI startup time'
+    )
+    parser.add_argument(
+        '--check-startup', action='store_true',
+        help='fail if any reliability-* command imports slower than the budget'
+    )
+    parser.add_argument('--budget-ms', type=float, default=STARTUP_BUDGET_MS)
+    args = parser.parse_args(argv)
+
+    compiled = compile_all()
+    print(f"Compiled {len(compiled)} config snapshots into {CACHE_DIR}: {', '.join(compiled)}")
+
+    if not args.check_startup:
+        return 0
+
+    over_budget = False
+    for script, result in check_startup(args.budget_ms).items():
+        status = 'ok' if result['within_budget'] else 'OVER BUDGET'
+        print(f"{script}: {result['import_ms']}ms (budget {args.budget_ms:g}ms) {status}")
+        over_budget = over_budget or not result['within_budget']
+
+    return 1 if over_budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())